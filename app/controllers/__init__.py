@@ -15,16 +15,21 @@ from .clusters import (
     ClusterPvcDetailView, ClusterPVsView, ClusterPVDetailView,
     ClusterPodsView, ClusterPodDetailView, ClusterServicesView,
     ClusterServiceDetailView, ClusterJobsView, ClusterJobDetailView,
-    ClusterStorageClassView, ClusterStorageClassDetailView)
+    ClusterStorageClassView, ClusterStorageClassDetailView, ClusterDriftView)
 from .roles import RolesView, RolesDetailView
 from .user_role import UserRolesView
 from .organisation_admins import OrgAdminView
 from .organisation_members import OrgMemberView
 from .project import (
     ProjectsView, ProjectDetailView, UserProjectsView,
-    ProjectCPUView, ProjectMemoryUsageView, ProjectNetworkRequestView, ProjectStorageUsageView)
+    ProjectCPUView, ProjectMemoryUsageView, ProjectNetworkRequestView, ProjectStorageUsageView,
+    ProjectMetricsView)
 from .app import (AppsView, ProjectAppsView, AppDetailView, AppLogsView,
-                  AppCpuUsageView, AppMemoryUsageView, AppNetworkUsageView, AppStorageUsageView)
+                  AppCpuUsageView, AppMemoryUsageView, AppNetworkUsageView, AppStorageUsageView,
+                  AppMetricsView, AppDeploymentStatusView)
 from .registry import RegistriesView
 from .project_database import (ProjectDatabaseView, ProjectDatabaseDetailView, ProjectDatabaseAdminView,
-                               ProjectDatabaseAdminDetailView, ProjectDatabaseResetView, ProjectDatabaseAdminResetView)
+                               ProjectDatabaseAdminDetailView, ProjectDatabaseResetView, ProjectDatabaseAdminResetView,
+                               DatabaseHealthView, ProjectDatabaseStatsView, DatabaseStatsView,
+                               ProjectDatabaseExportView, ProjectDatabaseImportView)
+from .database_server import DatabaseServersView, DatabaseServerDetailView
@@ -1,7 +1,7 @@
 import json
-from urllib.parse import urlsplit
-import base64
+import uuid
 import datetime
+from flask import Response
 from flask_restful import Resource, request
 from kubernetes import client
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt_claims
@@ -9,15 +9,69 @@ import datetime
 from prometheus_http_client import Prometheus
 from app.models.app import App
 from app.models.project import Project
-from app.helpers.kube import create_kube_clients
-from app.schemas import AppSchema, MetricsSchema, PodsLogsSchema
+from app.helpers.kube import get_kube_clients
+from app.schemas import AppSchema, MetricsSchema, MultiMetricsSchema, PodsLogsSchema
 from app.helpers.admin import is_owner_or_admin
 from app.helpers.decorators import admin_required
 from app.helpers.alias import create_alias
-from app.models.clusters import Cluster
-from app.helpers.clean_up import resource_clean_up
-from app.helpers.prometheus import prometheus
-from app.helpers.url import get_app_subdomain
+from app.helpers.app_deployment import (
+    get_error_message, prepare_deployment, release_image_pull_secret)
+from app.helpers.prometheus import query_range, query_metrics, get_default_range
+from app.helpers.app_status import is_live_read, refresh_app_statuses
+from app.helpers.pagination import get_page
+from app.helpers.serializer import get_schema
+from app.helpers.response_cache import cached_response
+from app.helpers.etag import conditional, row_version, rows_version
+from app.helpers.pod_logs import (
+    list_app_pods, pod_is_ready, get_waiting_info, read_pod_logs, stream_pod_logs)
+
+
+def queue_app_deployment(project, app_data, persistent_storage=False):
+    """
+    Queue an app's deployment. Registry credentials are used here and
+    never reach the broker, and the deployment's project is recorded
+    before it is queued so its status can be authorised in every state.
+    """
+    # imported here, celery_tasks imports the server
+    from celery_tasks import deploy_app_task
+
+    task_data = prepare_deployment(project, app_data)
+    task_id = str(uuid.uuid4())
+
+    try:
+        deploy_app_task.backend.store_result(
+            task_id,
+            dict(project_id=str(project.id), app_name=app_data['name']),
+            'QUEUED')
+
+        return deploy_app_task.apply_async(
+            (str(project.id), task_data),
+            dict(persistent_storage=persistent_storage),
+            task_id=task_id)
+    except Exception:
+        # nothing will deploy the app, do not leave its secret behind
+        release_image_pull_secret(project, task_data)
+        raise
+
+
+def project_apps_version(project_id):
+    # a live read goes to the cluster, there is no version to compare
+    if is_live_read():
+        return None
+
+    project = row_version(Project, project_id, Project.active())
+
+    if project is None:
+        return None
+
+    return project, rows_version(App.query.filter_by(project_id=project_id), App)
+
+
+def app_version(app_id):
+    if is_live_read():
+        return None
+
+    return row_version(App, app_id)
 
 
 class AppsView(Resource):
@@ -27,21 +81,15 @@ class AppsView(Resource):
         """
         """
 
-        resource_registry = {
-            'db_deployment': False,
-            'db_service': False,
-            'image_pull_secret': False,
-            'app_deployment': False,
-            'app_service': False,
-            'ingress_entry': False
-        }
-
         app_schema = AppSchema()
 
         app_data = request.get_json()
 
         validated_app_data, errors = app_schema.load(app_data)
 
+        if errors:
+            return dict(status='fail', message=errors), 400
+
         # check for existing app based on name and project_id
         existing_app = App.find_first(
             name=validated_app_data['name'],
@@ -53,38 +101,21 @@ class AppsView(Resource):
                 message=f'App with name {validated_app_data["name"]} already exists'
             ), 409
 
-        if errors:
-            return dict(status='fail', message=errors), 400
-
         validated_app_data['port'] = validated_app_data.get('port', 80)
 
         app_name = validated_app_data['name']
-        app_alias = create_alias(validated_app_data['name'])
-        app_image = validated_app_data['image']
-        command = validated_app_data.get('command', None)
         project_id = validated_app_data['project_id']
-        # env_vars = validated_app_data['env_vars']
-        env_vars = validated_app_data.get('env_vars', None)
-        private_repo = validated_app_data.get('private_image', False)
-        docker_server = validated_app_data.get('docker_server', None)
-        docker_username = validated_app_data.get('docker_username', None)
-        docker_password = validated_app_data.get('docker_password', None)
-        docker_email = validated_app_data.get('docker_email', None)
-        replicas = validated_app_data.get('replicas', 1)
-        app_port = validated_app_data.get('port')
-        image_pull_secret = None
+        command = validated_app_data.get('command', None)
 
-        command = command.split() if command else None
+        validated_app_data['alias'] = create_alias(app_name)
+        validated_app_data['command'] = command.split() if command else None
 
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
 
         if not project:
             return dict(status='fail', message=f'Project {project_id} not found'), 404
 
-        cluster = project.cluster
-        namespace = project.alias
-
-        if not cluster:
+        if not project.cluster:
             return dict(status='fail', message="Invalid Cluster"), 500
 
         # check if app already exists
@@ -93,270 +124,19 @@ class AppsView(Resource):
         if app:
             return dict(status='fail', message=f'App {app_name} already exists'), 409
 
-        kube_host = cluster.host
-        kube_token = cluster.token
-        service_host = urlsplit(kube_host).hostname
-
-        kube_client = create_kube_clients(kube_host, kube_token)
-
         try:
-
-            # create the app
-            new_app = App(
-                name=app_name,
-                image=app_image,
-                project_id=project_id,
-                alias=app_alias,
-                port=app_port
-            )
-
-            if private_repo:
-
-                # handle gcr credentials
-                if 'gcr' in docker_server and docker_username == '_json_key':
-                    docker_password = json.dumps(
-                        json.loads(base64.b64decode(docker_password)))
-
-                # create image pull secrets
-                authstring = base64.b64encode(
-                    f'{docker_username}:{docker_password}'.encode("utf-8"))
-
-                secret_dict = dict(auths={
-                    docker_server: {
-                        "username": docker_username,
-                        "password": str(docker_password),
-                        "email": docker_email,
-                        "auth": str(authstring, "utf-8")
-                    }
-                })
-
-                secret_b64 = base64.b64encode(
-                    json.dumps(secret_dict).encode("utf-8"))
-
-                secret_body = client.V1Secret(
-                    metadata=client.V1ObjectMeta(name=app_alias),
-                    type='kubernetes.io/dockerconfigjson',
-                    data={'.dockerconfigjson': str(secret_b64, "utf-8")})
-
-                kube_client.kube.create_namespaced_secret(
-                    namespace=namespace,
-                    body=secret_body,
-                    _preload_content=False)
-
-                # update registry
-                resource_registry['image_pull_secret'] = True
-
-                image_pull_secret = client.V1LocalObjectReference(
-                    name=app_alias)
-
-            # create app deployment's pvc meta and spec
-            pvc_name = f'{app_alias}-pvc'
-            pvc_meta = client.V1ObjectMeta(name=pvc_name)
-
-            access_modes = ['ReadWriteOnce']
-            storage_class = 'openebs-standard'
-            resources = client.V1ResourceRequirements(
-                requests=dict(storage='1Gi'))
-
-            pvc_spec = client.V1PersistentVolumeClaimSpec(
-                access_modes=access_modes, resources=resources, storage_class_name=storage_class)
-
-            # Create a PVC 
-            pvc = client.V1PersistentVolumeClaim(
-                api_version="v1",
-                kind="PersistentVolumeClaim", 
-                metadata=pvc_meta,
-                spec=pvc_spec
-            )
-
-            kube_client.kube.create_namespaced_persistent_volume_claim(
-                namespace=namespace,
-                body=pvc
-            )
-
-            # create deployment
-            dep_name = f'{app_alias}-deployment'
-
-            # # EnvVar
-            env = []
-            if env_vars:
-                for key, value in env_vars.items():
-                    env.append(client.V1EnvVar(
-                        name=str(key), value=str(value)
-                    ))
-
-            # pod template
-            container = client.V1Container(
-                name=app_alias,
-                image=app_image,
-                ports=[client.V1ContainerPort(container_port=app_port)],
-                env=env,
-                command=command,
-                volume_mounts=[client.V1VolumeMount(mount_path="/data", name=dep_name)]
-            )
-
-            volumes = client.V1Volume(
-                name=dep_name,
-                persistent_volume_claim=client.V1PersistentVolumeClaimVolumeSource(claim_name=pvc_name)
-            )
-            # spec
-            template = client.V1PodTemplateSpec(
-                metadata=client.V1ObjectMeta(labels={
-                    'app': app_alias
-                }),
-                spec=client.V1PodSpec(
-                    containers=[container],
-                    image_pull_secrets=[image_pull_secret],
-                    volumes=[volumes]
-                )
-            )
-
-            # spec of deployment
-            spec = client.V1DeploymentSpec(
-                replicas=replicas,
-                template=template,
-                selector={'matchLabels': {'app': app_alias}}
-            )
-
-            # Instantiate the deployment
-            deployment = client.V1Deployment(
-                api_version="apps/v1",
-                kind="Deployment",
-                metadata=client.V1ObjectMeta(name=dep_name),
-                spec=spec
-            )
-
-            # app deployment
-            kube_client.appsv1_api.create_namespaced_deployment(
-                body=deployment,
-                namespace=namespace,
-                _preload_content=False
-            )
-
-            # update registry
-            resource_registry['app_deployment'] = True
-
-            # create service in the cluster
-            service_name = f'{app_alias}-service'
-
-            service_meta = client.V1ObjectMeta(
-                name=service_name,
-                labels={'app': app_alias}
-            )
-
-            service_port = client.V1ServicePort(port=3000, target_port=app_port)
-
-            service_spec = client.V1ServiceSpec(
-                type='ClusterIP',
-                ports=[service_port],
-                selector={'app': app_alias}
-            )
-
-            service = client.V1Service(
-                metadata=service_meta,
-                spec=service_spec)
-
-            kube_client.kube.create_namespaced_service(
-                namespace=namespace,
-                body=service,
-                _preload_content=False
-            )
-
-            # update resource registry
-            resource_registry['app_service'] = True
-
-            # subdomain for the app
-            # sub_domain = f'{app_alias}.cranecloud.io'
-            sub_domain = get_app_subdomain(app_alias)
-
-            # create new ingress rule for the application
-            new_ingress_backend = client.ExtensionsV1beta1IngressBackend(
-                service_name=service_name,
-                service_port=3000
-                )
-
-            new_ingress_rule = client.ExtensionsV1beta1IngressRule(
-                host=sub_domain,
-                http=client.ExtensionsV1beta1HTTPIngressRuleValue(
-                    paths=[client.ExtensionsV1beta1HTTPIngressPath(
-                        path="",
-                        backend=new_ingress_backend
-                        )]
-                    )
-                )
-
-            ingress_name = f'{project.alias}-ingress'
-
-            # Check if there is an ingress resource in the namespace, create if not
-
-            ingress_list = kube_client.extension_api.list_namespaced_ingress(
-                namespace=namespace).items
-
-            if not ingress_list:
-
-                ingress_meta = client.V1ObjectMeta(
-                    name=ingress_name
-                )
-
-                ingress_spec = client.ExtensionsV1beta1IngressSpec(
-                    # backend=ingress_backend,
-                    rules=[new_ingress_rule]
-                )
-
-                ingress_body = client.ExtensionsV1beta1Ingress(
-                    metadata=ingress_meta,
-                    spec=ingress_spec
-                )
-
-                kube_client.extension_api.create_namespaced_ingress(
-                    namespace=namespace,
-                    body=ingress_body
-                )
-
-                # update registry
-                resource_registry['ingress_entry'] = True
-            else:
-                # Update ingress with new entry
-                ingress = ingress_list[0]
-
-                ingress.spec.rules.append(new_ingress_rule)
-
-                kube_client.extension_api.patch_namespaced_ingress(
-                    name=ingress_name,
-                    namespace=namespace,
-                    body=ingress
-                )
-
-            service_url = f'https://{sub_domain}'
-
-            new_app.url = service_url
-
-            saved = new_app.save()
-
-            if not saved:
-                return dict(status='fail', message='Internal Server Error'), 500
-
-            new_app_data, _ = app_schema.dump(new_app)
-
-            return dict(status='success', data=dict(app=new_app_data)), 201
-
+            task = queue_app_deployment(
+                project, validated_app_data, persistent_storage=True)
         except client.rest.ApiException as e:
-            resource_clean_up(
-                resource_registry,
-                app_alias,
-                namespace,
-                kube_client
-            )
-            return dict(status='fail', message=json.loads(e.body)), 500
+            return dict(status='fail', message=get_error_message(e)), 500
 
-        except Exception as e:
-            resource_clean_up(
-                resource_registry,
-                app_alias,
-                namespace,
-                kube_client
+        return dict(
+            status='success',
+            data=dict(
+                task_id=task.id,
+                app=dict(name=app_name, alias=validated_app_data['alias'])
             )
-            return dict(status='fail', message=str(e)), 500
+        ), 202
 
 
 class ProjectAppsView(Resource):
@@ -366,15 +146,6 @@ class ProjectAppsView(Resource):
         """
         """
 
-        resource_registry = {
-            'db_deployment': False,
-            'db_service': False,
-            'image_pull_secret': False,
-            'app_deployment': False,
-            'app_service': False,
-            'ingress_entry': False
-        }
-
         current_user_id = get_jwt_identity()
         current_user_roles = get_jwt_claims()['roles']
 
@@ -401,23 +172,12 @@ class ProjectAppsView(Resource):
         validated_app_data['port'] = validated_app_data.get('port', 80)
 
         app_name = validated_app_data['name']
-        app_alias = create_alias(validated_app_data['name'])
-        app_image = validated_app_data['image']
         command = validated_app_data.get('command', None)
-        # env_vars = validated_app_data['env_vars']
-        env_vars = validated_app_data.get('env_vars', None)
-        private_repo = validated_app_data.get('private_image', False)
-        docker_server = validated_app_data.get('docker_server', None)
-        docker_username = validated_app_data.get('docker_username', None)
-        docker_password = validated_app_data.get('docker_password', None)
-        docker_email = validated_app_data.get('docker_email', None)
-        replicas = validated_app_data.get('replicas', 1)
-        app_port = validated_app_data.get('port', None)
-        image_pull_secret = None
 
-        command = command.split() if command else None
+        validated_app_data['alias'] = create_alias(app_name)
+        validated_app_data['command'] = command.split() if command else None
 
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
 
         if not project:
             return dict(status='fail', message=f'project {project_id} not found'), 404
@@ -425,10 +185,7 @@ class ProjectAppsView(Resource):
         if not is_owner_or_admin(project, current_user_id, current_user_roles):
             return dict(status='fail', message='Unauthorised'), 403
 
-        cluster = project.cluster
-        namespace = project.alias
-
-        if not cluster:
+        if not project.cluster:
             return dict(status='fail', message="Invalid Cluster"), 500
 
         # check if app already exists
@@ -440,279 +197,22 @@ class ProjectAppsView(Resource):
                 message=f'App {app_name} already exists'
             ), 409
 
-        kube_host = cluster.host
-        kube_token = cluster.token
-        service_host = urlsplit(kube_host).hostname
-
-        kube_client = create_kube_clients(kube_host, kube_token)
-
         try:
-
-            # create the app
-            new_app = App(
-                name=app_name,
-                image=app_image,
-                project_id=project_id,
-                alias=app_alias,
-                port=app_port
-            )
-
-            if private_repo:
-
-                # handle gcr credentials
-                if 'gcr' in docker_server and docker_username == '_json_key':
-                    docker_password = json.dumps(
-                        json.loads(base64.b64decode(docker_password))
-                    )
-
-                # create image pull secrets
-                authstring = base64.b64encode(
-                    f'{docker_username}:{docker_password}'.encode("utf-8"))
-
-                secret_dict = dict(auths={
-                    docker_server: {
-                        "username": docker_username,
-                        "password": docker_password,
-                        "email": docker_email,
-                        "auth": str(authstring, "utf-8")
-                    }
-                })
-
-                secret_b64 = base64.b64encode(
-                    json.dumps(secret_dict).encode("utf-8")
-                )
-
-                secret_body = client.V1Secret(
-                    metadata=client.V1ObjectMeta(name=app_alias),
-                    type='kubernetes.io/dockerconfigjson',
-                    data={'.dockerconfigjson': str(secret_b64, "utf-8")})
-
-                kube_client.kube.create_namespaced_secret(
-                    namespace=namespace,
-                    body=secret_body,
-                    _preload_content=False)
-
-                # update registry
-                resource_registry['image_pull_secret'] = True
-
-                image_pull_secret = client.V1LocalObjectReference(
-                    name=app_alias)
-
-            # create app deployment's pvc meta and spec
-            pvc_name = f'{app_alias}-pvc'
-            pvc_meta = client.V1ObjectMeta(name=pvc_name)
-
-            access_modes = ['ReadWriteOnce']
-            storage_class = 'openebs-standard'
-            resources = client.V1ResourceRequirements(
-                requests=dict(storage='1Gi'))
-
-            pvc_spec = client.V1PersistentVolumeClaimSpec(
-                access_modes=access_modes, resources=resources, storage_class_name=storage_class)
-
-            # Create a PVC 
-            pvc = client.V1PersistentVolumeClaim(
-                api_version="v1",
-                kind="PersistentVolumeClaim", 
-                metadata=pvc_meta,
-                spec=pvc_spec
-            )
-
-            # kube_client.kube.create_namespaced_persistent_volume_claim(
-            #     namespace=namespace,
-            #     body=pvc
-            # )
-
-
-            # create deployment
-            dep_name = f'{app_alias}-deployment'
-
-            # # EnvVar
-            env = []
-            if env_vars:
-                for key, value in env_vars.items():
-                    env.append(client.V1EnvVar(
-                        name=str(key), value=str(value)
-                    ))
-
-            # pod template
-            container = client.V1Container(
-                name=app_alias,
-                image=app_image,
-                ports=[client.V1ContainerPort(container_port=app_port)],
-                env=env,
-                command=command
-                # volume_mounts=[client.V1VolumeMount(mount_path="/data", name=dep_name)]
-            )
-
-            #pod volumes 
-            volumes = client.V1Volume(
-                name=dep_name
-                # persistent_volume_claim=client.V1PersistentVolumeClaimVolumeSource(claim_name=pvc_name)
-            )
-
-            # spec
-            template = client.V1PodTemplateSpec(
-                metadata=client.V1ObjectMeta(labels={
-                    'app': app_alias
-                }),
-                spec=client.V1PodSpec(
-                    containers=[container],
-                    image_pull_secrets=[image_pull_secret]
-                    # volumes=[volumes]
-                )
-            )
-
-            # spec of deployment
-            spec = client.V1DeploymentSpec(
-                replicas=replicas,
-                template=template,
-                selector={'matchLabels': {'app': app_alias}}
-            )
-
-            # Instantiate the deployment
-            deployment = client.V1Deployment(
-                api_version="apps/v1",
-                kind="Deployment",
-                metadata=client.V1ObjectMeta(name=dep_name),
-                spec=spec
-            )
-
-            # create deployment in  cluster
-
-            kube_client.appsv1_api.create_namespaced_deployment(
-                body=deployment,
-                namespace=namespace,
-                _preload_content=False
-            )
-
-            # update registry
-            resource_registry['app_deployment'] = True
-
-            # create service in the cluster
-            service_name = f'{app_alias}-service'
-
-            service_meta = client.V1ObjectMeta(
-                name=service_name,
-                labels={'app': app_alias}
-            )
-
-            service_spec = client.V1ServiceSpec(
-                type='ClusterIP',
-                ports=[client.V1ServicePort(port=3000, target_port=app_port)],
-                selector={'app': app_alias}
-            )
-
-            service = client.V1Service(
-                metadata=service_meta,
-                spec=service_spec)
-
-            kube_client.kube.create_namespaced_service(
-                namespace=namespace,
-                body=service,
-                _preload_content=False
-            )
-
-            # update resource registry
-            resource_registry['app_service'] = True
-
-            # subdomain for the app
-            # sub_domain = f'{app_alias}.cranecloud.io'
-            sub_domain = get_app_subdomain(app_alias)
-
-            # create new ingres rule for the application
-            new_ingress_backend = client.ExtensionsV1beta1IngressBackend(
-                service_name=service_name,
-                service_port=3000
-                )
-
-            new_ingress_rule = client.ExtensionsV1beta1IngressRule(
-                host=sub_domain,
-                http=client.ExtensionsV1beta1HTTPIngressRuleValue(
-                    paths=[client.ExtensionsV1beta1HTTPIngressPath(
-                        path="",
-                        backend=new_ingress_backend
-                        )]
-                    )
-                )
-
-            ingress_name = f'{project.alias}-ingress'
-
-            # Check if there is an ingress resource in the namespace, create if not
-
-            ingress_list = kube_client.extension_api.list_namespaced_ingress(
-                namespace=namespace).items
-
-            if not ingress_list:
-
-                ingress_meta = client.V1ObjectMeta(
-                    name=ingress_name
-                )
-
-                ingress_spec = client.ExtensionsV1beta1IngressSpec(
-                    # backend=ingress_backend,
-                    rules=[new_ingress_rule]
-                )
-
-                ingress_body = client.ExtensionsV1beta1Ingress(
-                    metadata=ingress_meta,
-                    spec=ingress_spec
-                )
-
-                kube_client.extension_api.create_namespaced_ingress(
-                    namespace=namespace,
-                    body=ingress_body
-                )
-
-                # update registry
-                resource_registry['ingress_entry'] = True
-            else:
-                # Update ingress with new entry
-                ingress = ingress_list[0]
-
-                ingress.spec.rules.append(new_ingress_rule)
-
-                kube_client.extension_api.patch_namespaced_ingress(
-                    name=ingress_name,
-                    namespace=namespace,
-                    body=ingress
-                )
-
-            service_url = f'https://{sub_domain}'
-
-            new_app.url = service_url
-
-            saved = new_app.save()
-
-            if not saved:
-                return dict(
-                    status='fail',
-                    message='Internal Server Error'
-                ), 500
-
-            new_app_data, _ = app_schema.dump(new_app)
-
-            return dict(status='success', data=dict(app=new_app_data)), 201
-
+            task = queue_app_deployment(project, validated_app_data)
         except client.rest.ApiException as e:
-            resource_clean_up(
-                resource_registry,
-                app_alias,
-                namespace,
-                kube_client
-            )
-            return dict(status='fail', message=json.loads(e.body)), 500
+            return dict(status='fail', message=get_error_message(e)), 500
 
-        except Exception as e:
-            resource_clean_up(
-                resource_registry,
-                app_alias,
-                namespace,
-                kube_client
+        return dict(
+            status='success',
+            data=dict(
+                task_id=task.id,
+                app=dict(name=app_name, alias=validated_app_data['alias'])
             )
-            return dict(status='fail', message=str(e)), 500
+        ), 202
 
     @jwt_required
+    @conditional(project_apps_version)
+    @cached_response('project:{project_id}', unless=is_live_read)
     def get(self, project_id):
         """
         """
@@ -720,9 +220,9 @@ class ProjectAppsView(Resource):
             current_user_id = get_jwt_identity()
             current_user_roles = get_jwt_claims()['roles']
 
-            app_schema = AppSchema(many=True)
+            app_schema = get_schema(AppSchema, many=True)
 
-            project = Project.get_by_id(project_id)
+            project = Project.get_active(project_id, 'cluster')
 
             if not project:
                 return dict(status='fail', message=f'project {project_id} not found'), 404
@@ -730,63 +230,34 @@ class ProjectAppsView(Resource):
             if not is_owner_or_admin(project, current_user_id, current_user_roles):
                 return dict(status='fail', message='Unauthorised'), 403
 
-            cluster = Cluster.get_by_id(project.cluster_id)
-
-            if not cluster:
-                return dict(status='fail', message=f'cluster with id {project.cluster_id} does not exist'), 404
-
-            kube_host = cluster.host
-            kube_token = cluster.token
-            kube_client = create_kube_clients(kube_host, kube_token)
-
-            apps = App.find_all(project_id=project_id)
-
-            apps_data, errors = app_schema.dumps(apps)
+            apps, pagination, errors = get_page(
+                App, schema=AppSchema, filterable=('name', 'status'),
+                project_id=project_id)
 
             if errors:
-                return dict(status='fail', message=errors), 500
-
-            apps_data_list = json.loads(apps_data)
+                return dict(status='fail', message=errors), 400
 
-            for app in apps_data_list:
-                app_status_object = \
-                    kube_client.appsv1_api.read_namespaced_deployment_status(
-                        app['alias']+"-deployment", project.alias)
-
-                app_deployment_status_conditions = app_status_object.status.conditions
-
-                for deplyoment_status_condition in app_deployment_status_conditions:
-                    if deplyoment_status_condition.type == "Available":
-                        app_deployment_status = deplyoment_status_condition.status
+            if apps is False:
+                return dict(status='fail', message='Internal Server Error'), 500
 
-                try:
-                    app_db_status_object = \
-                        kube_client.appsv1_api.read_namespaced_deployment_status(
-                            app['alias']+"-postgres-db", project.alias)
+            # statuses are kept up to date by the reconciler, unless asked
+            # for they are not read from the cluster
+            if is_live_read():
+                cluster = project.cluster
 
-                    app_db_state_conditions = app_db_status_object.status.conditions
+                if not cluster:
+                    return dict(status='fail', message=f'cluster with id {project.cluster_id} does not exist'), 404
 
-                    for app_db_condition in app_db_state_conditions:
-                        if app_db_condition.type == "Available":
-                            app_db_status = app_db_condition.status
+                refresh_app_statuses(
+                    get_kube_clients(cluster), project.alias, apps)
 
-                except client.rest.ApiException:
-                    app_db_status = None
+            apps_data_list, errors = app_schema.dump(apps)
 
-                if app_deployment_status and not app_db_status:
-                    if app_deployment_status == "True":
-                        app['app_running_status'] = "running"
-                    else:
-                        app['app_running_status'] = "failed"
-                elif app_deployment_status and app_db_status:
-                    if app_deployment_status == "True" and app_db_status == "True":
-                        app['app_running_status'] = "running"
-                    else:
-                        app['app_running_status'] = "failed"
-                else:
-                    app['app_running_status'] = "unknown"
+            if errors:
+                return dict(status='fail', message=errors), 500
 
-            return dict(status='success', data=dict(apps=apps_data_list)), 200
+            return dict(status='success', data=dict(
+                apps=apps_data_list, pagination=pagination)), 200
 
         except client.rest.ApiException as exc:
             return dict(status='fail', message=exc.reason), exc.status
@@ -798,6 +269,7 @@ class ProjectAppsView(Resource):
 class AppDetailView(Resource):
 
     @jwt_required
+    @conditional(app_version)
     def get(self, app_id):
         """
         """
@@ -807,7 +279,7 @@ class AppDetailView(Resource):
 
             app_schema = AppSchema()
 
-            app = App.get_by_id(app_id)
+            app = App.get_by_id_with(app_id, 'project.cluster')
 
             if not app:
                 return dict(status='fail', message=f'App {app_id} not found'), 404
@@ -820,60 +292,21 @@ class AppDetailView(Resource):
             if not is_owner_or_admin(project, current_user_id, current_user_roles):
                 return dict(status='fail', message='Unauthorised'), 403
 
-            app_data, errors = app_schema.dumps(app)
-
-            if errors:
-                return dict(status='fail', message=errors), 500
-
-            app_list = json.loads(app_data)
-
-            cluster = Cluster.get_by_id(project.cluster_id)
-
-            if not cluster:
-                return dict(
-                    status='fail',
-                    message=f'cluster with id {project.cluster_id} does not exist'), 404
-
-            kube_host = cluster.host
-            kube_token = cluster.token
-            kube_client = create_kube_clients(kube_host, kube_token)
+            if is_live_read():
+                cluster = project.cluster
 
-            app_status_object = \
-                kube_client.appsv1_api.read_namespaced_deployment_status(
-                    app_list['alias']+"-deployment", project.alias)
+                if not cluster:
+                    return dict(
+                        status='fail',
+                        message=f'cluster with id {project.cluster_id} does not exist'), 404
 
-            app_deployment_status_conditions = app_status_object.status.conditions
+                refresh_app_statuses(
+                    get_kube_clients(cluster), project.alias, [app])
 
-            for deplyoment_status_condition in app_deployment_status_conditions:
-                if deplyoment_status_condition.type == "Available":
-                    app_deployment_status = deplyoment_status_condition.status
+            app_list, errors = app_schema.dump(app)
 
-            try:
-                app_db_status_object = \
-                    kube_client.appsv1_api.read_namespaced_deployment_status(
-                        app_list['alias']+"-postgres-db", project.alias)
-
-                app_db_state_conditions = app_db_status_object.status.conditions
-
-                for app_db_condition in app_db_state_conditions:
-                    if app_db_condition.type == "Available":
-                        app_db_status = app_db_condition.status
-
-            except client.rest.ApiException:
-                app_db_status = None
-
-            if app_deployment_status and not app_db_status:
-                if app_deployment_status == "True":
-                    app_list['app_running_status'] = "running"
-                else:
-                    app_list['app_running_status'] = "failed"
-            elif app_deployment_status and app_db_status:
-                if app_deployment_status == "True" and app_db_status == "True":
-                    app_list['app_running_status'] = "running"
-                else:
-                    app_list['app_running_status'] = "failed"
-            else:
-                app_list['app_running_status'] = "unknown"
+            if errors:
+                return dict(status='fail', message=errors), 500
 
             return dict(status='success', data=dict(apps=app_list)), 200
 
@@ -893,7 +326,7 @@ class AppDetailView(Resource):
             current_user_id = get_jwt_identity()
             current_user_roles = get_jwt_claims()['roles']
 
-            app = App.get_by_id(app_id)
+            app = App.get_by_id_with(app_id, 'project.cluster')
 
             if not app:
                 return dict(status='fail', message=f'app {app_id} not found'), 404
@@ -912,10 +345,7 @@ class AppDetailView(Resource):
             if not cluster or not namespace:
                 return dict(status='fail', message='Internal server error'), 500
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            kube_client = get_kube_clients(cluster)
 
             # delete deployment and service for the app
             deployment_name = f'{app.alias}-deployment'
@@ -997,7 +427,7 @@ class AppMemoryUsageView(Resource):
         current_user_id = get_jwt_identity()
         current_user_roles = get_jwt_claims()['roles']
 
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
 
         if not project:
             return dict(
@@ -1016,23 +446,16 @@ class AppMemoryUsageView(Resource):
         app_alias = app.alias
         namespace = project.alias
 
-        prom_memory_data = prometheus.query_rang(
+        prom_memory_data = query_range(
             start=start,
             end=end,
             step=step,
             metric='sum(rate(container_memory_usage_bytes{container_name!="POD", image!="",pod=~"'+app_alias+'.*", namespace="'+namespace+'"}[5m]))')
 
-        new_data = json.loads(prom_memory_data)
-        final_data_list = []
-        try:
-            for value in new_data["data"]["result"][0]["values"]:
-                mem_case = {'timestamp': float(
-                    value[0]), 'value': float(value[1])}
-                final_data_list.append(mem_case)
-        except:
+        if not prom_memory_data:
             return dict(status='fail', message='No values found'), 404
 
-        return dict(status='success', data=dict(values=final_data_list)), 200
+        return dict(status='success', data=dict(values=prom_memory_data)), 200
 
 
 class AppCpuUsageView(Resource):
@@ -1050,7 +473,7 @@ class AppCpuUsageView(Resource):
         if errors:
             return dict(status='fail', message=errors), 400
 
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
 
         if not project:
             return dict(
@@ -1076,30 +499,22 @@ class AppCpuUsageView(Resource):
         namespace = project.alias
         app_alias = app.alias
 
-        prometheus = Prometheus()
-
         start = validated_query_data.get('start', yesterday.timestamp())
         end = validated_query_data.get('end', current_time.timestamp())
         step = validated_query_data.get('step', '1h')
 
-        prom_data = prometheus.query_rang(
+        prom_data = query_range(
             start=start,
             end=end,
             step=step,
             metric='sum(rate(container_cpu_usage_seconds_total{container!="POD", image!="", namespace="' +
             namespace+'", pod=~"'+app_alias+'.*"}[5m]))'
         )
-        #  change array values to json"values"
-        new_data = json.loads(prom_data)
-        cpu_data_list = []
-        try:
-            for value in new_data["data"]["result"][0]["values"]:
-                case = {'timestamp': float(value[0]), 'value': float(value[1])}
-                cpu_data_list.append(case)
-        except:
+
+        if not prom_data:
             return dict(status='fail', message='No values found'), 404
 
-        return dict(status='success', data=dict(values=cpu_data_list)), 200
+        return dict(status='success', data=dict(values=prom_data)), 200
 
 
 class AppNetworkUsageView(Resource):
@@ -1118,7 +533,7 @@ class AppNetworkUsageView(Resource):
         if errors:
             return dict(status='fail', message=errors), 400
 
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
 
         if not project:
             return dict(
@@ -1144,30 +559,22 @@ class AppNetworkUsageView(Resource):
         namespace = project.alias
         app_alias = app.alias
 
-        prometheus = Prometheus()
-
         start = validated_query_data.get('start', yesterday.timestamp())
         end = validated_query_data.get('end', current_time.timestamp())
         step = validated_query_data.get('step', '1h')
 
-        prom_data = prometheus.query_rang(
+        prom_data = query_range(
             start=start,
             end=end,
             step=step,
             metric='sum(rate(container_network_receive_bytes_total{namespace="' +
             namespace+'", pod=~"'+app_alias+'.*"}[5m]))'
         )
-        #  change array values to json "values"
-        new_data = json.loads(prom_data)
-        network_data_list = []
-        try:
-            for value in new_data["data"]["result"][0]["values"]:
-                case = {'timestamp': float(value[0]), 'value': float(value[1])}
-                network_data_list.append(case)
-        except:
+
+        if not prom_data:
             return dict(status='fail', message='No values found'), 404
 
-        return dict(status='success', data=dict(values=network_data_list)), 200
+        return dict(status='success', data=dict(values=prom_data)), 200
 
 
 class AppLogsView(Resource):
@@ -1185,7 +592,7 @@ class AppLogsView(Resource):
         if errors:
             return dict(status='fail', message=errors), 400
 
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
 
         if not project:
             return dict(
@@ -1209,84 +616,49 @@ class AppLogsView(Resource):
         if not cluster:
             return dict(status='fail', message="Invalid Cluster"), 500
 
-        kube_host = cluster.host
-        kube_token = cluster.token
-        kube_client = create_kube_clients(kube_host, kube_token)
+        kube_client = get_kube_clients(cluster)
 
         namespace = project.alias
-        deployment = app.alias
 
         tail_lines = validated_query_data.get('tail_lines', 100)
-        since_seconds = validated_query_data.get('since_seconds', 86400)
+        since_seconds = validated_query_data.get('since_seconds', None)
         timestamps = validated_query_data.get('timestamps', False)
+        follow = validated_query_data.get('follow', False)
 
-        ''' Get Replicas sets'''
-        replicas = kube_client.appsv1_api.list_namespaced_replica_set(
-            namespace).to_dict()
-        replicasList = []
-        for replica in replicas['items']:
-            name = replica['metadata']['name']
-            if name.startswith(deployment):
-                replicasList.append(name)
-
-        ''' get pods list'''
-        pods = kube_client.kube.list_namespaced_pod(namespace)
-        podsList = []
-        failed_pods = []
-        for item in pods.items:
-            item = kube_client.api_client.sanitize_for_serialization(item)
-            pod_name = item['metadata']['name']
-
-            try:
-                status = item['status']['conditions'][1]['status']
-            except:
-                continue
-
-            for replica in replicasList:
-                if pod_name.startswith(replica):
-                    if status == 'True':
-                        podsList.append(pod_name)
-                    else:
-                        failed_pods.append(pod_name)
-                    continue
-
-            if pod_name.startswith(deployment):
-                if status == 'True':
-                    podsList.append(pod_name)
-                else:
-                    state = item['status']['containerStatuses'][0]['state']
-                    failed_pods.append(state)
+        log_params = dict(
+            tail_lines=tail_lines or 100,
+            timestamps=timestamps or False
+        )
 
-        ''' Get pods logs '''
-        pods_logs = []
+        # only restrict the time window when asked to, tail_lines already
+        # bounds the size of the logs
+        if since_seconds:
+            log_params['since_seconds'] = since_seconds
 
-        for pod in podsList:
-            podLogs = kube_client.kube.read_namespaced_pod_log(
-                pod, namespace, pretty=True, tail_lines=tail_lines or 100,
-                timestamps=timestamps or False,
-                since_seconds=since_seconds or 86400
+        ''' get the app's pods '''
+        pods = list_app_pods(kube_client, namespace, app.alias)
+
+        running_pods = [
+            pod['metadata']['name'] for pod in pods if pod_is_ready(pod)]
+
+        if follow:
+            if not running_pods:
+                return dict(status='fail', data=dict(message='No running pods found')), 404
+
+            return Response(
+                stream_pod_logs(kube_client, namespace, running_pods, **log_params),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
             )
 
-            if podLogs == '':
-                podLogs = kube_client.kube.read_namespaced_pod_log(
-                    pod, namespace, pretty=True, tail_lines=tail_lines or 100,
-                    timestamps=timestamps or False
-                )
-            pods_logs.append(podLogs)
+        ''' Get pods logs '''
+        pods_logs = read_pod_logs(
+            kube_client, namespace, running_pods, pretty=True, **log_params)
 
         # Get failed pods infor
-        for state in failed_pods:
-            waiting = state.get('waiting')
-            if waiting:
-                try:
-                    stop = state['waiting']['message'].index('container')
-                    message = state['waiting']['message'][:stop]
-                except:
-                    message = state['waiting']['message']
-
-                reason = state['waiting']['reason']
-                pod_infor = f'type\tstatus\treason\t\t\tmessage\n----\t------\t------\t\t\t------\nwaiting\tfailed\t{reason}\t{message}'
-                pods_logs.append(pod_infor)
+        for pod in pods:
+            if not pod_is_ready(pod):
+                pods_logs.extend(get_waiting_info(pod))
 
         if not pods_logs or not pods_logs[0]:
             return dict(status='fail', data=dict(message='No logs found')), 404
@@ -1301,7 +673,7 @@ class AppStorageUsageView(Resource):
         current_user_id = get_jwt_identity()
         current_user_roles = get_jwt_claims()['roles']
 
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
 
         if not project:
             return dict(
@@ -1345,3 +717,97 @@ class AppStorageUsageView(Resource):
             return dict(status='fail', message='No values found'), 404
 
         return dict(status='success', data=dict(storage_capacity=values,storage_percentage_usage=volume_perc_value)), 200
+
+
+class AppMetricsView(Resource):
+    @jwt_required
+    def post(self, project_id, app_id):
+        """
+        Fetch several metrics of an app in one request
+        """
+        current_user_id = get_jwt_identity()
+        current_user_roles = get_jwt_claims()['roles']
+
+        metrics_schema = MultiMetricsSchema()
+        metrics_data = request.get_json()
+
+        validated_query_data, errors = metrics_schema.load(metrics_data)
+
+        if errors:
+            return dict(status='fail', message=errors), 400
+
+        project = Project.get_active(project_id)
+
+        if not project:
+            return dict(
+                status='fail',
+                message=f'project {project_id} not found'
+            ), 404
+
+        if not is_owner_or_admin(project, current_user_id, current_user_roles):
+            return dict(status='fail', message='unauthorised'), 403
+
+        app = App.get_by_id(app_id)
+
+        if not app or str(app.project_id) != str(project.id):
+            return dict(
+                status='fail',
+                message=f'app {app_id} not found'
+            ), 404
+
+        start, end, step = get_default_range(validated_query_data)
+
+        try:
+            metrics = query_metrics(
+                validated_query_data['metrics'], project.alias, start, end, step,
+                app_alias=app.alias)
+        except Exception as e:
+            return dict(status='fail', message=str(e)), 500
+
+        return dict(status='success', data=dict(metrics=metrics)), 200
+
+
+class AppDeploymentStatusView(Resource):
+
+    @jwt_required
+    def get(self, task_id):
+        """
+        """
+        current_user_id = get_jwt_identity()
+        current_user_roles = get_jwt_claims()['roles']
+
+        # imported here, celery_tasks imports the server
+        from celery_tasks import deploy_app_task
+
+        result = deploy_app_task.AsyncResult(task_id)
+
+        # every deployment is recorded as queued before it is sent, celery
+        # reports tasks it knows nothing of as pending
+        if result.state == 'PENDING':
+            return dict(status='fail', message=f'task {task_id} not found'), 404
+
+        if result.state == 'FAILURE':
+            # the meta is the exception, the project is the task's argument
+            project_id = (result.args or [None])[0]
+            deployment = dict(status='failed', message=str(result.info))
+        else:
+            deployment = dict(result.info or {})
+            project_id = deployment.get('project_id')
+
+        project = Project.get_active(project_id) if project_id else None
+
+        if not project:
+            return dict(status='fail', message=f'task {task_id} not found'), 404
+
+        if not is_owner_or_admin(project, current_user_id, current_user_roles):
+            return dict(status='fail', message='unauthorised'), 403
+
+        if result.state == 'QUEUED':
+            deployment['status'] = 'pending'
+
+        deployment.setdefault('status', 'deploying')
+
+        return dict(
+            status='success',
+            data=dict(task_id=task_id, **deployment)
+        ), 200
@@ -1,11 +1,64 @@
-import json
 from flask_restful import Resource, request
 from kubernetes import client
 from flask_jwt_extended import jwt_required
 from app.schemas import ClusterSchema
 from app.models.clusters import Cluster
-from app.helpers.kube import create_kube_clients
+from app.helpers.kube import check_kube_connection, get_kube_clients, invalidate_kube_clients
+from app.helpers.kube_cache import cluster_cache
+from app.helpers.resource_count import COUNTED_RESOURCES, get_resource_count
 from app.helpers.decorators import admin_required
+from app.helpers.serializer import get_schema
+from app.helpers.etag import conditional, rows_version
+from app.helpers.drift import reconcile_cluster_drift
+
+
+def clusters_version():
+    return rows_version(Cluster.query, Cluster)
+
+
+def cluster_version(cluster_id):
+    """
+    The cluster row and the stores its resources are counted from, None
+    unless every count comes from an informer in sync
+    """
+    cluster = Cluster.get_by_id(cluster_id)
+
+    if not cluster:
+        return None
+
+    versions = [
+        cluster_cache.version(cluster, kind, start=False)
+        for _, kind, _ in COUNTED_RESOURCES
+    ]
+
+    if None in versions:
+        return None
+
+    return cluster.updated_at, versions
+
+
+def kube_version(kind, name_arg=None):
+    """
+    Version a view of a cluster's resources of a kind, or of the one
+    named by the name_arg view argument, from the informer store's
+    resourceVersion so no request is made to the cluster
+    """
+    def get_version(cluster_id, **kwargs):
+        cluster = Cluster.get_by_id(cluster_id)
+
+        if not cluster:
+            return None
+
+        if name_arg is None:
+            return cluster_cache.version(cluster, kind)
+
+        # the namespace name is the resource name for namespaces themselves
+        namespace = None if name_arg == 'namespace_name' \
+            else kwargs.get('namespace_name')
+
+        return cluster_cache.version(
+            cluster, kind, kwargs[name_arg], namespace)
+    return get_version
 
 
 class ClustersView(Resource):
@@ -28,10 +81,8 @@ class ClustersView(Resource):
             kube_host = validated_cluster_data['host']
             kube_token = validated_cluster_data['token']
 
-            kube_client = create_kube_clients(kube_host, kube_token)
-
             # test connection by getting namespaces
-            kube_client.kube.list_namespace(_preload_content=False)
+            check_kube_connection(kube_host, kube_token)
 
             new_cluster = Cluster(**validated_cluster_data)
 
@@ -48,25 +99,27 @@ class ClustersView(Resource):
             return dict(status='fail', message='Connection to cluster failed'), 500
 
     @jwt_required
+    @conditional(clusters_version)
     def get(self):
         """
         """
-        cluster_schema = ClusterSchema(many=True)
+        cluster_schema = get_schema(ClusterSchema, many=True)
 
         clusters = Cluster.find_all()
 
-        validated_cluster_data, errors = cluster_schema.dumps(clusters)
+        validated_cluster_data, errors = cluster_schema.dump(clusters)
 
         if errors:
             return dict(status='fail', message='Internal Server Error'), 500
 
         return dict(status='Success',
-                    data=dict(clusters=json.loads(validated_cluster_data))), 200
+                    data=dict(clusters=validated_cluster_data)), 200
 
 
 class ClusterDetailView(Resource):
 
     @admin_required
+    @conditional(cluster_version)
     def get(self, cluster_id):
         """
         """
@@ -74,60 +127,24 @@ class ClusterDetailView(Resource):
 
             cluster_schema = ClusterSchema()
 
-            resource_count = []
-
             cluster = Cluster.get_by_id(cluster_id)
 
             if not cluster:
                 return dict(status='fail', message=f'Cluster with id {cluster_id} does not exist'), 404
 
-            validated_cluster_data, errors = cluster_schema.dumps(cluster)
+            validated_cluster_data, errors = cluster_schema.dump(cluster)
 
             if errors:
                 return dict(status='fail', message=errors), 500
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
-
-            # get number of nodes in the cluster
-            node_count = len(kube_client.kube.list_node().items)
-
-            resource_count.append(dict(name='nodes', count=node_count))
-
-            # get count of pvcs in the cluster
-            pvc_count = len(kube_client.kube.list_persistent_volume_claim_for_all_namespaces().items)
-
-            resource_count.append(dict(name='PVCs', count=pvc_count))
-
-            # get count of all pods in the cluster
-            pod_count = len(kube_client.kube.list_pod_for_all_namespaces().items)
-
-            resource_count.append(dict(name='pods', count=pod_count))
-
-            # get count of all services
-            service_count = len(kube_client.kube.list_service_for_all_namespaces().items)
-
-            resource_count.append(dict(name='services', count=service_count))
-
-            # get count of all deployments
-            deployment_count = len(kube_client.appsv1_api.list_deployment_for_all_namespaces().items)
-
-            resource_count.append(dict(name='deployments', count=deployment_count))
-
-            # get count of all namespaces in the cluster
-            namespace_count = len(kube_client.kube.list_namespace().items)
-
-            resource_count.append(dict(name='namespaces', count=namespace_count))
-
-            resource_count_json = json.dumps(resource_count)
+            # count nodes, pvcs, pods, services, deployments and namespaces
+            resource_count = get_resource_count(cluster)
 
             return dict(
                 status='succcess',
                 data=dict(
-                    cluster=json.loads(validated_cluster_data),
-                    resource_count=json.loads(resource_count_json))
+                    cluster=validated_cluster_data,
+                    resource_count=resource_count)
                 ), 200
         except Exception as e:
             return dict(status='fail', message=str(e)), 500
@@ -156,6 +173,11 @@ class ClusterDetailView(Resource):
         if not cluster_updated:
             return dict(status='fail', message='Internal Server Error'), 500
 
+        # drop pooled clients built with the old host or token
+        if 'host' in validated_cluster_data or 'token' in validated_cluster_data:
+            invalidate_kube_clients(cluster_id)
+            cluster_cache.invalidate(cluster_id)
+
         return dict(status='success', message='Cluster updated successfully'), 200
 
     @admin_required
@@ -172,12 +194,16 @@ class ClusterDetailView(Resource):
         if not deleted:
             return dict(status='fail', message='Internal Server Error'), 500
 
+        invalidate_kube_clients(cluster_id)
+        cluster_cache.invalidate(cluster_id)
+
         return dict(status='success', message=f'Cluster with id {cluster_id} deleted successfully'), 200
 
 
 class ClusterNamespacesView(Resource):
 
     @admin_required
+    @conditional(kube_version('namespaces'))
     def get(self, cluster_id):
         """
         """
@@ -187,26 +213,14 @@ class ClusterNamespacesView(Resource):
 
             cluster = Cluster.get_by_id(cluster_id)
 
-            namespaces = []
-
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
-
             # get all namespaces in the cluster
-            namespace_resp = kube_client.kube.list_namespace()
-            
-            for item in namespace_resp.items:
-                item = kube_client.api_client.sanitize_for_serialization(item)
-                namespaces.append(item)
+            namespaces = cluster_cache.list(cluster, 'namespaces')
 
-            namespaces_json = json.dumps(namespaces)
+            return dict(status='success', data=dict(namespaces=namespaces)), 200
 
-            return dict(status='success', data=dict(namespaces=json.loads(namespaces_json))), 200
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
 
@@ -217,6 +231,7 @@ class ClusterNamespacesView(Resource):
 class ClusterNamespaceDetailView(Resource):
 
     @admin_required
+    @conditional(kube_version('namespaces', 'namespace_name'))
     def get(self, cluster_id, namespace_name):
         """
         """
@@ -231,17 +246,16 @@ class ClusterNamespaceDetailView(Resource):
                     message=f'cluster with id {cluster_id} does not exist'
                     ), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
+            # read from the informer store when it is in sync
+            namespace = cluster_cache.get(cluster, 'namespaces', namespace_name)
 
-            kube_client = create_kube_clients(kube_host, kube_token)
+            if namespace is None:
+                kube_client = get_kube_clients(cluster)
 
-            namespace = kube_client.kube.read_namespace(name=namespace_name)
-            namespace = kube_client.api_client.sanitize_for_serialization(namespace)
+                namespace = kube_client.kube.read_namespace(name=namespace_name)
+                namespace = kube_client.api_client.sanitize_for_serialization(namespace)
 
-            namespace_json = json.dumps(namespace)
-
-            return dict(status='success', data=dict(namespace=json.loads(namespace_json))), 200
+            return dict(status='success', data=dict(namespace=namespace)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
@@ -253,32 +267,21 @@ class ClusterNamespaceDetailView(Resource):
 class ClusterNodesView(Resource):
 
     @admin_required
+    @conditional(kube_version('nodes'))
     def get(self, cluster_id):
         """
         """
         try:
             cluster = Cluster.get_by_id(cluster_id)
 
-            nodes = []
-
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
-
             # get all nodes in the cluster
-            node_resp = kube_client.kube.list_node()
+            nodes = cluster_cache.list(cluster, 'nodes')
 
-            for item in node_resp.items:
-                item = kube_client.api_client.sanitize_for_serialization(item)
-                nodes.append(item)
+            return dict(status='success', data=dict(nodes=nodes)), 200
 
-            nodes_json = json.dumps(nodes)
-
-            return dict(status='success', data=dict(nodes=json.loads(nodes_json))), 200
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
 
@@ -289,6 +292,7 @@ class ClusterNodesView(Resource):
 class ClusterNodeDetailView(Resource):
 
     @admin_required
+    @conditional(kube_version('nodes', 'node_name'))
     def get(self, cluster_id, node_name):
         """
         """
@@ -298,17 +302,16 @@ class ClusterNodeDetailView(Resource):
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            # read from the informer store when it is in sync
+            node = cluster_cache.get(cluster, 'nodes', node_name)
 
-            node = kube_client.kube.read_node(name=node_name)
-            node = kube_client.api_client.sanitize_for_serialization(node)
+            if node is None:
+                kube_client = get_kube_clients(cluster)
 
-            node_json = json.dumps(node)
+                node = kube_client.kube.read_node(name=node_name)
+                node = kube_client.api_client.sanitize_for_serialization(node)
 
-            return dict(status='success', data=dict(node=json.loads(node_json))), 200
+            return dict(status='success', data=dict(node=node)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
@@ -320,32 +323,21 @@ class ClusterNodeDetailView(Resource):
 class ClusterDeploymentsView(Resource):
 
     @admin_required
+    @conditional(kube_version('deployments'))
     def get(self, cluster_id):
         """
         """
         try:
             cluster = Cluster.get_by_id(cluster_id)
 
-            deployments = []
-
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
-
-            deployment_resp =\
-                kube_client.appsv1_api.list_deployment_for_all_namespaces()
+            # get all deployments in the cluster
+            deployments = cluster_cache.list(cluster, 'deployments')
 
-            for item in deployment_resp.items:
-                item = kube_client.api_client.sanitize_for_serialization(item)
-                deployments.append(item)
+            return dict(status='success', data=dict(deployments=deployments)), 200
 
-            deployments_json = json.dumps(deployments)
-
-            return dict(status='success', data=dict(deployments=json.loads(deployments_json))), 200
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
 
@@ -356,6 +348,7 @@ class ClusterDeploymentsView(Resource):
 class ClusterDeploymentDetailView(Resource):
 
     @admin_required
+    @conditional(kube_version('deployments', 'deployment_name'))
     def get(self, cluster_id, namespace_name, deployment_name):
         """
         """
@@ -365,25 +358,18 @@ class ClusterDeploymentDetailView(Resource):
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            # read from the informer store when it is in sync
+            deployment = cluster_cache.get(cluster, 'deployments', deployment_name, namespace_name)
 
-            deployment = kube_client.appsv1_api.read_namespaced_deployment(
-                deployment_name, namespace_name
-                )
+            if deployment is None:
+                kube_client = get_kube_clients(cluster)
 
-            deployment = kube_client.api_client.sanitize_for_serialization(
-                deployment
-                )
+                deployment = kube_client.appsv1_api.read_namespaced_deployment(
+                    deployment_name, namespace_name
+                    )
+                deployment = kube_client.api_client.sanitize_for_serialization(deployment)
 
-            deployment_json = json.dumps(deployment)
-
-            return dict(
-                status='success',
-                data=dict(deployment=json.loads(deployment_json))
-                ), 200
+            return dict(status='success', data=dict(deployment=deployment)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
@@ -395,33 +381,20 @@ class ClusterDeploymentDetailView(Resource):
 class ClusterPvcsView(Resource):
 
     @admin_required
+    @conditional(kube_version('pvcs'))
     def get(self, cluster_id):
         """
         """
         try:
             cluster = Cluster.get_by_id(cluster_id)
 
-            pvcs = []
-
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
-
-            pvcs_resp = \
-                kube_client.kube.list_persistent_volume_claim_for_all_namespaces()
+            # get all pvcs in the cluster
+            pvcs = cluster_cache.list(cluster, 'pvcs')
 
-            for item in pvcs_resp.items:
-                item = kube_client.api_client.sanitize_for_serialization(item)
-                pvcs.append(item)
-
-            pvcs_json = json.dumps(pvcs)
-
-            return dict(
-                status='success', data=dict(pvcs=json.loads(pvcs_json))), 200
+            return dict(status='success', data=dict(pvcs=pvcs)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
@@ -433,6 +406,7 @@ class ClusterPvcsView(Resource):
 class ClusterPvcDetailView(Resource):
 
     @admin_required
+    @conditional(kube_version('pvcs', 'pvc_name'))
     def get(self, cluster_id, namespace_name, pvc_name):
         """
         """
@@ -442,20 +416,18 @@ class ClusterPvcDetailView(Resource):
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            # read from the informer store when it is in sync
+            pvc = cluster_cache.get(cluster, 'pvcs', pvc_name, namespace_name)
 
-            pvc = kube_client.kube.read_namespaced_persistent_volume_claim(
-                pvc_name, namespace_name
-                )
+            if pvc is None:
+                kube_client = get_kube_clients(cluster)
 
-            pvc = kube_client.api_client.sanitize_for_serialization(pvc)
+                pvc = kube_client.kube.read_namespaced_persistent_volume_claim(
+                    pvc_name, namespace_name
+                    )
+                pvc = kube_client.api_client.sanitize_for_serialization(pvc)
 
-            pvc_json = json.dumps(pvc)
-
-            return dict(status='success', data=dict(pvc=json.loads(pvc_json))), 200
+            return dict(status='success', data=dict(pvc=pvc)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
@@ -467,31 +439,20 @@ class ClusterPvcDetailView(Resource):
 class ClusterPVsView(Resource):
 
     @admin_required
+    @conditional(kube_version('pvs'))
     def get(self, cluster_id):
         """
         """
         try:
             cluster = Cluster.get_by_id(cluster_id)
 
-            pvs = []
-
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            # get all pvs in the cluster
+            pvs = cluster_cache.list(cluster, 'pvs')
 
-            pvs_resp = kube_client.kube.list_persistent_volume()
-
-            for item in pvs_resp.items:
-                item = kube_client.api_client.sanitize_for_serialization(item)
-                pvs.append(item)
-
-            pvs_json = json.dumps(pvs)
-
-            return dict(status='success', data=dict(pvs=json.loads(pvs_json))), 200
+            return dict(status='success', data=dict(pvs=pvs)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
@@ -503,6 +464,7 @@ class ClusterPVsView(Resource):
 class ClusterPVDetailView(Resource):
 
     @admin_required
+    @conditional(kube_version('pvs', 'pv_name'))
     def get(self, cluster_id, pv_name):
         """
         """
@@ -515,17 +477,16 @@ class ClusterPVDetailView(Resource):
                     message=f'cluster with id {cluster_id} does not exist'
                     ), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            # read from the informer store when it is in sync
+            pv = cluster_cache.get(cluster, 'pvs', pv_name)
 
-            pv = kube_client.kube.read_persistent_volume(pv_name)
-            pv = kube_client.api_client.sanitize_for_serialization(pv)
+            if pv is None:
+                kube_client = get_kube_clients(cluster)
 
-            pv_json = json.dumps(pv)
+                pv = kube_client.kube.read_persistent_volume(pv_name)
+                pv = kube_client.api_client.sanitize_for_serialization(pv)
 
-            return dict(status='success', data=dict(pv=json.loads(pv_json))), 200
+            return dict(status='success', data=dict(pv=pv)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
@@ -537,34 +498,23 @@ class ClusterPVDetailView(Resource):
 class ClusterPodsView(Resource):
 
     @admin_required
+    @conditional(kube_version('pods'))
     def get(self, cluster_id):
         """
         """
         try:
             cluster = Cluster.get_by_id(cluster_id)
 
-            pods = []
-
             if not cluster:
                 return dict(
                     status='fail',
                     message=f'cluster with id {cluster_id} does not exist'
                     ), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
-
-            pods_resp = kube_client.kube.list_pod_for_all_namespaces()
-
-            for item in pods_resp.items:
-                item = kube_client.api_client.sanitize_for_serialization(item)
-                pods.append(item)
+            # get all pods in the cluster
+            pods = cluster_cache.list(cluster, 'pods')
 
-            pods_json = json.dumps(pods)
-
-            return dict(status='success', data=dict(pods=json.loads(pods_json))), 200
+            return dict(status='success', data=dict(pods=pods)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
@@ -576,6 +526,7 @@ class ClusterPodsView(Resource):
 class ClusterPodDetailView(Resource):
 
     @admin_required
+    @conditional(kube_version('pods', 'pod_name'))
     def get(self, cluster_id, namespace_name, pod_name):
         """
         """
@@ -585,17 +536,16 @@ class ClusterPodDetailView(Resource):
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
+            # read from the informer store when it is in sync
+            pod = cluster_cache.get(cluster, 'pods', pod_name, namespace_name)
 
-            pod = kube_client.kube.read_namespaced_pod(pod_name, namespace_name)
-            pod = kube_client.api_client.sanitize_for_serialization(pod)
+            if pod is None:
+                kube_client = get_kube_clients(cluster)
 
-            pod_json = json.dumps(pod)
+                pod = kube_client.kube.read_namespaced_pod(pod_name, namespace_name)
+                pod = kube_client.api_client.sanitize_for_serialization(pod)
 
-            return dict(status='success', data=dict(pod=json.loads(pod_json))), 200
+            return dict(status='success', data=dict(pod=pod)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
@@ -607,35 +557,23 @@ class ClusterPodDetailView(Resource):
 class ClusterServicesView(Resource):
 
     @admin_required
+    @conditional(kube_version('services'))
     def get(self, cluster_id):
         """
         """
         try:
             cluster = Cluster.get_by_id(cluster_id)
 
-            services = []
-
             if not cluster:
                 return dict(
                     status='fail',
                     message=f'cluster with id {cluster_id} does not exist'
                     ), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
-
-            service_resp =\
-                kube_client.kube.list_service_for_all_namespaces()
-
-            for item in service_resp.items:
-                item = kube_client.api_client.sanitize_for_serialization(item)
-                services.append(item)
-
-            services_json = json.dumps(services)
+            # get all services in the cluster
+            services = cluster_cache.list(cluster, 'services')
 
-            return dict(status='success', data=dict(services=json.loads(services_json))), 200
+            return dict(status='success', data=dict(services=services)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
@@ -647,6 +585,7 @@ class ClusterServicesView(Resource):
 class ClusterServiceDetailView(Resource):
 
     @admin_required
+    @conditional(kube_version('services', 'service_name'))
     def get(self, cluster_id, namespace_name, service_name):
         """
         """
@@ -656,17 +595,18 @@ class ClusterServiceDetailView(Resource):
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
+            # read from the informer store when it is in sync
+            service = cluster_cache.get(cluster, 'services', service_name, namespace_name)
 
-            kube_client = create_kube_clients(kube_host, kube_token)
+            if service is None:
+                kube_client = get_kube_clients(cluster)
 
-            service = kube_client.kube.read_namespaced_service(service_name, namespace_name)
-            service = kube_client.api_client.sanitize_for_serialization(service)
+                service = kube_client.kube.read_namespaced_service(
+                    service_name, namespace_name
+                    )
+                service = kube_client.api_client.sanitize_for_serialization(service)
 
-            service_json = json.dumps(service)
-
-            return dict(status='success', data=dict(service=json.loads(service_json))), 200
+            return dict(status='success', data=dict(service=service)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
@@ -678,31 +618,20 @@ class ClusterServiceDetailView(Resource):
 class ClusterJobsView(Resource):
 
     @admin_required
+    @conditional(kube_version('jobs'))
     def get(self, cluster_id):
         """
         """
         try:
             cluster = Cluster.get_by_id(cluster_id)
 
-            jobs = []
-
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
-
-            jobs_resp = kube_client.batchv1_api.list_job_for_all_namespaces()
+            # get all jobs in the cluster
+            jobs = cluster_cache.list(cluster, 'jobs')
 
-            for item in jobs_resp.items:
-                item = kube_client.api_client.sanitize_for_serialization(item)
-                jobs.append(item)
-
-            jobs_json = json.dumps(jobs)
-
-            return dict(status='success', data=dict(jobs=json.loads(jobs_json))), 200
+            return dict(status='success', data=dict(jobs=jobs)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
@@ -714,6 +643,7 @@ class ClusterJobsView(Resource):
 class ClusterJobDetailView(Resource):
 
     @admin_required
+    @conditional(kube_version('jobs', 'job_name'))
     def get(self, cluster_id, namespace_name, job_name):
         """
         """
@@ -723,18 +653,16 @@ class ClusterJobDetailView(Resource):
             if not cluster:
                 return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
-
-            job = kube_client.batchv1_api.read_namespaced_job(job_name, namespace_name)
+            # read from the informer store when it is in sync
+            job = cluster_cache.get(cluster, 'jobs', job_name, namespace_name)
 
-            job = kube_client.api_client.sanitize_for_serialization(job)
+            if job is None:
+                kube_client = get_kube_clients(cluster)
 
-            job_json = json.dumps(job)
+                job = kube_client.batchv1_api.read_namespaced_job(job_name, namespace_name)
+                job = kube_client.api_client.sanitize_for_serialization(job)
 
-            return dict(status='success', data=dict(job=json.loads(job_json))), 200
+            return dict(status='success', data=dict(job=job)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
@@ -746,37 +674,23 @@ class ClusterJobDetailView(Resource):
 class ClusterStorageClassView(Resource):
 
     @admin_required
+    @conditional(kube_version('storage_classes'))
     def get(self, cluster_id):
         """
         """
         try:
             cluster = Cluster.get_by_id(cluster_id)
 
-            storage_classes = []
-
             if not cluster:
                 return dict(
                     status='fail',
                     message=f'cluster with id {cluster_id} does not exist'
                     ), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
-
-            storage_classes_resp = kube_client.storageV1Api.list_storage_class()
-
-            for item in storage_classes_resp.items:
-                item = kube_client.api_client.sanitize_for_serialization(item)
-                storage_classes.append(item)
+            # get all storage classes in the cluster
+            storage_classes = cluster_cache.list(cluster, 'storage_classes')
 
-            storage_classes_json = json.dumps(storage_classes)
-
-            return dict(
-                status='success',
-                data=dict(storage_classes=json.loads(storage_classes_json))
-                ), 200
+            return dict(status='success', data=dict(storage_classes=storage_classes)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
@@ -788,6 +702,7 @@ class ClusterStorageClassView(Resource):
 class ClusterStorageClassDetailView(Resource):
 
     @admin_required
+    @conditional(kube_version('storage_classes', 'storage_class_name'))
     def get(self, cluster_id, storage_class_name):
         """
         """
@@ -800,26 +715,63 @@ class ClusterStorageClassDetailView(Resource):
                     message=f'cluster with id {cluster_id} does not exist'
                     ), 404
 
-            kube_host = cluster.host
-            kube_token = cluster.token
+            # read from the informer store when it is in sync
+            storage_class = cluster_cache.get(cluster, 'storage_classes', storage_class_name)
 
-            kube_client = create_kube_clients(kube_host, kube_token)
+            if storage_class is None:
+                kube_client = get_kube_clients(cluster)
 
-            storage_class =\
-                kube_client.storageV1Api.read_storage_class(storage_class_name)
+                storage_class = kube_client.storageV1Api.read_storage_class(
+                    storage_class_name
+                    )
+                storage_class = kube_client.api_client.sanitize_for_serialization(storage_class)
 
-            storage_class =\
-                kube_client.api_client.sanitize_for_serialization(storage_class)
+            return dict(status='success', data=dict(storage_class=storage_class)), 200
 
-            storage_class_json = json.dumps(storage_class)
+        except client.rest.ApiException as e:
+            return dict(status='fail', message=e.reason), e.status
 
-            return dict(
-                status='success',
-                data=dict(storage_class=json.loads(storage_class_json))
-                ), 200
+        except Exception as e:
+            return dict(status='fail', message=str(e)), 500
+
+
+class ClusterDriftView(Resource):
+
+    @admin_required
+    def get(self, cluster_id):
+        """
+        Report the cluster's orphaned objects and the ones rows expect
+        but it does not have, without changing anything
+        """
+        try:
+            cluster = Cluster.get_by_id(cluster_id)
+
+            if not cluster:
+                return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
+
+            report = reconcile_cluster_drift(cluster, dry_run=True)
+
+            return dict(status='success', data=dict(drift=report)), 200
 
         except client.rest.ApiException as e:
             return dict(status='fail', message=e.reason), e.status
 
         except Exception as e:
             return dict(status='fail', message=str(e)), 500
+
+    @admin_required
+    def post(self, cluster_id):
+        """
+        Garbage collect the cluster's orphaned objects in the background
+        """
+        cluster = Cluster.get_by_id(cluster_id)
+
+        if not cluster:
+            return dict(status='fail', message=f'cluster with id {cluster_id} does not exist'), 404
+
+        # imported here, celery_tasks imports the server
+        from celery_tasks import reconcile_drift
+
+        task = reconcile_drift.delay(cluster_id=str(cluster.id), dry_run=False)
+
+        return dict(status='success', data=dict(task_id=task.id)), 202
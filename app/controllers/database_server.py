@@ -0,0 +1,192 @@
+from flask_restful import Resource, request
+from app.schemas import DatabaseServerSchema
+from app.models.database_server import DatabaseServer
+from app.models.project_database import ProjectDatabase
+from app.models.database_pool import DatabasePool
+from app.helpers.decorators import admin_required
+from app.helpers.db_flavor import database_health, database_services, get_server
+from app.helpers.serializer import get_schema
+
+
+def forget_server(database_server):
+    """ stop probing a server and close its pooled connections """
+    server = get_server(database_server)
+    database_health.remove_server(server)
+    server['class'].close_pool()
+
+
+class DatabaseServersView(Resource):
+
+    @admin_required
+    def post(self):
+        """
+        """
+        server_schema = DatabaseServerSchema()
+
+        server_data = request.get_json()
+
+        validated_server_data, errors = server_schema.load(server_data)
+
+        if errors:
+            return dict(status='fail', message=errors), 400
+
+        existing_server = DatabaseServer.find_first(
+            database_flavour_name=validated_server_data['database_flavour_name'],
+            host=validated_server_data['host'],
+            port=validated_server_data['port'])
+
+        if existing_server:
+            return dict(
+                status='fail',
+                message=f"Database server {validated_server_data['host']}:{validated_server_data['port']} Already Exists."
+            ), 409
+
+        # test the admin credentials before the server takes databases
+        service_class = database_services[validated_server_data['database_flavour_name']]
+        database_service = service_class(
+            host=validated_server_data['host'],
+            port=validated_server_data['port'],
+            user=validated_server_data['admin_user'],
+            password=validated_server_data['admin_password']
+        )
+
+        connection = database_service.create_connection()
+
+        if not connection:
+            return dict(status='fail', message='Connection to database server failed'), 500
+
+        connection.close()
+
+        new_server = DatabaseServer(**validated_server_data)
+
+        saved = new_server.save()
+
+        if not saved:
+            return dict(status='fail', message='Internal Server Error'), 500
+
+        new_server_data, errors = server_schema.dump(new_server)
+
+        return dict(status='success', data=dict(server=new_server_data)), 201
+
+    @admin_required
+    def get(self):
+        """
+        """
+        server_schema = get_schema(DatabaseServerSchema, many=True)
+
+        servers = DatabaseServer.find_all()
+
+        servers_data_list, errors = server_schema.dump(servers)
+
+        if errors:
+            return dict(status='fail', message='Internal Server Error'), 500
+
+        for database_server, server_data in zip(servers, servers_data_list):
+            server_data['databases_count'] = ProjectDatabase.count(
+                database_flavour_name=database_server.database_flavour_name,
+                host=database_server.host,
+                port=database_server.port)
+
+        return dict(status='success', data=dict(servers=servers_data_list)), 200
+
+
+class DatabaseServerDetailView(Resource):
+
+    @admin_required
+    def get(self, server_id):
+        """
+        """
+        server_schema = DatabaseServerSchema()
+
+        database_server = DatabaseServer.get_by_id(server_id)
+
+        if not database_server:
+            return dict(status='fail', message=f'Database server with id {server_id} not found'), 404
+
+        server_data, errors = server_schema.dump(database_server)
+
+        if errors:
+            return dict(status='fail', message=errors), 500
+        server_data['databases_count'] = ProjectDatabase.count(
+            database_flavour_name=database_server.database_flavour_name,
+            host=database_server.host,
+            port=database_server.port)
+        server_data['health'] = database_health.get_status(
+            get_server(database_server))
+
+        return dict(status='success', data=dict(server=server_data)), 200
+
+    @admin_required
+    def patch(self, server_id):
+        """
+        Update the admin credentials of a server, databases already on
+        it keep their host and port so those cannot be changed
+        """
+        server_schema = DatabaseServerSchema(
+            partial=True, only=('admin_user', 'admin_password'))
+
+        server_data = request.get_json()
+
+        validated_server_data, errors = server_schema.load(server_data)
+
+        if errors:
+            return dict(status='fail', message=errors), 400
+
+        database_server = DatabaseServer.get_by_id(server_id)
+
+        if not database_server:
+            return dict(status='fail', message=f'Database server with id {server_id} not found'), 404
+
+        service_class = database_services[database_server.database_flavour_name]
+        database_service = service_class(
+            host=database_server.host,
+            port=database_server.port,
+            user=validated_server_data.get('admin_user', database_server.admin_user),
+            password=validated_server_data.get(
+                'admin_password', database_server.admin_password)
+        )
+
+        connection = database_service.create_connection()
+
+        if not connection:
+            return dict(status='fail', message='Connection to database server failed'), 500
+
+        connection.close()
+
+        forget_server(database_server)
+
+        updated = DatabaseServer.update(database_server, **validated_server_data)
+
+        if not updated:
+            return dict(status='fail', message='Internal Server Error'), 500
+
+        return dict(status='success', message='Database server updated successfully'), 200
+
+    @admin_required
+    def delete(self, server_id):
+        """
+        """
+        database_server = DatabaseServer.get_by_id(server_id)
+
+        if not database_server:
+            return dict(status='fail', message=f'Database server with id {server_id} not found'), 404
+
+        location = dict(
+            database_flavour_name=database_server.database_flavour_name,
+            host=database_server.host,
+            port=database_server.port)
+
+        if ProjectDatabase.count(**location) or DatabasePool.count(**location):
+            return dict(
+                status='fail',
+                message='Database server still holds databases, delete them first'
+            ), 409
+
+        forget_server(database_server)
+
+        deleted = database_server.delete()
+
+        if not deleted:
+            return dict(status='fail', message='Internal Server Error'), 500
+
+        return dict(status='success', message='Database server deleted successfully'), 200
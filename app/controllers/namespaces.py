@@ -1,8 +1,9 @@
-import json
 from flask_restful import Resource, request
 from app.models.namespaces import Namespace
 from app.models.organisation import Organisation
 from app.schemas import NamespaceSchema
+from app.helpers.pagination import get_page
+from app.helpers.serializer import get_schema
 
 
 class NamespacesView(Resource):
@@ -10,18 +11,25 @@ class NamespacesView(Resource):
     def get(self):
         """
         """
-        schema = NamespaceSchema(many=True)
+        schema = get_schema(NamespaceSchema, many=True)
 
-        namespaces = Namespace.find_all()
+        namespaces, pagination, errors = get_page(
+            Namespace, schema=NamespaceSchema, filterable=('name', 'organisation_id'))
 
-        namespace_data, errors = schema.dumps(namespaces)
+        if errors:
+            return dict(status='fail', message=errors), 400
+
+        if namespaces is False:
+            return dict(status='fail', message='Internal Server Error'), 500
+
+        namespace_data, errors = schema.dump(namespaces)
 
         if errors:
             return dict(status='fail', message=errors), 500
 
         return dict(
             status='success',
-            data=dict(namespaces=json.loads(namespace_data))
+            data=dict(namespaces=namespace_data, pagination=pagination)
             ), 200
 
 
@@ -40,13 +48,13 @@ class NamespaceDetailView(Resource):
                 message=f'Namespace with id {id} not found'
                 ), 404
 
-        namespace_data, errors = schema.dumps(namespace)
+        namespace_data, errors = schema.dump(namespace)
 
         if errors:
             return dict(status="fail", message=errors), 500
 
         return dict(status='success', data=dict(
-            namespace=json.loads(namespace_data))), 200
+            namespace=namespace_data)), 200
 
     def delete(self, id):
         """
@@ -98,15 +106,15 @@ class OrganisationNamespaceView(Resource):
         if not saved:
             return dict(status='fail', message='Internal Server Error'), 500
 
-        new_namespace_data, errors = schema.dumps(namespace)
+        new_namespace_data, errors = schema.dump(namespace)
 
         return dict(status='success', data=dict(
-            namespace=json.loads(new_namespace_data))), 201
+            namespace=new_namespace_data)), 201
 
     def get(self, organisation_id):
         """
         """
-        schema = NamespaceSchema(many=True)
+        schema = get_schema(NamespaceSchema, many=True)
 
         organisation = Organisation.get_by_id(organisation_id)
 
@@ -116,12 +124,19 @@ class OrganisationNamespaceView(Resource):
                 message=f'Organisation with id {organisation_id} not found'
                 ), 404
 
-        namespaces = Namespace.query.filter_by(organisation_id=organisation.id)
+        namespaces, pagination, errors = get_page(
+            Namespace, schema=NamespaceSchema, filterable=('name',), organisation_id=organisation.id)
+
+        if errors:
+            return dict(status='fail', message=errors), 400
+
+        if namespaces is False:
+            return dict(status='fail', message='Internal Server Error'), 500
 
-        namespace_data, errors = schema.dumps(namespaces)
+        namespace_data, errors = schema.dump(namespaces)
 
         if errors:
             return dict(status='fail', message=errors), 500
 
         return dict(status='success', data=dict(
-            namespaces=json.loads(namespace_data))), 200
+            namespaces=namespace_data, pagination=pagination)), 200
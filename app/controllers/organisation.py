@@ -1,4 +1,3 @@
-import json
 from flask_restful import Resource, request
 from flask_jwt_extended import (
     jwt_required,
@@ -6,6 +5,8 @@ from flask_jwt_extended import (
 )
 from app.schemas import OrganisationSchema
 from app.models.organisation import Organisation
+from app.helpers.pagination import get_page
+from app.helpers.serializer import get_schema
 
 
 
@@ -41,25 +42,33 @@ class OrganisationsView(Resource):
 
         
 
-        new_org_data, errors = org_schema.dumps(organisation)
+        new_org_data, errors = org_schema.dump(organisation)
 
-        return dict(status='success', data=dict(organisation=json.loads(new_org_data))), 201
+        return dict(status='success', data=dict(organisation=new_org_data)), 201
 
     # @jwt_required
     def get(self):
         """
         """
 
-        org_schema = OrganisationSchema(many=True)
+        org_schema = get_schema(OrganisationSchema, many=True)
 
-        organisations = Organisation.find_all()
+        organisations, pagination, errors = get_page(
+            Organisation, schema=OrganisationSchema, filterable=('name',))
 
-        orgs_data, errors = org_schema.dumps(organisations)
+        if errors:
+            return dict(status="fail", message=errors), 400
+
+        if organisations is False:
+            return dict(status="fail", message="Internal Server Error"), 500
+
+        orgs_data, errors = org_schema.dump(organisations)
 
         if errors:
             return dict(status="fail", message="Internal Server Error"), 500
 
-        return dict(status="success", data=dict(organisations=json.loads(orgs_data))), 200
+        return dict(status="success", data=dict(
+            organisations=orgs_data, pagination=pagination)), 200
 
 
 class OrganisationDetailView(Resource):
@@ -74,12 +83,12 @@ class OrganisationDetailView(Resource):
         if not organisation:
             return dict(status="fail", message=f"Organisation with id {org_id} not found"), 404
 
-        org_data, errors = schema.dumps(organisation)
+        org_data, errors = schema.dump(organisation)
 
         if errors:
             return dict(status="fail", message=errors), 500
 
-        return dict(status='success', data=dict(organisation=json.loads(org_data))), 200
+        return dict(status='success', data=dict(organisation=org_data)), 200
 
     def patch(self, org_id):
         """
@@ -1,4 +1,3 @@
-import json
 from flask import current_app
 from flask_restful import Resource, request
 from app.schemas import OrganisationSchema
@@ -7,6 +6,7 @@ from app.schemas import UserSchema
 from app.models.organisation_admins import OrganisationAdmins
 from app.models.user import User
 from app.models.organisation import Organisation
+from app.helpers.serializer import get_schema
 
 
 class OrgAdminView(Resource):
@@ -50,33 +50,33 @@ class OrgAdminView(Resource):
         if not saved_org_admin:
             return dict(status='fail', message='Internal Server Error'), 500
 
-        new_org_admin_data, errors = user_schema.dumps(user)
+        new_org_admin_data, errors = user_schema.dump(user)
 
         return dict(
             status='success',
-            data=dict(organisation_admin=json.loads(new_org_admin_data))
+            data=dict(organisation_admin=new_org_admin_data)
             ), 201
 
     def get(self, organisation_id):
         """
         """
-        org_schema = OrganisationSchema(many=True)
+        org_schema = get_schema(OrganisationSchema, many=True)
 
-        organisation = Organisation.get_by_id(organisation_id)
+        organisation = Organisation.get_by_id_with(organisation_id, 'admins')
 
         if not organisation:
             return dict(status='fail', message='Organisation not found'), 404
 
         org_admins = organisation.admins
 
-        org_admin_data, errors = org_schema.dumps(org_admins)
+        org_admin_data, errors = org_schema.dump(org_admins)
 
         if errors:
             return dict(status="fail", message="Internal Server Error"), 500
 
         return dict(
             status="success",
-            data=dict(organisation_admins=json.loads(org_admin_data))
+            data=dict(organisation_admins=org_admin_data)
             ), 200
 
     # remove organisation admin
@@ -124,9 +124,9 @@ class OrgAdminView(Resource):
 
         org_schema = OrganisationSchema()
 
-        new_org_admin_data, errors = org_schema.dumps(organisation)
+        new_org_admin_data, errors = org_schema.dump(organisation)
 
         return dict(
             status='success',
-            data=dict(organisation_admins=json.loads(new_org_admin_data))
+            data=dict(organisation_admins=new_org_admin_data)
             ), 200
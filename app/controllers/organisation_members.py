@@ -1,10 +1,10 @@
-import json
 from flask import current_app
 from flask_restful import Resource, request
 from app.schemas import OrganisationSchema, OrgMemberSchema, UserSchema
 from app.models.organisation_members import OrganisationMembers
 from app.models.user import User
 from app.models.organisation import Organisation
+from app.helpers.serializer import get_schema
 
 
 class OrgMemberView(Resource):
@@ -48,29 +48,29 @@ class OrgMemberView(Resource):
         if not saved_org_member:
             return dict(status='fail', message='Internal Server Error'), 500
 
-        new_org_member_data, errors = user_schema.dumps(user)
+        new_org_member_data, errors = user_schema.dump(user)
 
-        return dict(status='success', data=dict(organisation_member=json.loads(new_org_member_data))), 201
+        return dict(status='success', data=dict(organisation_member=new_org_member_data)), 201
 
 
     def get(self, organisation_id):
         """
         """
-        org_schema = OrganisationSchema(many=True)
+        org_schema = get_schema(OrganisationSchema, many=True)
 
-        organisation = Organisation.get_by_id(organisation_id)
+        organisation = Organisation.get_by_id_with(organisation_id, 'members')
 
         if not organisation:
             return dict(status='fail', message='Organisation not found'), 404
 
         org_members = organisation.members
 
-        org_member_data, errors = org_schema.dumps(org_members)
+        org_member_data, errors = org_schema.dump(org_members)
 
         if errors:
             return dict(status="fail", message="Internal Server Error"), 500
 
-        return dict(status="success", data=dict(organisation_member=json.loads(org_member_data))), 200
+        return dict(status="success", data=dict(organisation_member=org_member_data)), 200
 
 
     # delete user role
@@ -112,6 +112,6 @@ class OrgMemberView(Resource):
         
         org_schema = OrganisationSchema()
 
-        new_org_member_data, errors = org_schema.dumps(organisation)
+        new_org_member_data, errors = org_schema.dump(organisation)
 
-        return dict(status='success', data=dict(org_members=json.loads(new_org_member_data))), 200
+        return dict(status='success', data=dict(org_members=new_org_member_data)), 200
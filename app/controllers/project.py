@@ -1,20 +1,42 @@
-from app.helpers.prometheus import prometheus
+from app.helpers.prometheus import query_range, query_metrics, get_default_range
 from app.helpers.alias import create_alias
 from app.helpers.admin import is_owner_or_admin, is_current_or_admin
 from app.helpers.role_search import has_role
-from app.helpers.kube import create_kube_clients
+from app.helpers.pagination import get_page
+from app.helpers.serializer import get_schema
+from app.helpers.response_cache import cached_response
+from app.helpers.etag import conditional, row_version, rows_version
 from app.models.user import User
 from app.models.clusters import Cluster
 from app.models.project import Project
-from app.schemas import ProjectSchema, MetricsSchema
+from app.helpers.project_lifecycle import set_project_status, DELETABLE_STATES
+from app.schemas import ProjectSchema, MetricsSchema, MultiMetricsSchema
 import datetime
 from prometheus_http_client import Prometheus
 import json
 from flask_restful import Resource, request
-from kubernetes import client
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt_claims
 
 
+def projects_version():
+    query = Project.active()
+
+    if not has_role(get_jwt_claims()['roles'], 'administrator'):
+        query = query.filter(Project.owner_id == get_jwt_identity())
+
+    return rows_version(query, Project)
+
+
+def project_version(project_id):
+    # a deleted project has no version, its request gets the view's 404
+    return row_version(Project, project_id, Project.active())
+
+
+def user_projects_version(user_id):
+    return rows_version(
+        Project.active().filter(Project.owner_id == user_id), Project)
+
+
 class ProjectsView(Resource):
 
     @jwt_required
@@ -38,9 +60,9 @@ class ProjectsView(Resource):
             validated_project_data['owner_id'] = current_user_id
 
         # check if project already exists
-        existing_project = Project.find_first(
+        existing_project = Project.active().filter_by(
             name=validated_project_data['name'],
-            owner_id=validated_project_data['owner_id'])
+            owner_id=validated_project_data['owner_id']).first()
 
         if existing_project:
             return dict(
@@ -48,87 +70,38 @@ class ProjectsView(Resource):
                 message=f'project with name {validated_project_data["name"]} already exists'
             ), 409
 
-        try:
-            validated_project_data['alias'] =\
-                create_alias(validated_project_data['name'])
-            namespace_name = validated_project_data['alias']
-            cluster_id = validated_project_data['cluster_id']
-            cluster = Cluster.get_by_id(cluster_id)
+        cluster_id = validated_project_data['cluster_id']
+        cluster = Cluster.get_by_id(cluster_id)
 
-            if not cluster:
-                return dict(
-                    status='fail',
-                    message=f'cluster {cluster_id} not found'
-                ), 404
-
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
-
-            # create namespace in cluster
-            cluster_namespace = kube_client.kube.create_namespace(
-                client.V1Namespace(
-                    metadata=client.V1ObjectMeta(name=namespace_name)
-                ))
-            # create project in database
-            if cluster_namespace:
-
-                ingress_name = f"{validated_project_data['alias']}-ingress"
-
-                ingress_meta = client.V1ObjectMeta(
-                    name=ingress_name
-                )
-
-                ingress_default_rule = client.ExtensionsV1beta1IngressRule(
-                    host="traefik-ui.cranecloud.io",
-                    http=client.ExtensionsV1beta1HTTPIngressRuleValue(
-                        paths=[client.ExtensionsV1beta1HTTPIngressPath(
-                            path="/*",
-                            backend=client.ExtensionsV1beta1IngressBackend(
-                                service_name="traefik-web-ui-ext",
-                                service_port=80
-                            )
-                        )]
-                    )
-                )
-
-                ingress_spec = client.ExtensionsV1beta1IngressSpec(
-                    rules=[ingress_default_rule]
-                )
-
-                ingress_body = client.ExtensionsV1beta1Ingress(
-                    metadata=ingress_meta,
-                    spec=ingress_spec
-                )
+        if not cluster:
+            return dict(
+                status='fail',
+                message=f'cluster {cluster_id} not found'
+            ), 404
 
-                kube_client.extension_api.create_namespaced_ingress(
-                    namespace=namespace_name,
-                    body=ingress_body
-                )
+        validated_project_data['alias'] =\
+            create_alias(validated_project_data['name'])
 
-                project = Project(**validated_project_data)
+        project = Project(status='pending', **validated_project_data)
 
-                saved = project.save()
+        saved = project.save()
 
-                if not saved:
-                    # delete the namespace
-                    kube_client.kube.delete_namespace(namespace_name)
-                    return dict(
-                        status='fail',
-                        message='Internal Server Error'), 500
+        if not saved:
+            return dict(status='fail', message='Internal Server Error'), 500
 
-            new_project_data, errors = project_schema.dump(project)
+        # imported here, celery_tasks imports the server
+        from celery_tasks import provision_project
 
-            return dict(status='success', data=dict(project=new_project_data)), 201
+        # the namespace and ingress are created in the background
+        provision_project.delay(str(project.id))
 
-        except client.rest.ApiException as e:
-            return dict(status='fail', message=e.body), e.status
+        new_project_data, errors = project_schema.dump(project)
 
-        except Exception as err:
-            return dict(status='fail', message=str(err)), 500
+        return dict(status='success', data=dict(project=new_project_data)), 202
 
     @jwt_required
+    @conditional(projects_version)
+    @cached_response('project')
     def get(self):
         """
         """
@@ -136,24 +109,39 @@ class ProjectsView(Resource):
         current_user_id = get_jwt_identity()
         current_user_roles = get_jwt_claims()['roles']
 
-        project_schema = ProjectSchema(many=True)
+        project_schema = get_schema(ProjectSchema, many=True)
+
+        active_projects = Project.active()
 
         if has_role(current_user_roles, 'administrator'):
-            projects = Project.find_all()
+            projects, pagination, errors = get_page(
+                Project, schema=ProjectSchema, query=active_projects,
+                filterable=('owner_id', 'cluster_id', 'status'))
         else:
-            projects = Project.find_all(owner_id=current_user_id)
+            projects, pagination, errors = get_page(
+                Project, schema=ProjectSchema, query=active_projects,
+                filterable=('cluster_id', 'status'), owner_id=current_user_id)
+
+        if errors:
+            return dict(status='fail', message=errors), 400
 
-        project_data, errors = project_schema.dumps(projects)
+        if projects is False:
+            return dict(status='fail', message='Internal Server Error'), 500
+
+        project_data, errors = project_schema.dump(projects)
 
         if errors:
             return dict(status='fail', message=errors), 500
 
-        return dict(status='success', data=dict(projects=json.loads(project_data))), 200
+        return dict(status='success', data=dict(
+            projects=project_data, pagination=pagination)), 200
 
 
 class ProjectDetailView(Resource):
 
     @jwt_required
+    @conditional(project_version)
+    @cached_response('project:{project_id}')
     def get(self, project_id):
         """
         """
@@ -162,7 +150,7 @@ class ProjectDetailView(Resource):
 
         project_schema = ProjectSchema()
 
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
 
         if not project:
             return dict(
@@ -173,13 +161,13 @@ class ProjectDetailView(Resource):
         if not is_owner_or_admin(project, current_user_id, current_user_roles):
             return dict(status='fail', message='unauthorised'), 403
 
-        project_data, errors = project_schema.dumps(project)
+        project_data, errors = project_schema.dump(project)
 
         if errors:
             return dict(status='fail', message=errors), 500
 
         return dict(status='success', data=dict(
-            project=json.loads(project_data))), 200
+            project=project_data)), 200
 
     @jwt_required
     def delete(self, project_id):
@@ -190,7 +178,7 @@ class ProjectDetailView(Resource):
             current_user_id = get_jwt_identity()
             current_user_roles = get_jwt_claims()['roles']
 
-            project = Project.get_by_id(project_id)
+            project = Project.get_active(project_id)
 
             if not project:
                 return dict(
@@ -201,38 +189,21 @@ class ProjectDetailView(Resource):
             if not is_owner_or_admin(project, current_user_id, current_user_roles):
                 return dict(status='fail', message='unauthorised'), 403
 
-            # get cluster for the project
-            cluster = Cluster.get_by_id(project.cluster_id)
-
-            if not cluster:
-                return dict(status='fail', message='cluster not found'), 500
-
-            kube_host = cluster.host
-            kube_token = cluster.token
-
-            kube_client = create_kube_clients(kube_host, kube_token)
-
-            # get corresponding namespace
-
-            namespace = kube_client.kube.read_namespace(project.alias)
-
-            # delete namespace if it exists
-            if namespace:
-                kube_client.kube.delete_namespace(project.alias)
+            if not set_project_status(
+                    project.id, 'deleting', from_states=DELETABLE_STATES):
+                return dict(status='fail', message='deletion failed'), 500
 
-            # To do; change delete to a soft delete
-            deleted = project.delete()
+            # imported here, celery_tasks imports the server
+            from celery_tasks import delete_project
 
-            if not deleted:
-                return dict(status='fail', message='deletion failed'), 500
+            # the namespace is removed in the background, the project is
+            # marked deleted once it is gone
+            delete_project.delay(str(project.id))
 
             return dict(
                 status='success',
-                message=f'project {project_id} deleted successfully'
-            ), 200
-
-        except client.rest.ApiException as e:
-            return dict(status='fail', message=e.reason), e.status
+                message=f'project {project_id} is being deleted'
+            ), 202
 
         except Exception as e:
             return dict(status='fail', message=str(e)), 500
@@ -259,9 +230,9 @@ class ProjectDetailView(Resource):
                 return dict(status='fail', message=errors), 400
 
             if 'name' in validate_project_data:
-                existing_project = Project.find_first(
+                existing_project = Project.active().filter_by(
                     name=validate_project_data['name'],
-                    owner_id=current_user_id)
+                    owner_id=current_user_id).first()
 
             if existing_project:
                 return dict(
@@ -269,7 +240,7 @@ class ProjectDetailView(Resource):
                     message=f'project with name {validate_project_data["name"]} already exists'
                 ), 409
 
-            project = Project.get_by_id(project_id)
+            project = Project.get_active(project_id)
 
             if not project:
                 return dict(status='fail', message=f'Project {project_id} not found'), 404
@@ -294,6 +265,8 @@ class ProjectDetailView(Resource):
 class UserProjectsView(Resource):
 
     @jwt_required
+    @conditional(user_projects_version)
+    @cached_response('user:{user_id}')
     def get(self, user_id):
         """
         """
@@ -304,22 +277,31 @@ class UserProjectsView(Resource):
         if not is_current_or_admin(user_id, current_user_id, current_user_roles):
             return dict(status='fail', message='unauthorised'), 403
 
-        project_schema = ProjectSchema(many=True)
+        project_schema = get_schema(ProjectSchema, many=True)
         user = User.get_by_id(user_id)
 
         if not user:
             return dict(status='fail', message=f'user {user_id} not found'), 404
 
-        projects = user.projects
+        projects, pagination, errors = get_page(
+            Project, schema=ProjectSchema,
+            query=Project.active(),
+            filterable=('cluster_id', 'status'), owner_id=user.id)
+
+        if errors:
+            return dict(status='fail', message=errors), 400
 
-        projects_json, errors = project_schema.dumps(projects)
+        if projects is False:
+            return dict(status='fail', message='Internal Server Error'), 500
+
+        projects_json, errors = project_schema.dump(projects)
 
         if errors:
             return dict(status='fail', message='Internal server error'), 500
 
         return dict(
             status='success',
-            data=dict(projects=json.loads(projects_json))
+            data=dict(projects=projects_json, pagination=pagination)
         ), 200
 
 
@@ -346,7 +328,7 @@ class ProjectMemoryUsageView(Resource):
 
         current_user_id = get_jwt_identity()
         current_user_roles = get_jwt_claims()['roles']
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
 
         if not project:
             return dict(
@@ -359,24 +341,16 @@ class ProjectMemoryUsageView(Resource):
 
         namespace = project.alias
 
-        prom_memory_data = prometheus.query_rang(
+        prom_memory_data = query_range(
             start=start,
             end=end,
             step=step,
             metric='sum(rate(container_memory_usage_bytes{container_name!="POD", image!="", namespace="'+namespace+'"}[5m]))')
 
-        new_data = json.loads(prom_memory_data)
-        final_data_list = []
-
-        try:
-            for value in new_data["data"]["result"][0]["values"]:
-                mem_case = {'timestamp': float(
-                    value[0]), 'value': float(value[1])}
-                final_data_list.append(mem_case)
-        except:
+        if not prom_memory_data:
             return dict(status='fail', message='No values found'), 404
 
-        return dict(status='success', data=dict(values=final_data_list)), 200
+        return dict(status='success', data=dict(values=prom_memory_data)), 200
 
 
 class ProjectCPUView(Resource):
@@ -394,7 +368,7 @@ class ProjectCPUView(Resource):
         if errors:
             return dict(status='fail', message=errors), 400
 
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
 
         if not project:
             return dict(
@@ -410,31 +384,22 @@ class ProjectCPUView(Resource):
         yesterday = current_time + datetime.timedelta(days=-1)
         namespace = project.alias
 
-        prometheus = Prometheus()
-
         start = validated_query_data.get('start', yesterday.timestamp())
         end = validated_query_data.get('end', current_time.timestamp())
         step = validated_query_data.get('step', '1h')
 
-        prom_data = prometheus.query_rang(
+        prom_data = query_range(
             start=start,
             end=end,
             step=step,
             metric='sum(rate(container_cpu_usage_seconds_total{container!="POD", image!="",namespace="' +
             namespace+'"}[5m]))'
         )
-        #  chenge array values to json"values"
-        new_data = json.loads(prom_data)
-        cpu_data_list = []
 
-        try:
-            for value in new_data["data"]["result"][0]["values"]:
-                case = {'timestamp': value[0], 'value': value[1]}
-                cpu_data_list.append(case)
-        except:
+        if not prom_data:
             return dict(status='fail', message='No values found'), 404
 
-        return dict(status='success', data=dict(values=cpu_data_list)), 200
+        return dict(status='success', data=dict(values=prom_data)), 200
 
 
 class ProjectNetworkRequestView(Resource):
@@ -452,7 +417,7 @@ class ProjectNetworkRequestView(Resource):
         if errors:
             return dict(status='fail', message=errors), 400
 
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
 
         if not project:
             return dict(
@@ -468,31 +433,22 @@ class ProjectNetworkRequestView(Resource):
         yesterday = current_time + datetime.timedelta(days=-1)
         namespace = project.alias
 
-        prometheus = Prometheus()
-
         start = validated_query_data.get('start', yesterday.timestamp())
         end = validated_query_data.get('end', current_time.timestamp())
         step = validated_query_data.get('step', '1h')
 
-        prom_data = prometheus.query_rang(
+        prom_data = query_range(
             start=start,
             end=end,
             step=step,
             metric='sum(rate(container_network_receive_bytes_total{namespace="' +
             namespace+'"}[5m]))'
         )
-        #  change array values to json"values"
-        new_data = json.loads(prom_data)
-        network_data_list = []
 
-        try:
-            for value in new_data["data"]["result"][0]["values"]:
-                case = {'timestamp': float(value[0]), 'value': float(value[1])}
-                network_data_list.append(case)
-        except:
+        if not prom_data:
             return dict(status='fail', message='No values found'), 404
 
-        return dict(status='success', data=dict(values=network_data_list)), 200
+        return dict(status='success', data=dict(values=prom_data)), 200
 
 
 class ProjectStorageUsageView(Resource):
@@ -502,7 +458,7 @@ class ProjectStorageUsageView(Resource):
         current_user_id = get_jwt_identity()
         current_user_roles = get_jwt_claims()['roles']
 
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
 
         if not project:
             return dict(
@@ -536,3 +492,42 @@ class ProjectStorageUsageView(Resource):
             return dict(status='fail', message='No values found'), 404
 
         return dict(status='success', data=dict(storage_capacity=values, storage_percentage_usage=volume_perc_value)), 200
+
+
+class ProjectMetricsView(Resource):
+    @jwt_required
+    def post(self, project_id):
+        """
+        Fetch several metrics of a project in one request
+        """
+        current_user_id = get_jwt_identity()
+        current_user_roles = get_jwt_claims()['roles']
+
+        metrics_schema = MultiMetricsSchema()
+        metrics_data = request.get_json()
+
+        validated_query_data, errors = metrics_schema.load(metrics_data)
+
+        if errors:
+            return dict(status='fail', message=errors), 400
+
+        project = Project.get_active(project_id)
+
+        if not project:
+            return dict(
+                status='fail',
+                message=f'project {project_id} not found'
+            ), 404
+
+        if not is_owner_or_admin(project, current_user_id, current_user_roles):
+            return dict(status='fail', message='unauthorised'), 403
+
+        start, end, step = get_default_range(validated_query_data)
+
+        try:
+            metrics = query_metrics(
+                validated_query_data['metrics'], project.alias, start, end, step)
+        except Exception as e:
+            return dict(status='fail', message=str(e)), 500
+
+        return dict(status='success', data=dict(metrics=metrics)), 200
@@ -1,43 +1,123 @@
-import json
 import os
-from flask import current_app
+import time
+import gzip
+import zlib
+from flask import current_app, Response, stream_with_context
+from werkzeug.wsgi import ClosingIterator
 from flask_restful import Resource, request
 from app.schemas import ProjectDatabaseSchema
 from app.models.project_database import ProjectDatabase
-from app.helpers.database_service import MysqlDbService, PostgresqlDbService, generate_db_credentials
+from app.helpers.database_service import generate_db_credentials
 from app.models.project import Project
-from flask_jwt_extended import jwt_required
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt_claims
+from app.helpers.admin import is_owner_or_admin
 from app.helpers.decorators import admin_required
+from app.helpers.db_flavor import (
+    database_flavours, database_health, get_db_flavour, get_database_server,
+    get_flavour_servers, get_server_address)
+from app.helpers.db_placement import place_database
+from app.helpers.db_stats import get_databases_stats
+from app.helpers.db_status import (
+    DB_STATUS_TTL, get_database_statuses, forget_database_status)
+from app.helpers.database_pool import claim_pooled_database
+from app.helpers.pagination import get_page
+from app.helpers.serializer import get_schema
+from app.helpers.response_cache import cached_response
+from app.helpers.etag import conditional, row_version, rows_version
 
-# Used to return a database service
 
-database_flavours = [
-    {
-        'name': 'mysql',
-        'host': os.getenv('ADMIN_MYSQL_HOST'),
-        'port': os.getenv('ADMIN_MYSQL_PORT'),
-        'class': MysqlDbService()
-    },
-    {
-        'name': 'postgres',
-        'host': os.getenv('ADMIN_PSQL_HOST'),
-        'port': os.getenv('ADMIN_PSQL_PORT'),
-        'class': PostgresqlDbService()
-    }
-]
+def add_db_statuses(databases, databases_data):
+    """
+    Add db_status to dumped databases, checking the databases of each
+    server together instead of connecting to every database.
+    """
+    pairs = {}
+    for database in databases:
+        pairs.setdefault(
+            (database.database_flavour_name, database.host, database.port), []
+        ).append((database.name, database.user))
 
+    statuses = {}
+    for (flavour_name, host, port), server_pairs in pairs.items():
+        server = get_database_server(flavour_name, host, port)
 
-# def get_db_service(flavour_name=None):
-#     pass
+        if not server or not database_health.is_reachable(server):
+            continue
 
+        server_statuses = get_database_statuses(server['class'], server_pairs)
 
-def get_db_flavour(flavour_name=None):
-    if flavour_name == 'mysql':
-        return database_flavours[0]
-    elif flavour_name == 'postgres':
-        return database_flavours[1]
-    else:
-        return False
+        for (name, user), status in server_statuses.items():
+            statuses[(flavour_name, host, port, name, user)] = status
+
+    for database, database_data in zip(databases, databases_data):
+        database_data['db_status'] = statuses.get(
+            (database.database_flavour_name, database.host, database.port,
+             database.name, database.user), False)
+
+    return databases_data
+
+
+def status_window():
+    """
+    db_status is reused for DB_STATUS_TTL seconds, versions of responses
+    carrying it change as often
+    """
+    return int(time.time() // DB_STATUS_TTL)
+
+
+def project_databases_version(project_id):
+    project = row_version(Project, project_id, Project.active())
+
+    if project is None:
+        return None
+
+    databases = rows_version(
+        ProjectDatabase.query.filter_by(project_id=project_id), ProjectDatabase)
+
+    if databases is None:
+        return None
+
+    return project, databases, status_window()
+
+
+def project_database_version(project_id, database_id):
+    project = row_version(Project, project_id, Project.active())
+    database = row_version(ProjectDatabase, database_id)
+
+    if project is None or database is None:
+        return None
+
+    return project, database, status_window()
+
+
+def gzip_chunks(chunks):
+    """ compress a stream of chunks on the fly """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def get_project_database(project_id, database_id):
+    """ Return a database of a project the caller owns or a failure response """
+    project = Project.get_active(project_id)
+    if not project:
+        return None, (dict(status='fail', message=f'Project with id {project_id} not found'), 404)
+
+    if not is_owner_or_admin(project, get_jwt_identity(), get_jwt_claims()['roles']):
+        return None, (dict(status='fail', message='unauthorised'), 403)
+
+    database = ProjectDatabase.get_by_id(database_id)
+
+    if not database or str(database.project_id) != str(project.id):
+        return None, (dict(
+            status="fail",
+            message=f"Database with id {database_id} not found."
+        ), 404)
+
+    return database, None
 
 
 class ProjectDatabaseView(Resource):
@@ -73,14 +153,17 @@ class ProjectDatabaseView(Resource):
         database_password = validated_database_data.get(
             'password', credentials.password)
 
+        # databases without a chosen name or user come from the pool
+        from_pool = 'name' not in validated_database_data \
+            and 'user' not in validated_database_data
+        requested_password = validated_database_data.get('password')
+
         new_database_info = dict(
             user=database_user,
             password=database_password,
             project_id=project_id,
             name=database_name,
-            database_flavour_name=database_flavour_name,
-            host=db_flavour['host'],
-            port=db_flavour['port']
+            database_flavour_name=database_flavour_name
         )
 
         validated_database_data, errors = database_schema.load(
@@ -89,7 +172,7 @@ class ProjectDatabaseView(Resource):
         if errors:
             return dict(status="fail", message=errors), 400
 
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
         if not project:
             return dict(status='fail', message=f'Project with id {project_id} not found'), 404
 
@@ -113,16 +196,32 @@ class ProjectDatabaseView(Resource):
                 message=f"Database user {database_user} Already Exists."
             ), 400
 
-        # Create the database
-        database_service = db_flavour['class']
-        database_connection = database_service.check_db_connection()
+        if from_pool:
+            database = claim_pooled_database(
+                database_flavour_name,
+                project_id=project_id,
+                password=requested_password
+            )
+
+            if database:
+                new_database_data, errors = database_schema.dump(database)
 
-        if not database_connection:
+                return dict(
+                    status='success',
+                    data=dict(database=new_database_data)
+                ), 201
+
+        # Create the database on the least loaded reachable server
+        server = place_database(database_flavour_name)
+
+        if not server:
             return dict(
                 status="fail",
                 message=f"Failed to connect to the database service"
             ), 500
 
+        database_service = server['class']
+
         create_database = database_service.create_database(
             db_name=database_name,
             user=database_user,
@@ -135,38 +234,55 @@ class ProjectDatabaseView(Resource):
                 message=f"Unable to create database"
             ), 500
 
+        forget_database_status(database_service, database_name, database_user)
+
         # Save database credentials
-        database = ProjectDatabase(**validated_database_data)
+        host, port = get_server_address(server)
+        database = ProjectDatabase(
+            **validated_database_data, host=host, port=port)
         saved_database = database.save()
 
         if not saved_database:
             return dict(status='fail', message=f'Internal Server Error'), 500
 
-        new_database_data, errors = database_schema.dumps(database)
+        new_database_data, errors = database_schema.dump(database)
 
         return dict(
             status='success',
-            data=dict(database=json.loads(new_database_data))
+            data=dict(database=new_database_data)
         ), 201
 
     @jwt_required
+    @conditional(project_databases_version)
+    @cached_response('project:{project_id}')
     def get(self, project_id):
         """
         """
-        database_schema = ProjectDatabaseSchema(many=True)
+        database_schema = get_schema(ProjectDatabaseSchema, many=True)
 
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
         if not project:
             return dict(status='fail', message=f'Project with id {project_id} not found'), 404
 
-        databases = ProjectDatabase.find_all(project_id=project_id)
+        databases, pagination, errors = get_page(
+            ProjectDatabase, schema=ProjectDatabaseSchema, filterable=('name', 'database_flavour_name'),
+            project_id=project_id)
+
+        if errors:
+            return dict(status='fail', message=errors), 400
 
-        database_data, errors = database_schema.dumps(databases)
+        if databases is False:
+            return dict(status='fail', message='Internal Server Error'), 500
+
+        database_data, errors = database_schema.dump(databases)
 
         if errors:
             return dict(status='fail', message=errors), 500
 
-        return dict(status='success', data=dict(databases=json.loads(database_data))), 200
+        database_data_list = add_db_statuses(databases, database_data)
+
+        return dict(status='success', data=dict(
+            databases=database_data_list, pagination=pagination)), 200
 
 
 class ProjectDatabaseDetailView(Resource):
@@ -177,7 +293,7 @@ class ProjectDatabaseDetailView(Resource):
         """
         database_schema = ProjectDatabaseSchema()
 
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
         if not project:
             return dict(status='fail', message=f'Project with id {project_id} not found'), 404
 
@@ -200,10 +316,13 @@ class ProjectDatabaseDetailView(Resource):
             ), 409
 
         # Delete the database
-        database_service = db_flavour['name']
-        database_connection = database_service.check_db_connection()
+        server = get_database_server(
+            database_existant.database_flavour_name,
+            database_existant.host, database_existant.port)
+        database_service = server['class']
 
-        if not database_connection:
+        # cached by the background prober, no connection is opened here
+        if not database_health.is_reachable(server):
             return dict(
                 status="fail",
                 message=f"Failed to connect to the database service"
@@ -218,6 +337,9 @@ class ProjectDatabaseDetailView(Resource):
                 message=f"Unable to delete database"
             ), 500
 
+        forget_database_status(
+            database_service, database_existant.name, database_existant.user)
+
         # Delete database record from database
         deleted_database = database_existant.delete()
 
@@ -227,12 +349,13 @@ class ProjectDatabaseDetailView(Resource):
         return dict(status='success', message="Database Successfully deleted"), 200
 
     @jwt_required
+    @conditional(project_database_version)
     def get(self, project_id, database_id):
         """
         """
         database_schema = ProjectDatabaseSchema()
 
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
 
         if not project:
             return dict(status='fail', message=f'Project with id {project_id} not found'), 404
@@ -245,7 +368,7 @@ class ProjectDatabaseDetailView(Resource):
                 message=f"Database with id {database_id} not found."
             ), 404
 
-        database_data, errors = database_schema.dumps(database_existant)
+        database_data_list, errors = database_schema.dump(database_existant)
 
         if errors:
             return dict(status='fail', message=errors), 500
@@ -258,28 +381,7 @@ class ProjectDatabaseDetailView(Resource):
                 status="fail",
                 message=f"Database with flavour {database_existant.database_flavour_name} is not mysql or postgres."
             ), 409
-
-        # Get db status
-        database_service = db_flavour['name']
-        try:
-            database_connection = database_service.create_db_connection(
-                user=database_existant.user, password=database_existant.password, db_name=database_existant.name)
-            if not database_connection:
-                db_status = False
-            else:
-                db_status = True
-        except:
-            db_status = False
-        finally:
-            if database_connection:
-                if database_service == MysqlDbService():
-                    if database_connection.is_connected():
-                        database_connection.close()
-                    else:
-                        database_connection.close()
-
-        database_data_list = json.loads(database_data)
-        database_data_list['db_status'] = db_status
+        add_db_statuses([database_existant], [database_data_list])
 
         return dict(status='success', data=dict(database=database_data_list)), 200
 
@@ -315,6 +417,11 @@ class ProjectDatabaseAdminView(Resource):
         database_user = validated_database_data.get('user', credentials.user)
         database_password = validated_database_data.get(
             'password', credentials.password)
+
+        # databases without a chosen name or user come from the pool
+        from_pool = 'name' not in validated_database_data \
+            and 'user' not in validated_database_data
+        requested_password = validated_database_data.get('password')
         project_id = validated_database_data.get('project_id', None)
 
         new_database_info = dict(
@@ -322,13 +429,11 @@ class ProjectDatabaseAdminView(Resource):
             password=database_password,
             project_id=project_id,
             name=database_name,
-            database_flavour_name=database_flavour_name,
-            host=db_flavour['host'],
-            port=db_flavour['port']
+            database_flavour_name=database_flavour_name
         )
 
         if project_id:
-            project = Project.get_by_id(project_id)
+            project = Project.get_active(project_id)
             if not project:
                 return dict(status='fail', message=f'Project with id {project_id} not found'), 404
         else:
@@ -358,16 +463,32 @@ class ProjectDatabaseAdminView(Resource):
                 message=f"Database user {database_user} Already Exists."
             ), 400
 
-        # Create the database
-        database_service = db_flavour['class']
-        database_connection = database_service.check_db_connection()
+        if from_pool:
+            database = claim_pooled_database(
+                database_flavour_name,
+                project_id=project_id,
+                password=requested_password
+            )
+
+            if database:
+                new_database_data, errors = database_schema.dump(database)
 
-        if not database_connection:
+                return dict(
+                    status='success',
+                    data=dict(database=new_database_data)
+                ), 201
+
+        # Create the database on the least loaded reachable server
+        server = place_database(database_flavour_name)
+
+        if not server:
             return dict(
                 status="fail",
                 message=f"Failed to connect to the database service"
             ), 500
 
+        database_service = server['class']
+
         create_database = database_service.create_database(
             db_name=database_name,
             user=database_user,
@@ -380,34 +501,49 @@ class ProjectDatabaseAdminView(Resource):
                 message=f"Unable to create database"
             ), 500
 
+        forget_database_status(database_service, database_name, database_user)
+
         # Save database credentials
-        database = ProjectDatabase(**validated_database_data)
+        host, port = get_server_address(server)
+        database = ProjectDatabase(
+            **validated_database_data, host=host, port=port)
         saved_database = database.save()
 
         if not saved_database:
             return dict(status='fail', message=f'Internal Server Error'), 500
 
-        new_database_data, errors = database_schema.dumps(database)
+        new_database_data, errors = database_schema.dump(database)
 
         return dict(
             status='success',
-            data=dict(database=json.loads(new_database_data))
+            data=dict(database=new_database_data)
         ), 201
 
     @admin_required
     def get(self):
         """
         """
-        database_schema = ProjectDatabaseSchema(many=True)
+        database_schema = get_schema(ProjectDatabaseSchema, many=True)
 
-        databases = ProjectDatabase.find_all()
+        databases, pagination, errors = get_page(
+            ProjectDatabase, schema=ProjectDatabaseSchema,
+            filterable=('name', 'database_flavour_name', 'project_id', 'host'))
 
-        database_data, errors = database_schema.dumps(databases)
+        if errors:
+            return dict(status='fail', message=errors), 400
+
+        if databases is False:
+            return dict(status='fail', message='Internal Server Error'), 500
+
+        database_data, errors = database_schema.dump(databases)
 
         if errors:
             return dict(status='fail', message=errors), 500
 
-        return dict(status='success', data=dict(databases=json.loads(database_data))), 200
+        database_data_list = add_db_statuses(databases, database_data)
+
+        return dict(status='success', data=dict(
+            databases=database_data_list, pagination=pagination)), 200
 
 
 class ProjectDatabaseAdminDetailView(Resource):
@@ -434,10 +570,13 @@ class ProjectDatabaseAdminDetailView(Resource):
             ), 409
 
         # Delete the database
-        database_service = db_flavour['class']
-        database_connection = database_service.check_db_connection()
+        server = get_database_server(
+            database_existant.database_flavour_name,
+            database_existant.host, database_existant.port)
+        database_service = server['class']
 
-        if not database_connection:
+        # cached by the background prober, no connection is opened here
+        if not database_health.is_reachable(server):
             return dict(
                 status="fail",
                 message=f"Failed to connect to the database service"
@@ -452,6 +591,9 @@ class ProjectDatabaseAdminDetailView(Resource):
                 message=f"Unable to delete database"
             ), 500
 
+        forget_database_status(
+            database_service, database_existant.name, database_existant.user)
+
         # Delete database record from database
         deleted_database = database_existant.delete()
 
@@ -474,7 +616,7 @@ class ProjectDatabaseAdminDetailView(Resource):
                 message=f"Database with id {database_id} not found."
             ), 404
 
-        database_data, errors = database_schema.dumps(database_existant)
+        database_data_list, errors = database_schema.dump(database_existant)
 
         if errors:
             return dict(status='fail', message=errors), 500
@@ -487,28 +629,7 @@ class ProjectDatabaseAdminDetailView(Resource):
                 status="fail",
                 message=f"Database with flavour name {database_existant.database_flavour_name} is not mysql or postgres."
             ), 409
-
-        # Get db status
-        database_service = db_flavour['class']
-        try:
-            database_connection = database_service.create_db_connection(
-                user=database_existant.user, password=database_existant.password, db_name=database_existant.name)
-            if not database_connection:
-                db_status = False
-            else:
-                db_status = True
-        except:
-            db_status = False
-        finally:
-            if database_connection:
-                if database_service == MysqlDbService():
-                    if database_connection.is_connected():
-                        database_connection.close()
-                else:
-                    database_connection.close()
-
-        database_data_list = json.loads(database_data)
-        database_data_list['db_status'] = db_status
+        add_db_statuses([database_existant], [database_data_list])
 
         return dict(status='success', data=dict(database=database_data_list)), 200
 
@@ -522,7 +643,7 @@ class ProjectDatabaseResetView(Resource):
         """
         database_schema = ProjectDatabaseSchema()
 
-        project = Project.get_by_id(project_id)
+        project = Project.get_active(project_id)
         if not project:
             return dict(status='fail', message=f'Project with id {project_id} not found'), 404
 
@@ -543,28 +664,42 @@ class ProjectDatabaseResetView(Resource):
                 message=f"Database with flavour name {database_existant.database_flavour_name} is not mysql or postgres."
             ), 409
 
-        database_service = db_flavour['class']
-        database_connection = database_service.check_db_connection()
+        server = get_database_server(
+            database_existant.database_flavour_name,
+            database_existant.host, database_existant.port)
+        database_service = server['class']
 
-        if not database_connection:
+        # cached by the background prober, no connection is opened here
+        if not database_health.is_reachable(server):
             return dict(
                 status="fail",
                 message=f"Failed to connect to the database service"
             ), 500
 
+        reset_started = time.monotonic()
+
         reset_database = database_service.reset_database(
             db_name=database_existant.name,
             user=database_existant.user,
             password=database_existant.password
         )
 
+        reset_time = time.monotonic() - reset_started
+
         if not reset_database:
             return dict(
                 status="fail",
                 message=f"Unable to reset database"
             ), 500
 
-        return dict(status='success', message="Database Reset Successfully"), 200
+        forget_database_status(
+            database_service, database_existant.name, database_existant.user)
+
+        return dict(
+            status='success',
+            message="Database Reset Successfully",
+            data=dict(reset_time_ms=round(reset_time * 1000, 2))
+        ), 200
 
 
 class ProjectDatabaseAdminResetView(Resource):
@@ -593,26 +728,218 @@ class ProjectDatabaseAdminResetView(Resource):
                 message=f"Database with flavour name {database_existant.database_flavour_name} is not mysql or postgres."
             ), 409
 
-        database_service = db_flavour['class']
-
-        database_connection = database_service.check_db_connection()
+        server = get_database_server(
+            database_existant.database_flavour_name,
+            database_existant.host, database_existant.port)
+        database_service = server['class']
 
-        if not database_connection:
+        # cached by the background prober, no connection is opened here
+        if not database_health.is_reachable(server):
             return dict(
                 status="fail",
                 message=f"Failed to connect to the database service"
             ), 500
 
+        reset_started = time.monotonic()
+
         reset_database = database_service.reset_database(
             db_name=database_existant.name,
             user=database_existant.user,
             password=database_existant.password
         )
 
+        reset_time = time.monotonic() - reset_started
+
         if not reset_database:
             return dict(
                 status="fail",
                 message=f"Unable to reset database"
             ), 500
 
-        return dict(status='success', message="Database Reset Successfully"), 200
+        forget_database_status(
+            database_service, database_existant.name, database_existant.user)
+
+        return dict(
+            status='success',
+            message="Database Reset Successfully",
+            data=dict(reset_time_ms=round(reset_time * 1000, 2))
+        ), 200
+
+
+class DatabaseHealthView(Resource):
+
+    @admin_required
+    def get(self):
+        """
+        """
+        servers = [
+            server
+            for db_flavour in database_flavours
+            for server in get_flavour_servers(db_flavour['name'])
+        ]
+
+        statuses = database_health.get_all_statuses(servers)
+
+        return dict(status='success', data=dict(servers=statuses)), 200
+
+
+class ProjectDatabaseStatsView(Resource):
+
+    @jwt_required
+    def get(self, project_id):
+        """
+        Size, connections and tables of a project's databases
+        """
+        project = Project.get_active(project_id)
+        if not project:
+            return dict(status='fail', message=f'Project with id {project_id} not found'), 404
+
+        if not is_owner_or_admin(project, get_jwt_identity(), get_jwt_claims()['roles']):
+            return dict(status='fail', message='unauthorised'), 403
+
+        databases = ProjectDatabase.find_all(project_id=project_id)
+
+        databases_stats, totals = get_databases_stats(databases)
+
+        return dict(
+            status='success',
+            data=dict(databases=databases_stats, totals=totals)
+        ), 200
+
+
+class DatabaseStatsView(Resource):
+
+    @admin_required
+    def get(self):
+        """
+        Size, connections and tables of all databases
+        """
+        databases = ProjectDatabase.find_all()
+
+        databases_stats, totals = get_databases_stats(databases)
+
+        return dict(
+            status='success',
+            data=dict(databases=databases_stats, totals=totals)
+        ), 200
+
+
+class ProjectDatabaseExportView(Resource):
+
+    @jwt_required
+    def get(self, project_id, database_id):
+        """
+        Stream a table of the database as CSV, gzipped with ?gzip=true
+        """
+        database, failure = get_project_database(project_id, database_id)
+        if failure:
+            return failure
+
+        server = get_database_server(
+            database.database_flavour_name, database.host, database.port)
+
+        if not server or not database_health.is_reachable(server):
+            return dict(
+                status="fail",
+                message=f"Failed to connect to the database service"
+            ), 500
+
+        database_service = server['class']
+        credentials = dict(
+            db_name=database.name, user=database.user, password=database.password)
+
+        tables = database_service.get_tables(**credentials)
+
+        if tables is False:
+            return dict(status='fail', message='Unable to read database tables'), 500
+
+        table = request.args.get('table')
+
+        if not table:
+            return dict(
+                status='fail',
+                message='table is required',
+                data=dict(tables=tables)
+            ), 400
+
+        if table not in tables:
+            return dict(status='fail', message=f'Table {table} not found'), 404
+
+        chunks = database_service.export_table(table=table, **credentials)
+
+        if chunks is False:
+            return dict(status='fail', message='Unable to export table'), 500
+
+        filename = f'{database.name}-{table}.csv'
+        mimetype = 'text/csv'
+
+        if request.args.get('gzip', '').lower() == 'true':
+            # the export is closed with the response, started or not
+            chunks = ClosingIterator(gzip_chunks(chunks), chunks.close)
+            filename = f'{filename}.gz'
+            mimetype = 'application/gzip'
+
+        return Response(
+            stream_with_context(chunks),
+            mimetype=mimetype,
+            headers={
+                'Content-Disposition': f'attachment; filename={filename}',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+
+
+class ProjectDatabaseImportView(Resource):
+
+    @jwt_required
+    def post(self, project_id, database_id):
+        """
+        Load CSV rows with a header row from the request body into a table,
+        gzipped bodies are sent with Content-Encoding: gzip
+        """
+        database, failure = get_project_database(project_id, database_id)
+        if failure:
+            return failure
+
+        server = get_database_server(
+            database.database_flavour_name, database.host, database.port)
+
+        if not server or not database_health.is_reachable(server):
+            return dict(
+                status="fail",
+                message=f"Failed to connect to the database service"
+            ), 500
+
+        database_service = server['class']
+        credentials = dict(
+            db_name=database.name, user=database.user, password=database.password)
+
+        table = request.args.get('table')
+
+        if not table:
+            return dict(status='fail', message='table is required'), 400
+
+        tables = database_service.get_tables(**credentials)
+
+        if tables is False:
+            return dict(status='fail', message='Unable to read database tables'), 500
+
+        if table not in tables:
+            return dict(status='fail', message=f'Table {table} not found'), 404
+
+        # read straight from the socket so the body is never held in memory
+        stream = request.stream
+        if request.headers.get('Content-Encoding', '').lower() == 'gzip':
+            stream = gzip.GzipFile(fileobj=stream, mode='rb')
+
+        imported = database_service.import_table(
+            table=table, stream=stream, **credentials)
+
+        if imported is False:
+            return dict(status='fail', message='Unable to import table data'), 400
+
+        return dict(
+            status='success',
+            message='Table data imported successfully',
+            data=dict(table=table, rows=imported)
+        ), 200
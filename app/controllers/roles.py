@@ -1,8 +1,8 @@
-import json
 from flask import current_app
 from flask_restful import Resource, request
 from app.schemas import RoleSchema
 from app.models.role import Role
+from app.helpers.serializer import get_schema
 
 
 class RolesView(Resource):
@@ -35,28 +35,28 @@ class RolesView(Resource):
         if not saved_role:
             return dict(status='fail', message=f'Internal Server Error'), 500
 
-        new_role_data, errors = roles_schema.dumps(role)
+        new_role_data, errors = roles_schema.dump(role)
 
         return dict(
             status='success',
-            data=dict(role=json.loads(new_role_data))
+            data=dict(role=new_role_data)
             ), 201
 
     def get(self):
         """
         """
-        role_schema = RoleSchema(many=True)
+        role_schema = get_schema(RoleSchema, many=True)
 
         roles = Role.find_all()
 
-        roles_data, errors = role_schema.dumps(roles)
+        roles_data, errors = role_schema.dump(roles)
 
         if errors:
             return dict(status='fail', message=errors), 400
 
         return dict(
             status='success',
-            data=dict(roles=json.loads(roles_data))
+            data=dict(roles=roles_data)
         ), 200
 
 
@@ -75,14 +75,14 @@ class RolesDetailView(Resource):
                 message=f"Role with id {role_id} not found"
                 ), 404
 
-        role_data, errors = role_schema.dumps(role)
+        role_data, errors = role_schema.dump(role)
 
         if errors:
             return dict(status="fail", message=errors), 500
 
         return dict(
             status='success',
-            data=dict(role=json.loads(role_data))
+            data=dict(role=role_data)
             ), 200
 
 
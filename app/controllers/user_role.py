@@ -1,4 +1,3 @@
-import json
 from flask import current_app
 from flask_restful import Resource, request
 from app.schemas import UserRoleSchema, UserSchema
@@ -6,6 +5,7 @@ from app.models.user_role import UserRole
 from app.schemas.role import RoleSchema
 from app.models.user import User
 from app.models.role import Role
+from app.helpers.serializer import get_schema
 
 
 class UserRolesView(Resource):
@@ -51,33 +51,33 @@ class UserRolesView(Resource):
         if not saved_user_role:
             return dict(status='fail', message='Internal Server Error'), 500
 
-        new_user_role_data, errors = user_schema.dumps(user)
+        new_user_role_data, errors = user_schema.dump(user)
 
         return dict(
             status='success',
-            data=dict(user_role=json.loads(new_user_role_data))
+            data=dict(user_role=new_user_role_data)
             ), 201
 
     def get(self, user_id):
         """
         """
-        role_schema = RoleSchema(many=True)
+        role_schema = get_schema(RoleSchema, many=True)
 
-        user = User.get_by_id(user_id)
+        user = User.get_by_id_with(user_id, 'roles')
 
         if not user:
             return dict(status='fail', message='User not found'), 404
 
         user_roles = user.roles
 
-        user_role_data, errors = role_schema.dumps(user_roles)
+        user_role_data, errors = role_schema.dump(user_roles)
 
         if errors:
             return dict(status="fail", message="Internal Server Error"), 500
 
         return dict(
             status="success",
-            data=dict(user_roles=json.loads(user_role_data))
+            data=dict(user_roles=user_role_data)
             ), 200
 
     # delete user role
@@ -119,9 +119,9 @@ class UserRolesView(Resource):
         if not saved_user_role:
             return dict(status='fail', message='Internal Server Error'), 500
 
-        new_user_role_data, errors = user_schema.dumps(user)
+        new_user_role_data, errors = user_schema.dump(user)
 
         return dict(
             status='success',
-            data=dict(user_role=json.loads(new_user_role_data))
+            data=dict(user_role=new_user_role_data)
             ), 201
@@ -1,4 +1,3 @@
-import json
 import os
 from flask import current_app
 from flask_restful import Resource, request
@@ -9,6 +8,8 @@ from app.models.role import Role
 from app.helpers.confirmation import send_verification
 from app.helpers.token import validate_token
 from app.helpers.decorators import admin_required
+from app.helpers.pagination import get_page
+from app.helpers.serializer import get_schema
 
 
 class UsersView(Resource):
@@ -74,11 +75,11 @@ class UsersView(Resource):
             subject
             )
 
-        new_user_data, errors = user_schema.dumps(user)
+        new_user_data, errors = user_schema.dump(user)
 
         return dict(
             status='success',
-            data=dict(user=json.loads(new_user_data))
+            data=dict(user=new_user_data)
             ), 201
             
     @admin_required
@@ -86,18 +87,27 @@ class UsersView(Resource):
         """
         """
 
-        user_schema = UserSchema(many=True)
+        user_schema = get_schema(UserSchema, many=True)
 
-        users = User.find_all()
+        # roles are nested in each user, fetch them all in one query
+        users, pagination, errors = get_page(
+            User, schema=UserSchema, query=User.eager('roles'),
+            filterable=('email', 'name', 'username', 'verified'))
 
-        users_data, errors = user_schema.dumps(users)
+        if errors:
+            return dict(status='fail', message=errors), 400
+
+        if users is False:
+            return dict(status='fail', message='Internal Server Error'), 500
+
+        users_data, errors = user_schema.dump(users)
 
         if errors:
             return dict(status='fail', message=errors), 400
 
         return dict(
             status='success',
-            data=dict(users=json.loads(users_data))
+            data=dict(users=users_data, pagination=pagination)
         ), 200
 
 
@@ -164,7 +174,7 @@ class UserDetailView(Resource):
         """
         user_schema = UserSchema()
 
-        user = User.get_by_id(user_id)
+        user = User.get_by_id_with(user_id, 'roles')
 
         if not user:
             return dict(
@@ -172,13 +182,13 @@ class UserDetailView(Resource):
                 message=f'user {user_id} not found'
                 ), 404
 
-        user_data, errors = user_schema.dumps(user)
+        user_data, errors = user_schema.dump(user)
 
         if errors:
             return dict(status='fail', message=errors), 500
 
         return dict(status='success', data=dict(
-            user=json.loads(user_data))), 200
+            user=user_data)), 200
 
     def delete(self, user_id):
         """
@@ -77,8 +77,9 @@ def create_default_roles():
 
 def is_owner_or_admin(resource, user_id, user_roles):
     is_admin = has_role(user_roles, 'administrator')
-    if resource.owner.id:
-        is_owner = str(resource.owner.id) == str(user_id)
+    # compare the owner_id column, loading the owner would cost a query
+    if resource.owner_id:
+        is_owner = str(resource.owner_id) == str(user_id)
     else:
         is_owner = False
 
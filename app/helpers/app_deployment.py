@@ -0,0 +1,399 @@
+import json
+import uuid
+import base64
+from kubernetes import client
+from app.models.app import App
+from app.helpers.kube import get_kube_clients
+from app.helpers.clean_up import resource_clean_up
+from app.helpers.url import get_app_subdomain
+from app.helpers.owner_labels import owner_labels
+
+
+# registry credentials of a private image, only ever held by the request
+CREDENTIAL_FIELDS = (
+    'docker_server', 'docker_username', 'docker_password', 'docker_email')
+
+# steps of an app deployment, in the order they run
+DEPLOYMENT_STEPS = [
+    'image_pull_secret',
+    'pvc',
+    'app_deployment',
+    'app_service',
+    'ingress_entry',
+    'app_record',
+]
+
+
+def get_docker_password(docker_server, docker_username, docker_password):
+    # handle gcr credentials
+    if 'gcr' in docker_server and docker_username == '_json_key':
+        return json.dumps(json.loads(base64.b64decode(docker_password)))
+
+    return docker_password
+
+
+def create_image_pull_secret(
+        kube_client, namespace, app_alias, docker_server,
+        docker_username, docker_password, docker_email, labels=None):
+    """ create the secret pods use to pull an app's private image """
+    docker_password = get_docker_password(
+        docker_server, docker_username, docker_password)
+
+    authstring = base64.b64encode(
+        f'{docker_username}:{docker_password}'.encode("utf-8"))
+
+    secret_dict = dict(auths={
+        docker_server: {
+            "username": docker_username,
+            "password": str(docker_password),
+            "email": docker_email,
+            "auth": str(authstring, "utf-8")
+        }
+    })
+
+    secret_b64 = base64.b64encode(json.dumps(secret_dict).encode("utf-8"))
+
+    secret_body = client.V1Secret(
+        metadata=client.V1ObjectMeta(name=app_alias, labels=labels),
+        type='kubernetes.io/dockerconfigjson',
+        data={'.dockerconfigjson': str(secret_b64, "utf-8")})
+
+    kube_client.kube.create_namespaced_secret(
+        namespace=namespace,
+        body=secret_body,
+        _preload_content=False)
+
+    return client.V1LocalObjectReference(name=app_alias)
+
+
+def create_app_pvc(kube_client, namespace, app_alias, labels=None):
+    """ create the volume claim mounted at /data in an app's pods """
+    pvc_name = f'{app_alias}-pvc'
+
+    pvc_spec = client.V1PersistentVolumeClaimSpec(
+        access_modes=['ReadWriteOnce'],
+        resources=client.V1ResourceRequirements(requests=dict(storage='1Gi')),
+        storage_class_name='openebs-standard')
+
+    pvc = client.V1PersistentVolumeClaim(
+        api_version="v1",
+        kind="PersistentVolumeClaim",
+        metadata=client.V1ObjectMeta(name=pvc_name, labels=labels),
+        spec=pvc_spec
+    )
+
+    kube_client.kube.create_namespaced_persistent_volume_claim(
+        namespace=namespace,
+        body=pvc
+    )
+
+    return pvc_name
+
+
+def create_app_deployment(
+        kube_client, namespace, app_alias, app_image, app_port,
+        replicas=1, env_vars=None, command=None,
+        image_pull_secret=None, pvc_name=None, labels=None):
+    dep_name = f'{app_alias}-deployment'
+
+    env = [
+        client.V1EnvVar(name=str(key), value=str(value))
+        for key, value in (env_vars or {}).items()
+    ]
+
+    volume_mounts = None
+    volumes = None
+
+    if pvc_name:
+        volume_mounts = [client.V1VolumeMount(mount_path="/data", name=dep_name)]
+        volumes = [client.V1Volume(
+            name=dep_name,
+            persistent_volume_claim=client.V1PersistentVolumeClaimVolumeSource(
+                claim_name=pvc_name)
+        )]
+
+    # pod template
+    container = client.V1Container(
+        name=app_alias,
+        image=app_image,
+        ports=[client.V1ContainerPort(container_port=app_port)],
+        env=env,
+        command=command,
+        volume_mounts=volume_mounts
+    )
+
+    template = client.V1PodTemplateSpec(
+        metadata=client.V1ObjectMeta(labels={
+            'app': app_alias
+        }),
+        spec=client.V1PodSpec(
+            containers=[container],
+            image_pull_secrets=[image_pull_secret],
+            volumes=volumes
+        )
+    )
+
+    spec = client.V1DeploymentSpec(
+        replicas=replicas,
+        template=template,
+        selector={'matchLabels': {'app': app_alias}}
+    )
+
+    deployment = client.V1Deployment(
+        api_version="apps/v1",
+        kind="Deployment",
+        metadata=client.V1ObjectMeta(name=dep_name, labels=labels),
+        spec=spec
+    )
+
+    kube_client.appsv1_api.create_namespaced_deployment(
+        body=deployment,
+        namespace=namespace,
+        _preload_content=False
+    )
+
+    return dep_name
+
+
+def create_app_service(kube_client, namespace, app_alias, app_port, labels=None):
+    service_name = f'{app_alias}-service'
+
+    service_meta = client.V1ObjectMeta(
+        name=service_name,
+        labels={'app': app_alias, **(labels or {})}
+    )
+
+    service_spec = client.V1ServiceSpec(
+        type='ClusterIP',
+        ports=[client.V1ServicePort(port=3000, target_port=app_port)],
+        selector={'app': app_alias}
+    )
+
+    service = client.V1Service(
+        metadata=service_meta,
+        spec=service_spec)
+
+    kube_client.kube.create_namespaced_service(
+        namespace=namespace,
+        body=service,
+        _preload_content=False
+    )
+
+    return service_name
+
+
+def add_app_ingress_rule(kube_client, namespace, project_alias, app_alias, service_name):
+    """
+    Route the app's subdomain to its service, creating the project's
+    ingress if the namespace has none. Returns the subdomain and whether
+    the ingress was created.
+    """
+    sub_domain = get_app_subdomain(app_alias)
+
+    new_ingress_backend = client.ExtensionsV1beta1IngressBackend(
+        service_name=service_name,
+        service_port=3000
+    )
+
+    new_ingress_rule = client.ExtensionsV1beta1IngressRule(
+        host=sub_domain,
+        http=client.ExtensionsV1beta1HTTPIngressRuleValue(
+            paths=[client.ExtensionsV1beta1HTTPIngressPath(
+                path="",
+                backend=new_ingress_backend
+            )]
+        )
+    )
+
+    ingress_name = f'{project_alias}-ingress'
+
+    ingress_list = kube_client.extension_api.list_namespaced_ingress(
+        namespace=namespace).items
+
+    if not ingress_list:
+        ingress_body = client.ExtensionsV1beta1Ingress(
+            metadata=client.V1ObjectMeta(name=ingress_name),
+            spec=client.ExtensionsV1beta1IngressSpec(rules=[new_ingress_rule])
+        )
+
+        kube_client.extension_api.create_namespaced_ingress(
+            namespace=namespace,
+            body=ingress_body
+        )
+
+        return sub_domain, True
+
+    # update ingress with new entry
+    ingress = ingress_list[0]
+    ingress.spec.rules.append(new_ingress_rule)
+
+    kube_client.extension_api.patch_namespaced_ingress(
+        name=ingress_name,
+        namespace=namespace,
+        body=ingress
+    )
+
+    return sub_domain, False
+
+
+def prepare_deployment(project, app_data):
+    """
+    Give an app its id and, for a private image, create its pull secret
+    while the request still holds the registry credentials. Returns the
+    app data without the credentials, it is what goes to the task.
+    """
+    task_data = {
+        key: value for key, value in app_data.items()
+        if key not in CREDENTIAL_FIELDS}
+    task_data['id'] = str(uuid.uuid4())
+
+    if app_data.get('private_image'):
+        create_image_pull_secret(
+            get_kube_clients(project.cluster), project.alias,
+            app_data['alias'],
+            app_data.get('docker_server'),
+            app_data.get('docker_username'),
+            app_data.get('docker_password'),
+            app_data.get('docker_email'),
+            labels=owner_labels(project.id, task_data['id']))
+        task_data['image_pull_secret'] = app_data['alias']
+
+    return task_data
+
+
+def release_image_pull_secret(project, app_data):
+    """ delete the pull secret prepare_deployment made for a deployment that will not run """
+    if not app_data.get('image_pull_secret'):
+        return
+
+    resource_clean_up(
+        dict(image_pull_secret=True), app_data['alias'], project.alias,
+        get_kube_clients(project.cluster))
+
+
+def get_error_message(error):
+    if isinstance(error, client.rest.ApiException):
+        try:
+            return json.loads(error.body)
+        except (TypeError, ValueError):
+            return error.reason
+
+    return str(error)
+
+
+def deploy_app(project, app_data, persistent_storage=False, on_step=None):
+    """
+    Create an app's resources in its project's namespace one step at a
+    time and save the app once they all exist.
+
+    on_step(step, status) is called as each step starts, finishes or is
+    skipped. When a step fails the resources created so far are removed
+    with resource_clean_up and the error is raised again.
+    """
+    resource_registry = {
+        'db_deployment': False,
+        'db_service': False,
+        'image_pull_secret': False,
+        'pvc': False,
+        'app_deployment': False,
+        'app_service': False,
+        'ingress_entry': False
+    }
+
+    def report(step, status):
+        if on_step:
+            on_step(step, status)
+
+    app_alias = app_data['alias']
+    app_port = app_data['port']
+    namespace = project.alias
+    kube_client = get_kube_clients(project.cluster)
+    image_pull_secret = None
+    pvc_name = None
+
+    # the id is known before the row exists so the app's objects can be
+    # labelled with it as they are created
+    app_id = app_data.get('id') or str(uuid.uuid4())
+    labels = owner_labels(project.id, app_id)
+
+    try:
+        if app_data.get('image_pull_secret'):
+            # created by prepare_deployment, only its name is passed on
+            image_pull_secret = client.V1LocalObjectReference(
+                name=app_data['image_pull_secret'])
+            resource_registry['image_pull_secret'] = True
+            report('image_pull_secret', 'done')
+        elif app_data.get('private_image'):
+            report('image_pull_secret', 'running')
+            image_pull_secret = create_image_pull_secret(
+                kube_client, namespace, app_alias,
+                app_data.get('docker_server'),
+                app_data.get('docker_username'),
+                app_data.get('docker_password'),
+                app_data.get('docker_email'),
+                labels=labels)
+            resource_registry['image_pull_secret'] = True
+            report('image_pull_secret', 'done')
+        else:
+            report('image_pull_secret', 'skipped')
+
+        if persistent_storage:
+            report('pvc', 'running')
+            pvc_name = create_app_pvc(
+                kube_client, namespace, app_alias, labels=labels)
+            resource_registry['pvc'] = True
+            report('pvc', 'done')
+        else:
+            report('pvc', 'skipped')
+
+        report('app_deployment', 'running')
+        create_app_deployment(
+            kube_client, namespace, app_alias,
+            app_data['image'], app_port,
+            replicas=app_data.get('replicas', 1),
+            env_vars=app_data.get('env_vars'),
+            command=app_data.get('command'),
+            image_pull_secret=image_pull_secret,
+            pvc_name=pvc_name,
+            labels=labels)
+        resource_registry['app_deployment'] = True
+        report('app_deployment', 'done')
+
+        report('app_service', 'running')
+        service_name = create_app_service(
+            kube_client, namespace, app_alias, app_port, labels=labels)
+        resource_registry['app_service'] = True
+        report('app_service', 'done')
+
+        report('ingress_entry', 'running')
+        sub_domain, _ = add_app_ingress_rule(
+            kube_client, namespace, project.alias, app_alias, service_name)
+        resource_registry['ingress_entry'] = True
+        report('ingress_entry', 'done')
+
+        report('app_record', 'running')
+        new_app = App(
+            id=app_id,
+            name=app_data['name'],
+            image=app_data['image'],
+            project_id=project.id,
+            alias=app_alias,
+            port=app_port,
+            url=f'https://{sub_domain}',
+            replicas=app_data.get('replicas', 1)
+        )
+
+        if not new_app.save():
+            raise Exception('Internal Server Error')
+        report('app_record', 'done')
+
+        return new_app
+
+    except Exception:
+        resource_clean_up(
+            resource_registry,
+            app_alias,
+            namespace,
+            kube_client
+        )
+        raise
@@ -0,0 +1,160 @@
+import os
+import json
+import datetime
+from flask import request
+from sqlalchemy.exc import SQLAlchemyError
+from app.models import db
+from app.models.app import App
+from app.models.project import Project
+from app.helpers.kube_cache import cluster_cache, item_key
+from app.helpers.response_cache import response_cache
+
+
+# seconds between syncs of the app status columns by celery beat
+APP_STATUS_RECONCILE_INTERVAL = int(os.getenv('APP_STATUS_RECONCILE_INTERVAL', 30))
+
+
+def get_available_condition(deployment, field='status'):
+    """ return a field of a deployment's Available condition """
+    if not deployment:
+        return None
+
+    conditions = (deployment.get('status') or {}).get('conditions') or []
+
+    for condition in conditions:
+        if condition['type'] == 'Available':
+            return condition.get(field)
+
+    return None
+
+
+def get_app_running_status(app_deployment, db_deployment=None):
+    app_deployment_status = get_available_condition(app_deployment)
+    app_db_status = get_available_condition(db_deployment)
+
+    if app_deployment_status and not app_db_status:
+        if app_deployment_status == "True":
+            return "running"
+        return "failed"
+
+    if app_deployment_status and app_db_status:
+        if app_deployment_status == "True" and app_db_status == "True":
+            return "running"
+        return "failed"
+
+    return "unknown"
+
+
+def get_app_status(app_deployment, db_deployment=None):
+    """ the App status columns for an app's deployments """
+    if not app_deployment:
+        return dict(
+            status='unknown',
+            replicas=None,
+            ready_replicas=None,
+            status_changed_at=None)
+
+    transition = get_available_condition(app_deployment, 'lastTransitionTime')
+
+    return dict(
+        status=get_app_running_status(app_deployment, db_deployment),
+        replicas=(app_deployment.get('spec') or {}).get('replicas'),
+        ready_replicas=(app_deployment.get('status') or {}).get('readyReplicas', 0),
+        status_changed_at=datetime.datetime.strptime(
+            transition, '%Y-%m-%dT%H:%M:%SZ') if transition else None)
+
+
+def set_app_status(app, app_deployment, db_deployment=None):
+    """ update an app's status columns, return whether any changed """
+    changed = False
+
+    for column, value in get_app_status(app_deployment, db_deployment).items():
+        if getattr(app, column) != value:
+            setattr(app, column, value)
+            changed = True
+
+    return changed
+
+
+def save_app_statuses(apps):
+    """ commit the status of changed apps and drop responses built on them """
+    tags = set()
+    for app in apps:
+        tags |= app.cache_tags()
+
+    try:
+        db.session.commit()
+    except SQLAlchemyError as e:
+        print(e)
+        db.session.rollback()
+        return False
+
+    response_cache.invalidate(tags)
+    return True
+
+
+def list_namespace_deployments(kube_client, namespace):
+    """ list a namespace's deployments as plain dicts keyed by name """
+    response = kube_client.appsv1_api.list_namespaced_deployment(
+        namespace, _preload_content=False)
+
+    items = json.loads(response.data)['items']
+
+    return {item['metadata']['name']: item for item in items}
+
+
+def refresh_app_statuses(kube_client, namespace, apps):
+    """
+    Read the status of apps in a namespace live, from a single
+    deployment list, and save it for the requests that follow
+    """
+    if not apps:
+        return
+
+    deployments = list_namespace_deployments(kube_client, namespace)
+
+    changed = [
+        app for app in apps
+        if set_app_status(
+            app,
+            deployments.get(f'{app.alias}-deployment'),
+            deployments.get(f'{app.alias}-postgres-db'))
+    ]
+
+    if changed:
+        save_app_statuses(changed)
+
+
+def reconcile_cluster_apps(cluster):
+    """
+    Sync the status columns of every app in a cluster with its
+    deployments, read from the cluster's informer store so a run costs
+    one watch instead of a list per project. Rows are only written when
+    a deployment changed, return how many were.
+    """
+    deployments = {
+        item_key(deployment): deployment
+        for deployment in cluster_cache.list(cluster, 'deployments')
+    }
+
+    rows = Project.active(db.session.query(App, Project.alias).join(
+        Project, App.project_id == Project.id
+    )).filter(Project.cluster_id == cluster.id).all()
+
+    changed = [
+        app for app, namespace in rows
+        if set_app_status(
+            app,
+            deployments.get(f'{namespace}/{app.alias}-deployment'),
+            deployments.get(f'{namespace}/{app.alias}-postgres-db'))
+    ]
+
+    if changed and not save_app_statuses(changed):
+        return 0
+
+    return len(changed)
+
+
+def is_live_read():
+    """ whether a request asked for app statuses read from the cluster """
+    return request.args.get('live', 'false').lower() == 'true'
@@ -1,3 +1,38 @@
+from app.helpers.url import get_app_subdomain
+
+
+def remove_app_ingress_rule(kube_client, namespace, app_alias):
+    """
+    Take the app's subdomain out of the project's ingress, deleting the
+    ingress once it has no rules left
+    """
+    sub_domain = get_app_subdomain(app_alias)
+
+    ingress_list = kube_client.extension_api.list_namespaced_ingress(
+        namespace=namespace).items
+
+    for ingress in ingress_list:
+        rules = [
+            rule for rule in (ingress.spec.rules or [])
+            if rule.host != sub_domain]
+
+        if len(rules) == len(ingress.spec.rules or []):
+            continue
+
+        if not rules:
+            kube_client.extension_api.delete_namespaced_ingress(
+                ingress.metadata.name, namespace)
+            continue
+
+        ingress.spec.rules = rules
+
+        kube_client.extension_api.replace_namespaced_ingress(
+            name=ingress.metadata.name,
+            namespace=namespace,
+            body=ingress
+        )
+
+
 def resource_clean_up(registry, app_alias, namespace, kube_client):
     # get a list of all created services so far
     resources = set([k for k, v in registry.items() if v])
@@ -16,7 +51,7 @@ def resource_clean_up(registry, app_alias, namespace, kube_client):
     if 'db_service' in resources:
         # delete db service
         try:
-            kube_client.appsv1_api.delete_namespaced_service(
+            kube_client.kube.delete_namespaced_service(
                 db_name, namespace
             )
         except Exception:
@@ -31,7 +66,17 @@ def resource_clean_up(registry, app_alias, namespace, kube_client):
         except Exception:
             pass
 
-    if 'app_deloyment' in resources:
+    if 'pvc' in resources:
+        # delete app volume claim
+        name = f'{app_alias}-pvc'
+        try:
+            kube_client.kube.delete_namespaced_persistent_volume_claim(
+                name, namespace
+            )
+        except Exception:
+            pass
+
+    if 'app_deployment' in resources:
         # delete app deployment
         name = f'{app_alias}-deployment'
         try:
@@ -51,4 +96,9 @@ def resource_clean_up(registry, app_alias, namespace, kube_client):
         except Exception:
             pass
 
-    # To do: Add clean up for ingress_entry
\ No newline at end of file
+    if 'ingress_entry' in resources:
+        # remove the app's rule from the project ingress
+        try:
+            remove_app_ingress_rule(kube_client, namespace, app_alias)
+        except Exception:
+            pass
@@ -0,0 +1,176 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+
+# open connections kept per database server
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 5))
+
+# connections older than this are closed instead of being reused
+DB_POOL_MAX_LIFETIME = int(os.getenv('DB_POOL_MAX_LIFETIME', 1800))
+
+# idle connections are checked before reuse once they sit this long
+DB_POOL_HEALTH_CHECK_INTERVAL = int(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', 30))
+
+# how long to wait for a free connection when the pool is full
+DB_POOL_ACQUIRE_TIMEOUT = int(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', 10))
+
+
+class ConnectionPoolTimeout(Exception):
+    """ no connection became free within the acquire timeout """
+
+
+class PooledConnection:
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.checked_at = self.created_at
+
+    def is_expired(self, max_lifetime):
+        return time.monotonic() - self.created_at > max_lifetime
+
+    def needs_check(self, interval):
+        return time.monotonic() - self.checked_at > interval
+
+
+class ConnectionPool:
+    """
+    Bounded, thread safe pool of connections to one database server.
+
+    connect() opens a new connection, is_healthy(connection) tells
+    whether an idle connection can still be used and close(connection)
+    closes one. Connections older than max_lifetime are recycled and
+    connections idle for longer than health_check_interval are checked
+    before they are handed out.
+    """
+
+    def __init__(
+            self, connect, is_healthy, close,
+            max_size=DB_POOL_MAX_SIZE,
+            max_lifetime=DB_POOL_MAX_LIFETIME,
+            health_check_interval=DB_POOL_HEALTH_CHECK_INTERVAL,
+            acquire_timeout=DB_POOL_ACQUIRE_TIMEOUT):
+        self._connect = connect
+        self._is_healthy = is_healthy
+        self._close = close
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+
+        self._idle = []
+        self._size = 0
+        self._condition = threading.Condition()
+
+    def _discard(self, pooled):
+        try:
+            self._close(pooled.connection)
+        except Exception as e:
+            print(e)
+
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _take_idle_or_reserve(self, deadline):
+        """ return an idle connection, or None after reserving a new slot """
+        with self._condition:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ConnectionPoolTimeout(
+                        f'no database connection free after {self.acquire_timeout}s')
+
+                self._condition.wait(remaining)
+
+    def acquire(self):
+        deadline = time.monotonic() + self.acquire_timeout
+
+        while True:
+            pooled = self._take_idle_or_reserve(deadline)
+
+            if pooled is None:
+                try:
+                    return PooledConnection(self._connect())
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+
+            if pooled.is_expired(self.max_lifetime):
+                self._discard(pooled)
+                continue
+
+            if pooled.needs_check(self.health_check_interval):
+                if not self._is_healthy(pooled.connection):
+                    self._discard(pooled)
+                    continue
+                pooled.checked_at = time.monotonic()
+
+            return pooled
+
+    def release(self, pooled, broken=False):
+        if broken or pooled.is_expired(self.max_lifetime):
+            self._discard(pooled)
+            return
+
+        with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """ borrow a connection for the duration of a with block """
+        pooled = self.acquire()
+
+        try:
+            yield pooled.connection
+        except Exception:
+            # the error may have come from the connection, check it on reuse
+            pooled.checked_at = 0
+            self.release(pooled)
+            raise
+        else:
+            self.release(pooled)
+
+    def close_all(self):
+        with self._condition:
+            idle, self._idle = self._idle, []
+
+        for pooled in idle:
+            self._discard(pooled)
+
+
+connection_pools = {}
+connection_pools_lock = threading.Lock()
+
+
+def get_connection_pool(key, connect, is_healthy, close, **options):
+    """ return the pool for a set of connection parameters, creating it once """
+    with connection_pools_lock:
+        pool = connection_pools.get(key)
+
+        if pool is None:
+            pool = ConnectionPool(connect, is_healthy, close, **options)
+            connection_pools[key] = pool
+
+        return pool
+
+
+def close_connection_pool(key):
+    """ close and forget a pool whose server was removed or changed """
+    with connection_pools_lock:
+        pool = connection_pools.pop(key, None)
+
+    if pool is not None:
+        pool.close_all()
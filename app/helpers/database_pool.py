@@ -0,0 +1,112 @@
+import os
+from sqlalchemy.exc import SQLAlchemyError
+from app.models import db
+from app.models.database_pool import DatabasePool
+from app.models.project_database import ProjectDatabase
+from app.helpers.database_service import generate_db_credentials
+from app.helpers.db_flavor import get_database_server, get_server_address
+from app.helpers.db_placement import place_database
+from app.helpers.response_cache import response_cache
+
+
+# unassigned databases kept ready for each flavour
+DATABASE_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', 5))
+
+# seconds between top ups of the pool by celery beat
+DATABASE_POOL_REPLENISH_INTERVAL = int(os.getenv('DATABASE_POOL_REPLENISH_INTERVAL', 60))
+
+
+def claim_pooled_database(flavour_name, project_id=None, password=None):
+    """
+    Give a pre-created database of a flavour to a project in a single
+    local transaction. The pool row is locked with SKIP LOCKED so
+    concurrent claims take different databases. If a password is given
+    the database user is re-passworded on the database's server before
+    the claim is committed.
+    Returns the new ProjectDatabase, or None when the pool is empty.
+    """
+    try:
+        pooled = DatabasePool.query.filter_by(
+            database_flavour_name=flavour_name
+        ).order_by(
+            DatabasePool.date_created
+        ).with_for_update(skip_locked=True).first()
+
+        if not pooled:
+            db.session.rollback()
+            return None
+
+        if password and password != pooled.password:
+            server = get_database_server(
+                pooled.database_flavour_name, pooled.host, pooled.port)
+            if not server['class'].set_user_password(
+                    user=pooled.user, password=password):
+                db.session.rollback()
+                return None
+        else:
+            password = pooled.password
+
+        database = ProjectDatabase(
+            name=pooled.name,
+            user=pooled.user,
+            password=password,
+            host=pooled.host,
+            port=pooled.port,
+            project_id=project_id,
+            database_flavour_name=pooled.database_flavour_name
+        )
+
+        db.session.add(database)
+        db.session.delete(pooled)
+        db.session.commit()
+        response_cache.invalidate(database.cache_tags())
+
+        return database
+    except SQLAlchemyError as e:
+        print(e)
+        db.session.rollback()
+        return None
+
+
+def replenish_database_pool(flavour_name, size=DATABASE_POOL_SIZE):
+    """
+    create databases until a flavour's pool holds size of them, each on
+    the least loaded of the flavour's servers
+    """
+    missing = size - DatabasePool.count(database_flavour_name=flavour_name)
+    created = 0
+
+    for _ in range(max(missing, 0)):
+        server = place_database(flavour_name)
+
+        if not server:
+            break
+
+        credentials = generate_db_credentials()
+
+        if not server['class'].create_database(
+                db_name=credentials.name,
+                user=credentials.user,
+                password=credentials.password):
+            break
+
+        host, port = get_server_address(server)
+
+        pooled = DatabasePool(
+            database_flavour_name=flavour_name,
+            host=host,
+            port=port,
+            name=credentials.name,
+            user=credentials.user,
+            password=credentials.password
+        )
+
+        if not pooled.save():
+            # do not leave an untracked database behind
+            server['class'].delete_database(credentials.name)
+            server['class'].delete_user(credentials.user)
+            break
+
+        created += 1
+
+    return created
@@ -3,9 +3,48 @@ import mysql.connector as mysql_conn
 import psycopg2
 from psycopg2 import sql
 import os
+import io
+import csv
+import queue
+import hashlib
 import secrets
 import string
+import threading
+from contextlib import contextmanager
 from types import SimpleNamespace
+from werkzeug.wsgi import ClosingIterator
+from app.helpers.connection_pool import (
+    get_connection_pool, close_connection_pool, ConnectionPoolTimeout)
+
+
+# seconds before giving up on connecting to an unreachable server
+DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', 5))
+
+# pristine database new and reset postgres databases are cloned from
+DB_TEMPLATE_NAME = os.getenv('DB_TEMPLATE_NAME', 'cranecloud_template')
+
+# bytes of table data passed on at a time by exports and imports
+DB_TRANSFER_CHUNK_SIZE = int(os.getenv('DB_TRANSFER_CHUNK_SIZE', 64 * 1024))
+
+# rows fetched or inserted per round trip when moving mysql table data
+DB_TRANSFER_BATCH_SIZE = int(os.getenv('DB_TRANSFER_BATCH_SIZE', 1000))
+
+# chunks an export may run ahead of the client reading it
+DB_TRANSFER_BUFFER = int(os.getenv('DB_TRANSFER_BUFFER', 16))
+
+# seconds an ended export waits for its cancelled copy to finish
+DB_TRANSFER_CANCEL_TIMEOUT = int(os.getenv('DB_TRANSFER_CANCEL_TIMEOUT', 10))
+
+# marks NULL in exported and imported CSV, as postgres text COPY does, so
+# empty strings survive the round trip
+CSV_NULL = '\\N'
+
+# binary values are written as hex with this prefix, as postgres does
+CSV_BINARY_PREFIX = '\\x'
+
+MYSQL_BINARY_TYPES = "('binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob', 'longblob')"
+
+MYSQL_SYSTEM_SCHEMAS = "('mysql', 'information_schema', 'performance_schema', 'sys')"
 
 
 def generate_db_credentials():
@@ -24,12 +63,72 @@ def generate_db_credentials():
 
 class DatabaseService:
 
-    def __init__(self):
+    # flavour name and prefix of the env settings of the default server
+    flavour_name = None
+    env_prefix = None
+
+    def __init__(self, host=None, port=None, user=None, password=None):
         self.Error = None
+        self.settings = dict(host=host, port=port, user=user, password=password)
+
+    def get_settings(self):
+        """ Admin connection settings, those of the env server unless given """
+        return {
+            key: value or os.getenv(
+                f'{self.env_prefix}_{key.upper()}', '' if key == 'port' else None)
+            for key, value in self.settings.items()
+        }
+
+    @property
+    def server_key(self):
+        settings = self.get_settings()
+        return f"{self.flavour_name}:{settings['host']}:{settings['port']}"
+
+    def get_pool_key(self):
+        settings = self.get_settings()
+        # a changed admin password gets a new pool
+        password_digest = hashlib.sha256(
+            str(settings['password']).encode('utf-8')).hexdigest()
+        return (self.flavour_name, settings['host'], str(settings['port']),
+                settings['user'], password_digest)
+
+    def connect(self):
+        """ Open a new superuser connection, raising on failure """
+        pass
+
+    def is_healthy(self, connection):
+        """ Check that an idle superuser connection still works """
+        pass
+
+    def get_pool(self):
+        """ Return the pool of superuser connections to the server """
+        return get_connection_pool(
+            self.get_pool_key(),
+            self.connect,
+            self.is_healthy,
+            lambda connection: connection.close()
+        )
+
+    @contextmanager
+    def connection(self):
+        """ Borrow a pooled superuser connection """
+        try:
+            with self.get_pool().connection() as connection:
+                yield connection
+        except ConnectionPoolTimeout as e:
+            raise self.Error(str(e))
+
+    def close_pool(self):
+        """ Close the pooled connections to the server """
+        close_connection_pool(self.get_pool_key())
 
     def create_connection(self):
         """ Create a connection to db server """
-        pass
+        try:
+            return self.connect()
+        except self.Error as e:
+            print(e)
+            return False
 
     def create_db_connection(self, user=None, password=None, db_name=None):
         """ Create a connection to a single database """
@@ -37,6 +136,12 @@ class DatabaseService:
 
     def check_user_db_rights(self, user=None, password=None, db_name=None):
         """Verify user rights to db"""
+        user_connection = self.create_db_connection(
+            user=user, password=password, db_name=db_name)
+        if not user_connection:
+            return False
+        user_connection.close()
+        return True
 
     # Create or check user exists database
     def create_database(self, db_name=None, user=None, password=None):
@@ -45,7 +150,12 @@ class DatabaseService:
 
     def check_db_connection(self):
         """Validates if one is able to connect to Database server returns True or False"""
-        pass
+        try:
+            with self.connection():
+                return True
+        except self.Error as e:
+            print(e)
+            return False
 
     # create database user
     def create_user(self, user=None, password=None):
@@ -57,6 +167,10 @@ class DatabaseService:
         """ Delete and existing database user """
         pass
 
+    def set_user_password(self, user=None, password=None):
+        """ Change a database user's password """
+        pass
+
     # delete database
     def delete_database(self, db_name):
         """Deletes database"""
@@ -76,257 +190,546 @@ class DatabaseService:
         """Return list of users"""
         pass
 
+    def get_database_statuses(self, databases=None):
+        """Check whether each (name, user) database exists and its user can connect to it"""
+        pass
+
+    def get_server_load(self):
+        """Return the number of databases, their total size in bytes and the open connections"""
+        pass
+
+    def get_database_stats(self):
+        """Return the size in bytes, open connections and table count of each database"""
+        pass
+
+    def get_tables(self, db_name=None, user=None, password=None):
+        """Return the names of a database's tables, as its user sees them"""
+        pass
+
+    def export_table(self, db_name=None, user=None, password=None, table=None):
+        """
+        Return an iterator of CSV chunks of a table with a header row, or
+        False. Closing it stops the export even before the first chunk.
+        """
+        pass
+
+    def import_table(self, db_name=None, user=None, password=None, table=None, stream=None):
+        """
+        Insert the rows of a CSV file object with a header row, returns
+        the row count. CSV_NULL fields are NULL, empty ones empty strings.
+        """
+        pass
+
 
 class MysqlDbService(DatabaseService):
-    def __init__(self):
-        super(DatabaseService, self).__init__()
+
+    flavour_name = 'mysql'
+    env_prefix = 'ADMIN_MYSQL'
+
+    def __init__(self, **settings):
+        super().__init__(**settings)
         self.Error = mysql_conn.Error
 
-    def create_connection(self):
+    def connect(self):
+        # autocommit so pooled connections never hold a stale snapshot
+        settings = self.get_settings()
+        return mysql_conn.connect(
+            host=settings['host'],
+            user=settings['user'],
+            password=settings['password'],
+            port=settings['port'],
+            connection_timeout=DB_CONNECT_TIMEOUT,
+            autocommit=True
+        )
+
+    def is_healthy(self, connection):
         try:
-            super_connection = mysql_conn.connect(
-                host=os.getenv('ADMIN_MYSQL_HOST'),
-                user=os.getenv('ADMIN_MYSQL_USER'),
-                password=os.getenv('ADMIN_MYSQL_PASSWORD'),
-                port=os.getenv('ADMIN_MYSQL_PORT', '')
-            )
-            return super_connection
-        except self.Error as e:
-            print(e)
+            connection.ping(reconnect=False)
+            return True
+        except self.Error:
             return False
 
+    @staticmethod
+    def _text(value):
+        # the connector returns some catalog columns as bytes
+        return value.decode() if isinstance(value, (bytes, bytearray)) else value
+
     def create_db_connection(self, user=None, password=None, db_name=None):
         try:
+            settings = self.get_settings()
             user_connection = mysql_conn.connect(
-                host=os.getenv('ADMIN_MYSQL_HOST'),
+                host=settings['host'],
                 user=user,
                 password=password,
-                port=os.getenv('ADMIN_MYSQL_PORT', ''),
-                database=db_name
+                port=settings['port'],
+                database=db_name,
+                connection_timeout=DB_CONNECT_TIMEOUT
             )
             return user_connection
         except self.Error as e:
             print(e)
             return False
 
-    def check_db_connection(self):
+    def _create_user(self, cursor, user, password):
         try:
-            super_connection = self.create_connection()
-            if not super_connection:
-                return False
+            cursor.execute(
+                f"CREATE USER '{user}' IDENTIFIED BY '{password}' ")
             return True
         except self.Error as e:
+            # user already exists
+            if e.errno == 1396:
+                return True
+            print(e)
             return False
-        finally:
-            if not super_connection:
-                return False
-            if (super_connection.is_connected()):
-                super_connection.close()
 
-    def check_user_db_rights(self, user=None, password=None, db_name=None):
-        try:
-            user_connection = self.create_db_connection(
-                user=user, password=password, db_name=db_name)
-            if not user_connection:
-                return False
-            return True
-        except self.Error as e:
-            print(e)
+    def _create_database(self, cursor, db_name, user, password):
+        cursor.execute(f"CREATE DATABASE {db_name}")
+        if not self._create_user(cursor, user, password):
             return False
-        finally:
-            if not user_connection:
-                return False
-            if (user_connection.is_connected()):
-                user_connection.close()
+        cursor.execute(
+            f"GRANT ALL PRIVILEGES ON {db_name}.* To '{user}'")
+        return True
 
     # Create or check user exists database
     def create_database(self, db_name=None, user=None, password=None):
         try:
-            connection = self.create_connection()
-            if not connection:
-                return False
-            cursor = connection.cursor()
-            cursor.execute(f"CREATE DATABASE {db_name}")
-            if self.create_user(user=user, password=password):
-                cursor.execute(
-                    f"GRANT ALL PRIVILEGES ON {db_name}.* To '{user}'")
-            return True
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    return self._create_database(cursor, db_name, user, password)
+                finally:
+                    cursor.close()
         except self.Error as e:
             print(e)
             return False
-        finally:
-            if not connection:
-                return False
-            if (connection.is_connected()):
-                cursor.close()
-                connection.close()
 
     # create database user
     def create_user(self, user=None, password=None):
         try:
-            connection = self.create_connection()
-            if not connection:
-                return False
-            cursor = connection.cursor()
-            cursor.execute(
-                f"CREATE USER '{user}' IDENTIFIED BY '{password}' ")
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    return self._create_user(cursor, user, password)
+                finally:
+                    cursor.close()
+        except self.Error as e:
+            print(e)
+            return False
+
+    def set_user_password(self, user=None, password=None):
+        try:
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    # bound, the password may come from the request
+                    cursor.execute(
+                        "ALTER USER %s@'%%' IDENTIFIED BY %s", (user, password))
+                finally:
+                    cursor.close()
             return True
         except self.Error as e:
-            if e.errno == '1396':
-                return True
+            print(e)
             return False
-        finally:
-            if not connection:
-                return False
-            if (connection.is_connected()):
-                cursor.close()
-                connection.close()
 
     # delete database user
     def delete_user(self, user=None):
         try:
-            connection = self.create_connection()
-            if not connection:
-                return False
-            cursor = connection.cursor()
-            cursor.execute(f"DROP USER '{user}' ")
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    # already dropped by an earlier teardown attempt
+                    cursor.execute(f"DROP USER IF EXISTS '{user}' ")
+                finally:
+                    cursor.close()
             return True
         except self.Error:
             return False
-        finally:
-            if not connection:
-                return False
-            if (connection.is_connected()):
-                cursor.close()
-                connection.close()
 
     # delete database
     def delete_database(self, db_name):
         try:
-            connection = self.create_connection()
-            if not connection:
-                return False
-            cursor = connection.cursor()
-            cursor.execute(f"DROP DATABASE {db_name}")
-            # todo: Need to delete users too
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(f"DROP DATABASE IF EXISTS {db_name}")
+                    # todo: Need to delete users too
+                finally:
+                    cursor.close()
             return True
         except self.Error:
             return False
-        finally:
-            if not connection:
-                return False
-            if (connection.is_connected()):
-                cursor.close()
-                connection.close()
 
     def reset_database(self, db_name=None, user=None, password=None):
+        """
+        Empty a database by dropping its tables and views, keeping the
+        database itself and its grants. Sessions using the database are
+        killed first so they do not hold metadata locks on the tables.
+        """
+        if not self.check_user_db_rights(
+                db_name=db_name, user=user, password=password):
+            return False
+
         try:
-            connection = self.create_connection()
-            user_rights = self.check_user_db_rights(
-                db_name=db_name, user=user, password=password)
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(
+                        "SELECT 1 FROM information_schema.schema_privileges "
+                        "WHERE table_schema = %s AND grantee LIKE %s LIMIT 1",
+                        (db_name, f"'{user}'@%"))
+                    if not cursor.fetchall():
+                        return False
 
-            if not connection or not user_rights:
-                return False
-            cursor = connection.cursor()
-            cursor.execute(f"DROP DATABASE {db_name}")
-            created_db = self.create_database(
-                db_name=db_name, user=user, password=password)
-            if not created_db:
-                return False
-            return True
-        except self.Error:
+                    cursor.execute(
+                        "SELECT id FROM information_schema.processlist "
+                        "WHERE db = %s AND id <> CONNECTION_ID()", (db_name,))
+                    for (process_id,) in cursor.fetchall():
+                        try:
+                            cursor.execute(f"KILL {int(process_id)}")
+                        except self.Error:
+                            # the session ended on its own
+                            pass
+
+                    cursor.execute(
+                        "SELECT table_name, table_type FROM information_schema.tables "
+                        "WHERE table_schema = %s", (db_name,))
+                    tables = cursor.fetchall()
+
+                    views = [f"`{db_name}`.`{self._text(name)}`"
+                             for name, table_type in tables if self._text(table_type) == 'VIEW']
+                    base_tables = [f"`{db_name}`.`{self._text(name)}`"
+                                   for name, table_type in tables if self._text(table_type) != 'VIEW']
+
+                    if views:
+                        cursor.execute(f"DROP VIEW IF EXISTS {', '.join(views)}")
+
+                    if base_tables:
+                        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+                        try:
+                            cursor.execute(
+                                f"DROP TABLE IF EXISTS {', '.join(base_tables)}")
+                        finally:
+                            cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+                    return True
+                finally:
+                    cursor.close()
+        except self.Error as e:
+            print(e)
             return False
-        finally:
-            if not connection or not user_rights:
-                return False
-            if (connection.is_connected()):
-                cursor.close()
-                connection.close()
 
     # Show all databases
     def get_all_databases(self):
         try:
-            connection = self.create_connection()
-            if not connection:
-                return False
-            cursor = connection.cursor()
-            cursor.execute("SHOW DATABASES")
-            database_list = []
-            for db in cursor:
-                database_list.append(db[0].decode())
-            return database_list
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute("SHOW DATABASES")
+                    return [db[0].decode() for db in cursor]
+                finally:
+                    cursor.close()
         except self.Error:
             return False
-        finally:
-            if not connection:
-                return False
-            if (connection.is_connected()):
-                cursor.close()
-                connection.close()
 
     # Show users
     def get_all_users(self):
         try:
-            connection = self.create_connection()
-            if not connection:
-                return False
-            cursor = connection.cursor()
-            cursor.execute("SELECT user FROM mysql.user GROUP BY user")
-            users_list = []
-            for db in cursor:
-                users_list.append(db[0].decode())
-            return users_list
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute("SELECT user FROM mysql.user GROUP BY user")
+                    return [db[0].decode() for db in cursor]
+                finally:
+                    cursor.close()
         except self.Error:
             return False
-        finally:
-            if not connection:
-                return False
-            if (connection.is_connected()):
-                cursor.close()
-                connection.close()
 
+    def get_database_statuses(self, databases=None):
+        databases = list(databases or [])
+        if not databases:
+            return {}
 
-class PostgresqlDbService(DatabaseService):
+        names = sorted({name for name, _ in databases})
+        users = sorted({user for _, user in databases})
+        text = self._text
 
-    def __init__(self):
-        super(DatabaseService, self).__init__()
-        self.Error = psycopg2.Error
+        def placeholders(values):
+            return ', '.join(['%s'] * len(values))
 
-    def create_connection(self):
+        # catalog lookups for every database at once, on one connection
         try:
-            super_connection = psycopg2.connect(
-                host=os.getenv('ADMIN_PSQL_HOST'),
-                user=os.getenv('ADMIN_PSQL_USER'),
-                password=os.getenv('ADMIN_PSQL_PASSWORD'),
-                port=os.getenv('ADMIN_PSQL_PORT', '')
-            )
-            super_connection.autocommit = True
-            return super_connection
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(
+                        "SELECT schema_name FROM information_schema.schemata "
+                        f"WHERE schema_name IN ({placeholders(names)})", names)
+                    existing_names = {text(row[0]) for row in cursor}
+
+                    cursor.execute(
+                        "SELECT user FROM mysql.user "
+                        f"WHERE user IN ({placeholders(users)})", users)
+                    existing_users = {text(row[0]) for row in cursor}
+
+                    cursor.execute(
+                        "SELECT grantee, table_schema FROM information_schema.schema_privileges "
+                        f"WHERE table_schema IN ({placeholders(names)})", names)
+                    # grantees look like 'user'@'host'
+                    grants = {
+                        (text(row[1]), text(row[0]).split('@')[0].strip("'"))
+                        for row in cursor
+                    }
+                finally:
+                    cursor.close()
         except self.Error as e:
             print(e)
             return False
 
-    def check_db_connection(self):
+        return {
+            (name, user): (
+                name in existing_names and user in existing_users
+                and (name, user) in grants)
+            for name, user in databases
+        }
+
+    def get_server_load(self):
         try:
-            super_connection = self.create_connection()
-            if not super_connection:
-                return False
-            return True
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(
+                        "SELECT COUNT(*) FROM information_schema.schemata "
+                        f"WHERE schema_name NOT IN {MYSQL_SYSTEM_SCHEMAS}")
+                    databases = cursor.fetchone()[0]
+
+                    cursor.execute(
+                        "SELECT COALESCE(SUM(data_length + index_length), 0) "
+                        "FROM information_schema.tables "
+                        f"WHERE table_schema NOT IN {MYSQL_SYSTEM_SCHEMAS}")
+                    size = cursor.fetchone()[0]
+
+                    cursor.execute(
+                        "SELECT COUNT(*) FROM information_schema.processlist")
+                    connections = cursor.fetchone()[0]
+                finally:
+                    cursor.close()
+        except self.Error as e:
+            print(e)
+            return False
+
+        return dict(
+            databases=int(databases), size=int(size), connections=int(connections))
+
+    def get_database_stats(self):
+        # one aggregation over the catalog for every database on the server
+        try:
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(
+                        "SELECT s.schema_name, "
+                        "COALESCE(SUM(t.data_length + t.index_length), 0), "
+                        "(SELECT COUNT(*) FROM information_schema.processlist p "
+                        "WHERE p.db = s.schema_name), "
+                        "COUNT(t.table_name) "
+                        "FROM information_schema.schemata s "
+                        "LEFT JOIN information_schema.tables t "
+                        "ON t.table_schema = s.schema_name AND t.table_type = 'BASE TABLE' "
+                        f"WHERE s.schema_name NOT IN {MYSQL_SYSTEM_SCHEMAS} "
+                        "GROUP BY s.schema_name")
+                    rows = cursor.fetchall()
+                finally:
+                    cursor.close()
+        except self.Error as e:
+            print(e)
+            return False
+
+        return {
+            self._text(name): dict(
+                size=int(size), connections=int(connections), tables=int(tables))
+            for name, size, connections, tables in rows
+        }
+
+    @staticmethod
+    def _quote(identifier):
+        return '`' + identifier.replace('`', '``') + '`'
+
+    def _binary_columns(self, connection, table):
+        """ names of a table's columns holding bytes, exported as hex """
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                "SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s "
+                f"AND DATA_TYPE IN {MYSQL_BINARY_TYPES}", (table,))
+            return {self._text(row[0]) for row in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+    def get_tables(self, db_name=None, user=None, password=None):
+        connection = self.create_db_connection(
+            user=user, password=password, db_name=db_name)
+        if not connection:
+            return False
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SHOW TABLES")
+            return [self._text(row[0]) for row in cursor]
+        except self.Error as e:
+            print(e)
+            return False
+        finally:
+            connection.close()
+
+    def export_table(self, db_name=None, user=None, password=None, table=None):
+        connection = self.create_db_connection(
+            user=user, password=password, db_name=db_name)
+        if not connection:
+            return False
+
+        try:
+            binary_columns = self._binary_columns(connection, table)
+            # unbuffered, rows are read off the socket as they are fetched
+            cursor = connection.cursor()
+            cursor.execute(f"SELECT * FROM {self._quote(table)}")
         except self.Error as e:
+            print(e)
+            connection.close()
+            return False
+
+        binary = [column in binary_columns for column in cursor.column_names]
+
+        def csv_value(value, is_binary):
+            if value is None:
+                return CSV_NULL
+            if isinstance(value, (bytes, bytearray)):
+                if is_binary:
+                    return CSV_BINARY_PREFIX + value.hex()
+                return value.decode('utf-8')
+            return value
+
+        def chunks():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            try:
+                writer.writerow(cursor.column_names)
+                while True:
+                    rows = cursor.fetchmany(DB_TRANSFER_BATCH_SIZE)
+                    if not rows:
+                        break
+                    writer.writerows(
+                        [csv_value(value, is_binary)
+                         for value, is_binary in zip(row, binary)]
+                        for row in rows)
+                    if buffer.tell() >= DB_TRANSFER_CHUNK_SIZE:
+                        yield buffer.getvalue().encode('utf-8')
+                        buffer.seek(0)
+                        buffer.truncate()
+                yield buffer.getvalue().encode('utf-8')
+            except self.Error as e:
+                # raised so the response is aborted instead of ending short
+                print(e)
+                raise
+            finally:
+                connection.close()
+
+        return ClosingIterator(chunks(), connection.close)
+
+    def import_table(self, db_name=None, user=None, password=None, table=None, stream=None):
+        connection = self.create_db_connection(
+            user=user, password=password, db_name=db_name)
+        if not connection:
+            return False
+
+        imported = 0
+        try:
+            reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8', newline=''))
+            columns = next(reader, None)
+            if not columns:
+                return 0
+
+            statement = "INSERT INTO {} ({}) VALUES ({})".format(
+                self._quote(table),
+                ', '.join(self._quote(column) for column in columns),
+                ', '.join(['%s'] * len(columns))
+            )
+
+            binary_columns = self._binary_columns(connection, table)
+            binary = [column in binary_columns for column in columns]
+
+            def row_value(value, is_binary):
+                if value == CSV_NULL:
+                    return None
+                if is_binary and value.startswith(CSV_BINARY_PREFIX):
+                    return bytes.fromhex(value[len(CSV_BINARY_PREFIX):])
+                return value
+
+            cursor = connection.cursor()
+            batch = []
+            for row in reader:
+                batch.append([
+                    row_value(value, is_binary)
+                    for value, is_binary in zip(row, binary)])
+                if len(batch) >= DB_TRANSFER_BATCH_SIZE:
+                    cursor.executemany(statement, batch)
+                    imported += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(statement, batch)
+                imported += len(batch)
+
+            # all rows or none
+            connection.commit()
+            return imported
+        except (self.Error, csv.Error, ValueError, OSError) as e:
+            print(e)
+            connection.rollback()
             return False
         finally:
-            if not super_connection:
-                return False
-            super_connection.close()
+            connection.close()
+
+
+class PostgresqlDbService(DatabaseService):
+
+    flavour_name = 'postgres'
+    env_prefix = 'ADMIN_PSQL'
+
+    def __init__(self, **settings):
+        super().__init__(**settings)
+        self.Error = psycopg2.Error
+
+    def connect(self):
+        settings = self.get_settings()
+        super_connection = psycopg2.connect(
+            host=settings['host'],
+            user=settings['user'],
+            password=settings['password'],
+            port=settings['port'],
+            connect_timeout=DB_CONNECT_TIMEOUT
+        )
+        super_connection.autocommit = True
+        return super_connection
+
+    def is_healthy(self, connection):
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except self.Error:
+            return False
 
     def create_db_connection(self, user=None, password=None, db_name=None):
         try:
+            settings = self.get_settings()
             user_connection = psycopg2.connect(
-                host=os.getenv('ADMIN_PSQL_HOST'),
+                host=settings['host'],
                 user=user,
                 password=password,
-                port=os.getenv('ADMIN_PSQL_PORT', ''),
-                database=db_name
+                port=settings['port'],
+                database=db_name,
+                connect_timeout=DB_CONNECT_TIMEOUT
             )
             return user_connection
         except self.Error as e:
@@ -335,162 +738,413 @@ class PostgresqlDbService(DatabaseService):
 
     def check_user_db_rights(self, user=None, password=None, db_name=None):
         # todo: Restrict users from accessing databases they dont own
+        return super().check_user_db_rights(
+            user=user, password=password, db_name=db_name)
+
+    def _create_user(self, cursor, user, password):
         try:
-            user_connection = self.create_db_connection(
-                user=user, password=password, db_name=db_name)
-            if not user_connection:
-                return False
+            cursor.execute(
+                f"CREATE USER {user} WITH ENCRYPTED PASSWORD '{password}'")
             return True
         except self.Error as e:
+            # user already exists
+            if e.pgcode == '42710':
+                return True
             print(e)
             return False
-        finally:
-            if not user_connection:
-                return False
-            user_connection.close()
+
+    def _ensure_template(self, cursor):
+        """
+        Create the pristine template databases are cloned from, once.
+        Connections to it are not allowed so cloning never finds it busy.
+        """
+        cursor.execute(
+            "SELECT 1 FROM pg_database WHERE datname = %s", (DB_TEMPLATE_NAME,))
+        if cursor.fetchone():
+            return
+
+        try:
+            cursor.execute(
+                f'CREATE DATABASE {DB_TEMPLATE_NAME} WITH TEMPLATE = template0')
+        except self.Error as e:
+            # created by another worker in the meantime
+            if e.pgcode != '42P04':
+                raise
+            return
+
+        cursor.execute(
+            f'ALTER DATABASE {DB_TEMPLATE_NAME} WITH IS_TEMPLATE true ALLOW_CONNECTIONS false')
+
+    def _create_database(self, cursor, db_name, user, password):
+        if not self._create_user(cursor, user, password):
+            return False
+        self._ensure_template(cursor)
+        cursor.execute(
+            sql.SQL(f'CREATE DATABASE {db_name} WITH OWNER = {user} TEMPLATE = {DB_TEMPLATE_NAME}'))
+        return True
 
     # Create or check user exists database
     def create_database(self, db_name=None, user=None, password=None):
         try:
-            connection = self.create_connection()
-            if not connection:
-                return False
-            cursor = connection.cursor()
-            if self.create_user(user=user, password=password):
-                cursor.execute(
-                    sql.SQL(f'CREATE DATABASE {db_name} WITH OWNER = {user}'))
-            return True
-        except self.Error:
+            with self.connection() as connection:
+                with connection.cursor() as cursor:
+                    return self._create_database(cursor, db_name, user, password)
+        except self.Error as e:
+            print(e)
             return False
-        finally:
-            if not connection:
-                return False
-            cursor.close()
-            connection.close()
 
     # create database user
     def create_user(self, user=None, password=None):
         try:
-            connection = self.create_connection()
-            if not connection:
-                return False
-            cursor = connection.cursor()
-            cursor.execute(
-                f"CREATE USER {user} WITH ENCRYPTED PASSWORD '{password}'")
-            connection.commit()
+            with self.connection() as connection:
+                with connection.cursor() as cursor:
+                    return self._create_user(cursor, user, password)
+        except self.Error as e:
+            print(e)
+            return False
+
+    def set_user_password(self, user=None, password=None):
+        try:
+            with self.connection() as connection:
+                with connection.cursor() as cursor:
+                    # quoted by psycopg2, the password may come from the request
+                    cursor.execute(
+                        sql.SQL("ALTER USER {} WITH ENCRYPTED PASSWORD {}").format(
+                            sql.Identifier(user), sql.Literal(password)))
             return True
         except self.Error as e:
             print(e)
-            if e.pgcode == '42710':
-                return True
-            print('gssd')
             return False
-        finally:
-            if not connection:
-                return False
-            cursor.close()
-            connection.close()
 
     # delete database user
     def delete_user(self, user=None):
         try:
-            connection = self.create_connection()
-            if not connection:
-                return False
-            cursor = connection.cursor()
-            cursor.execute(f"DROP USER {user} ")
-            connection.commit()
+            with self.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DROP USER {user} ")
             return True
         except self.Error as e:
             if e.pgcode == '42704':
                 return True
             return False
-        finally:
-            if not connection:
-                return False
-            cursor.close()
-            connection.close()
 
     # delete database
     def delete_database(self, db_name):
         try:
-            connection = self.create_connection()
-            if not connection:
-                return False
-            cursor = connection.cursor()
-            cursor.execute(f"DROP DATABASE {db_name}")
-            # todo: Need to delete users too
+            with self.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DROP DATABASE IF EXISTS {db_name}")
+                    # todo: Need to delete users too
             return True
         except self.Error as e:
             print(e)
             return False
-        finally:
-            if not connection:
-                return False
-            cursor.close()
-            connection.close()
 
     def reset_database(self, db_name=None, user=None, password=None):
+        """
+        Replace a database with a fresh clone of the template. The clone
+        is made under a temporary name and swapped in with renames, the
+        old database is only dropped once the new one is in place. New
+        connections are refused and existing ones terminated before the
+        swap, so connected clients do not make the rename fail.
+        """
+        if not self.check_user_db_rights(
+                db_name=db_name, user=user, password=password):
+            return False
+
+        clone_name = f'{db_name}_reset'
+        old_name = f'{db_name}_old'
+
         try:
-            connection = self.create_connection()
-            user_rights = self.check_user_db_rights(
-                db_name=db_name, user=user, password=password)
+            with self.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT 1 FROM pg_database d JOIN pg_roles r ON r.oid = d.datdba "
+                        "WHERE d.datname = %s AND r.rolname = %s", (db_name, user))
+                    if not cursor.fetchone():
+                        return False
 
-            if not connection or not user_rights:
-                return False
-            cursor = connection.cursor()
-            cursor.execute(f"DROP DATABASE {db_name}")
-            created_db = self.create_database(
-                db_name=db_name, user=user, password=password)
-            if not created_db:
-                return False
-            return True
-        except self.Error:
+                    self._ensure_template(cursor)
+
+                    # left over by an interrupted reset
+                    cursor.execute(f'DROP DATABASE IF EXISTS {clone_name}')
+                    cursor.execute(f'DROP DATABASE IF EXISTS {old_name}')
+
+                    cursor.execute(
+                        sql.SQL(f'CREATE DATABASE {clone_name} WITH OWNER = {user} TEMPLATE = {DB_TEMPLATE_NAME}'))
+
+                    cursor.execute(
+                        f'ALTER DATABASE {db_name} WITH ALLOW_CONNECTIONS false')
+                    try:
+                        cursor.execute(
+                            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                            "WHERE datname = %s AND pid <> pg_backend_pid()", (db_name,))
+                        cursor.execute(
+                            f'ALTER DATABASE {db_name} RENAME TO {old_name}')
+                    except self.Error:
+                        cursor.execute(
+                            f'ALTER DATABASE {db_name} WITH ALLOW_CONNECTIONS true')
+                        cursor.execute(f'DROP DATABASE IF EXISTS {clone_name}')
+                        raise
+
+                    try:
+                        cursor.execute(
+                            f'ALTER DATABASE {clone_name} RENAME TO {db_name}')
+                    except self.Error:
+                        cursor.execute(
+                            f'ALTER DATABASE {old_name} RENAME TO {db_name}')
+                        cursor.execute(
+                            f'ALTER DATABASE {db_name} WITH ALLOW_CONNECTIONS true')
+                        raise
+
+                    cursor.execute(f'DROP DATABASE {old_name}')
+                    return True
+        except self.Error as e:
+            print(e)
             return False
-        finally:
-            if not connection or not user_rights:
-                return False
-            cursor.close()
-            connection.close()
 
     # Show all databases
     def get_all_databases(self):
         try:
-            connection = self.create_connection()
-            if not connection:
-                return False
-            cursor = connection.cursor()
-            cursor.execute("SELECT datname FROM pg_database")
-            database_list = []
-            for db in cursor:
-                database_list.append(db[0])
-            return database_list
+            with self.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT datname FROM pg_database")
+                    return [db[0] for db in cursor]
         except self.Error:
             return False
-        finally:
-            if not connection:
-                return False
-            cursor.close()
-            connection.close()
 
     # Show users
     def get_all_users(self):
         try:
-            connection = self.create_connection()
-            if not connection:
-                return False
-            cursor = connection.cursor()
-            cursor.execute(
-                "SELECT usename FROM pg_catalog.pg_user")
-            users_list = []
-            for db in cursor:
-                users_list.append(db[0])
-            return users_list
+            with self.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT usename FROM pg_catalog.pg_user")
+                    return [db[0] for db in cursor]
         except self.Error:
             return False
-        finally:
+
+    def get_database_statuses(self, databases=None):
+        databases = list(databases or [])
+        if not databases:
+            return {}
+
+        statuses = {database: False for database in databases}
+
+        # one catalog query for every database, pairs that do not exist
+        # or whose user cannot log in are left out by the joins
+        try:
+            with self.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        SELECT t.name, t.username,
+                            d.datallowconn AND has_database_privilege(r.oid, d.oid, 'CONNECT')
+                        FROM unnest(%s::text[], %s::text[]) AS t(name, username)
+                        JOIN pg_database d ON d.datname = t.name
+                        JOIN pg_roles r ON r.rolname = t.username AND r.rolcanlogin
+                        """,
+                        ([name for name, _ in databases], [user for _, user in databases])
+                    )
+                    for name, user, can_connect in cursor:
+                        statuses[(name, user)] = bool(can_connect)
+        except self.Error as e:
+            print(e)
+            return False
+
+        return statuses
+
+    def get_server_load(self):
+        try:
+            with self.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        SELECT count(*), COALESCE(sum(pg_database_size(oid)), 0),
+                            (SELECT count(*) FROM pg_stat_activity)
+                        FROM pg_database
+                        WHERE NOT datistemplate AND datname <> 'postgres'
+                        """
+                    )
+                    databases, size, connections = cursor.fetchone()
+        except self.Error as e:
+            print(e)
+            return False
+
+        return dict(
+            databases=int(databases), size=int(size), connections=int(connections))
+
+    def get_database_stats(self):
+        try:
+            with self.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        SELECT d.datname, pg_database_size(d.oid), count(a.pid)
+                        FROM pg_database d
+                        LEFT JOIN pg_stat_activity a ON a.datid = d.oid
+                        WHERE NOT d.datistemplate AND d.datname <> 'postgres'
+                        GROUP BY d.oid, d.datname
+                        """
+                    )
+                    stats = {
+                        name: dict(size=int(size), connections=int(connections), tables=None)
+                        for name, size, connections in cursor
+                    }
+        except self.Error as e:
+            print(e)
+            return False
+
+        # tables are only listed in each database's own catalog
+        settings = self.get_settings()
+        for name, database_stats in stats.items():
+            connection = self.create_db_connection(
+                user=settings['user'], password=settings['password'], db_name=name)
             if not connection:
-                return False
-            cursor.close()
+                continue
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT count(*) FROM pg_catalog.pg_tables "
+                        "WHERE schemaname NOT IN ('pg_catalog', 'information_schema')")
+                    database_stats['tables'] = cursor.fetchone()[0]
+            except self.Error as e:
+                print(e)
+            finally:
+                connection.close()
+
+        return stats
+
+    def get_tables(self, db_name=None, user=None, password=None):
+        connection = self.create_db_connection(
+            user=user, password=password, db_name=db_name)
+        if not connection:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT tablename FROM pg_catalog.pg_tables WHERE schemaname = 'public'")
+                return [row[0] for row in cursor]
+        except self.Error as e:
+            print(e)
+            return False
+        finally:
             connection.close()
 
+    def export_table(self, db_name=None, user=None, password=None, table=None):
+        connection = self.create_db_connection(
+            user=user, password=password, db_name=db_name)
+        if not connection:
+            return False
+
+        # copy_expert writes into a file, run it in a thread that hands
+        # chunks to the response through a bounded queue, followed by None
+        # when the copy is done or by the error that stopped it. The
+        # thread owns the connection and closes it.
+        chunks = queue.Queue(maxsize=DB_TRANSFER_BUFFER)
+        stop = threading.Event()
+
+        def put(chunk):
+            while not stop.is_set():
+                try:
+                    chunks.put(chunk, timeout=1)
+                    return
+                except queue.Full:
+                    continue
+            # the client went away, abort the copy
+            raise IOError('export cancelled')
+
+        class ChunkWriter:
+            def __init__(self):
+                self.buffer = []
+                self.size = 0
+
+            def write(self, data):
+                self.buffer.append(data)
+                self.size += len(data)
+                if self.size >= DB_TRANSFER_CHUNK_SIZE:
+                    self.flush()
+
+            def flush(self):
+                chunk = b''.join(
+                    part.encode('utf-8') if isinstance(part, str) else part
+                    for part in self.buffer)
+                self.buffer, self.size = [], 0
+                put(chunk)
+
+        def copy():
+            writer = ChunkWriter()
+            end = None
+            try:
+                with connection.cursor() as cursor:
+                    cursor.copy_expert(
+                        sql.SQL("COPY {} TO STDOUT WITH (FORMAT csv, HEADER, NULL {})").format(
+                            sql.Identifier(table), sql.Literal(CSV_NULL)),
+                        writer,
+                        size=DB_TRANSFER_CHUNK_SIZE
+                    )
+                writer.flush()
+            except (self.Error, IOError) as e:
+                print(e)
+                end = e
+            finally:
+                try:
+                    put(end)
+                except IOError:
+                    pass
+                connection.close()
+
+        thread = threading.Thread(target=copy, daemon=True)
+        thread.start()
+
+        def stop_copy():
+            stop.set()
+            if thread.is_alive():
+                # the client went away mid copy, stop it on the server
+                try:
+                    connection.cancel()
+                except self.Error as e:
+                    print(e)
+                thread.join(DB_TRANSFER_CANCEL_TIMEOUT)
+
+        def stream():
+            try:
+                while True:
+                    chunk = chunks.get()
+                    if chunk is None:
+                        break
+                    if isinstance(chunk, Exception):
+                        # raised so the response is aborted instead of ending short
+                        raise chunk
+                    yield chunk
+            finally:
+                stop_copy()
+
+        # closing a generator that never started skips its finally, the
+        # copy is also stopped when the response is closed before any chunk
+        return ClosingIterator(stream(), stop_copy)
+
+    def import_table(self, db_name=None, user=None, password=None, table=None, stream=None):
+        connection = self.create_db_connection(
+            user=user, password=password, db_name=db_name)
+        if not connection:
+            return False
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    sql.SQL("COPY {} FROM STDIN WITH (FORMAT csv, HEADER, NULL {})").format(
+                        sql.Identifier(table), sql.Literal(CSV_NULL)),
+                    stream,
+                    size=DB_TRANSFER_CHUNK_SIZE
+                )
+                imported = cursor.rowcount
+            # all rows or none
+            connection.commit()
+            return imported
+        except (self.Error, OSError) as e:
+            print(e)
+            connection.rollback()
+            return False
+        finally:
+            connection.close()
@@ -1,4 +1,7 @@
-
+import os
+from app.models.database_server import DatabaseServer
+from app.helpers.database_service import MysqlDbService, PostgresqlDbService
+from app.helpers.db_health import DatabaseHealthProber
 
 db_flavors = {
     'postgres': {
@@ -17,3 +20,97 @@ db_flavors = {
         'port': 3306
     }
 }
+
+# Used to return a database service
+
+database_flavours = [
+    {
+        'name': 'mysql',
+        'host': os.getenv('ADMIN_MYSQL_HOST'),
+        'port': os.getenv('ADMIN_MYSQL_PORT'),
+        'class': MysqlDbService()
+    },
+    {
+        'name': 'postgres',
+        'host': os.getenv('ADMIN_PSQL_HOST'),
+        'port': os.getenv('ADMIN_PSQL_PORT'),
+        'class': PostgresqlDbService()
+    }
+]
+
+
+database_health = DatabaseHealthProber(database_flavours)
+
+
+def get_db_flavour(flavour_name=None):
+    if flavour_name == 'mysql':
+        return database_flavours[0]
+    elif flavour_name == 'postgres':
+        return database_flavours[1]
+    else:
+        return False
+
+
+database_services = {
+    'mysql': MysqlDbService,
+    'postgres': PostgresqlDbService
+}
+
+
+def get_server(database_server):
+    """ Return the flavour entry of a registered DatabaseServer """
+    service_class = database_services[database_server.database_flavour_name]
+
+    return {
+        'id': str(database_server.id),
+        'name': database_server.database_flavour_name,
+        'host': database_server.host,
+        'port': database_server.port,
+        'class': service_class(
+            host=database_server.host,
+            port=database_server.port,
+            user=database_server.admin_user,
+            password=database_server.admin_password
+        )
+    }
+
+
+def get_server_address(server):
+    """ Return the host and port a server's databases are reached on """
+    settings = server['class'].get_settings()
+    port = settings['port']
+
+    return settings['host'], int(port) if port else None
+
+
+def get_flavour_servers(flavour_name):
+    """
+    Return every server databases of a flavour can be placed on, the
+    admin server from the env first followed by the registered ones.
+    """
+    db_flavour = get_db_flavour(flavour_name)
+
+    if not db_flavour:
+        return []
+
+    servers = []
+    if db_flavour['class'].get_settings()['host']:
+        servers.append(db_flavour)
+
+    registered = DatabaseServer.find_all(database_flavour_name=flavour_name) or []
+    servers.extend(get_server(database_server) for database_server in registered)
+
+    return servers
+
+
+def get_database_server(flavour_name, host=None, port=None):
+    """
+    Return the server holding a database from its stored host and port.
+    Databases created before servers could be registered fall back to
+    the flavour's env server.
+    """
+    for server in get_flavour_servers(flavour_name):
+        if get_server_address(server) == (host, int(port) if port else None):
+            return server
+
+    return get_db_flavour(flavour_name)
@@ -0,0 +1,117 @@
+import os
+import time
+import datetime
+import threading
+
+
+# seconds between probes of each database server
+DB_HEALTH_INTERVAL = int(os.getenv('DB_HEALTH_INTERVAL', 15))
+
+# a status older than this is probed again before it is trusted
+DB_HEALTH_MAX_AGE = int(os.getenv('DB_HEALTH_MAX_AGE', 3 * DB_HEALTH_INTERVAL))
+
+
+class DatabaseHealthProber:
+    """
+    Probe each database server in a background thread and keep its
+    reachability and round trip latency, so request handlers can check
+    a cached status instead of opening a connection first. Servers are
+    dicts with the flavour name, host, port and database service.
+    """
+
+    def __init__(self, servers=(), interval=DB_HEALTH_INTERVAL, max_age=DB_HEALTH_MAX_AGE):
+        self.servers = {}
+        self.interval = interval
+        self.max_age = max_age
+        self.statuses = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+        for server in servers:
+            self.add_server(server)
+
+    @staticmethod
+    def server_key(server):
+        return server['class'].server_key
+
+    def add_server(self, server):
+        """ probe a server from now on, replacing one with the same key """
+        key = self.server_key(server)
+        with self._lock:
+            self.servers[key] = server
+        return key
+
+    def remove_server(self, server):
+        key = self.server_key(server)
+        with self._lock:
+            self.servers.pop(key, None)
+            self.statuses.pop(key, None)
+
+    def probe(self, server):
+        """ time a round trip to a server on a pooled connection """
+        database_service = server['class']
+        started = time.monotonic()
+        error = None
+
+        try:
+            with database_service.connection() as connection:
+                reachable = database_service.is_healthy(connection)
+        except Exception as e:
+            reachable = False
+            error = str(e)
+
+        latency = time.monotonic() - started
+
+        status = dict(
+            id=server.get('id'),
+            name=server['name'],
+            host=server['host'],
+            port=server['port'],
+            reachable=reachable,
+            latency_ms=round(latency * 1000, 2) if reachable else None,
+            error=error,
+            checked_at=datetime.datetime.utcnow().isoformat(),
+            _checked=time.monotonic()
+        )
+
+        with self._lock:
+            self.statuses[self.server_key(server)] = status
+
+        return status
+
+    def _run(self):
+        while True:
+            with self._lock:
+                servers = list(self.servers.values())
+            for server in servers:
+                self.probe(server)
+            time.sleep(self.interval)
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            # started on first use so each worker process gets its own
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def get_status(self, server):
+        self.start()
+        key = self.add_server(server)
+
+        with self._lock:
+            status = self.statuses.get(key)
+
+        if not status or time.monotonic() - status['_checked'] > self.max_age:
+            status = self.probe(server)
+
+        return {key: value for key, value in status.items() if key != '_checked'}
+
+    def is_reachable(self, server):
+        return self.get_status(server)['reachable']
+
+    def get_all_statuses(self, servers=None):
+        if servers is None:
+            with self._lock:
+                servers = list(self.servers.values())
+        return [self.get_status(server) for server in servers]
@@ -0,0 +1,70 @@
+import os
+import threading
+from cachetools import TTLCache
+from app.helpers.db_flavor import database_health, get_flavour_servers
+
+
+# seconds a server's load is reused when placing databases
+DB_PLACEMENT_LOAD_TTL = int(os.getenv('DB_PLACEMENT_LOAD_TTL', 30))
+
+# load metrics compared across servers, each weighs the same
+PLACEMENT_METRICS = ('databases', 'size', 'connections')
+
+server_load_cache = TTLCache(maxsize=256, ttl=DB_PLACEMENT_LOAD_TTL)
+server_load_lock = threading.Lock()
+
+
+def get_server_load(server):
+    """ Return a server's cached load, or None if it could not be read """
+    key = server['class'].server_key
+
+    with server_load_lock:
+        load = server_load_cache.get(key)
+
+    if load is None:
+        load = server['class'].get_server_load()
+        if not load:
+            return None
+        with server_load_lock:
+            server_load_cache[key] = load
+
+    return load
+
+
+def place_database(flavour_name):
+    """
+    Pick the least loaded reachable server of a flavour for a new
+    database. Each metric is divided by its largest value among the
+    servers so counts and byte sizes weigh the same, and the server with
+    the lowest sum wins. Returns None when no server is reachable.
+    """
+    candidates = []
+
+    for server in get_flavour_servers(flavour_name):
+        if not database_health.is_reachable(server):
+            continue
+
+        load = get_server_load(server)
+        if load is not None:
+            candidates.append((server, load))
+
+    if not candidates:
+        return None
+
+    maxima = {
+        metric: max(load[metric] for _, load in candidates) or 1
+        for metric in PLACEMENT_METRICS
+    }
+
+    server, load = min(
+        candidates,
+        key=lambda candidate: sum(
+            candidate[1][metric] / maxima[metric] for metric in PLACEMENT_METRICS)
+    )
+
+    # count the database now so a burst of creations within the ttl
+    # spreads over the servers, updated in place to keep the expiry
+    with server_load_lock:
+        load['databases'] += 1
+
+    return server
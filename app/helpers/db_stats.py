@@ -0,0 +1,124 @@
+import os
+import time
+import datetime
+import threading
+from app.helpers.db_flavor import database_health, get_database_server
+
+
+# seconds between background refreshes of each server's statistics
+DB_STATS_INTERVAL = int(os.getenv('DB_STATS_INTERVAL', 300))
+
+# statistics older than this are gathered again before they are served
+DB_STATS_MAX_AGE = int(os.getenv('DB_STATS_MAX_AGE', 2 * DB_STATS_INTERVAL))
+
+
+class DatabaseStatsCollector:
+    """
+    Keep the size, connection count and table count of every database on
+    each server, gathered in bulk by a background thread. Servers are
+    registered the first time their statistics are asked for.
+    """
+
+    def __init__(self, interval=DB_STATS_INTERVAL, max_age=DB_STATS_MAX_AGE):
+        self.servers = {}
+        self.interval = interval
+        self.max_age = max_age
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def collect(self, server):
+        """ gather the statistics of all databases on a server at once """
+        key = server['class'].server_key
+        stats = None
+
+        if database_health.is_reachable(server):
+            stats = server['class'].get_database_stats() or None
+
+        with self._lock:
+            previous = self.stats.get(key)
+
+            # keep serving the last figures while a server cannot be read
+            if stats is None and previous and previous['stats'] is not None:
+                entry = dict(previous, _collected=time.monotonic())
+            else:
+                entry = dict(
+                    stats=stats,
+                    collected_at=datetime.datetime.utcnow().isoformat(),
+                    _collected=time.monotonic()
+                )
+
+            self.stats[key] = entry
+
+        return entry
+
+    def _run(self):
+        while True:
+            with self._lock:
+                servers = list(self.servers.values())
+            for server in servers:
+                self.collect(server)
+            time.sleep(self.interval)
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            # started on first use so each worker process gets its own
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def get_server_stats(self, server):
+        self.start()
+        key = server['class'].server_key
+
+        with self._lock:
+            self.servers[key] = server
+            entry = self.stats.get(key)
+
+        if not entry or time.monotonic() - entry['_collected'] > self.max_age:
+            entry = self.collect(server)
+
+        return entry
+
+
+database_stats = DatabaseStatsCollector()
+
+
+def get_databases_stats(databases):
+    """
+    Return the statistics of each ProjectDatabase, read from the cached
+    figures of the server it is on, and their totals
+    """
+    servers = {}
+    databases_stats = []
+
+    for database in databases:
+        location = (database.database_flavour_name, database.host, database.port)
+
+        if location not in servers:
+            server = get_database_server(*location)
+            servers[location] = database_stats.get_server_stats(server) \
+                if server else dict(stats=None, collected_at=None)
+
+        entry = servers[location]
+        stats = (entry['stats'] or {}).get(database.name) or dict(
+            size=None, connections=None, tables=None)
+
+        databases_stats.append(dict(
+            id=str(database.id),
+            name=database.name,
+            project_id=str(database.project_id) if database.project_id else None,
+            database_flavour_name=database.database_flavour_name,
+            host=database.host,
+            port=database.port,
+            collected_at=entry['collected_at'],
+            **stats
+        ))
+
+    totals = {
+        metric: sum(stats[metric] or 0 for stats in databases_stats)
+        for metric in ('size', 'connections', 'tables')
+    }
+
+    return databases_stats, totals
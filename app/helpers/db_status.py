@@ -0,0 +1,54 @@
+import os
+import threading
+from cachetools import TTLCache
+
+
+# seconds a database's status is reused before the server is asked again
+DB_STATUS_TTL = int(os.getenv('DB_STATUS_TTL', 30))
+
+DB_STATUS_CACHE_SIZE = int(os.getenv('DB_STATUS_CACHE_SIZE', 10000))
+
+db_status_cache = TTLCache(maxsize=DB_STATUS_CACHE_SIZE, ttl=DB_STATUS_TTL)
+db_status_lock = threading.Lock()
+
+
+def get_database_statuses(database_service, databases):
+    """
+    Return whether each (name, user) database on a server is
+    usable. Cached statuses are reused, the rest are checked together
+    in one batch of catalog queries on a pooled superuser connection.
+    """
+    statuses = {}
+    missing = []
+
+    with db_status_lock:
+        for database in databases:
+            status = db_status_cache.get((database_service.server_key, *database))
+            if status is None:
+                missing.append(database)
+            else:
+                statuses[database] = status
+
+    if not missing:
+        return statuses
+
+    checked = database_service.get_database_statuses(missing)
+
+    # server unreachable, report the databases down without caching it
+    if checked is False:
+        statuses.update({database: False for database in missing})
+        return statuses
+
+    with db_status_lock:
+        for database, status in checked.items():
+            db_status_cache[(database_service.server_key, *database)] = status
+
+    statuses.update(checked)
+
+    return statuses
+
+
+def forget_database_status(database_service, name, user):
+    """ drop a cached status after the database is created, reset or deleted """
+    with db_status_lock:
+        db_status_cache.pop((database_service.server_key, name, user), None)
@@ -0,0 +1,192 @@
+import os
+import json
+import datetime
+from kubernetes import client
+from app.models import db
+from app.models.app import App
+from app.models.project import Project
+from app.helpers.kube import get_kube_clients
+from app.helpers.owner_labels import APP_LABEL, PROJECT_LABEL
+
+
+# seconds between drift checks of every cluster by celery beat
+DRIFT_RECONCILE_INTERVAL = int(os.getenv('DRIFT_RECONCILE_INTERVAL', 3600))
+
+# objects and rows younger than this may belong to a deployment or
+# teardown still in progress and are left out of the comparison
+DRIFT_GRACE_PERIOD = int(os.getenv('DRIFT_GRACE_PERIOD', 600))
+
+# scheduled runs only report drift unless this is set to false
+DRIFT_DRY_RUN = os.getenv('DRIFT_DRY_RUN', 'true').lower() == 'true'
+
+# api, list and delete function of each kind of object created for an
+# app, and the suffix of its name when every app is expected to have one
+APP_OBJECT_KINDS = {
+    'deployments': (
+        'appsv1_api', 'list_deployment_for_all_namespaces',
+        'delete_namespaced_deployment', '-deployment'),
+    'services': (
+        'kube', 'list_service_for_all_namespaces',
+        'delete_namespaced_service', '-service'),
+    'secrets': (
+        'kube', 'list_secret_for_all_namespaces',
+        'delete_namespaced_secret', None),
+    'pvcs': (
+        'kube', 'list_persistent_volume_claim_for_all_namespaces',
+        'delete_namespaced_persistent_volume_claim', None),
+}
+
+
+def list_objects(kube_client, api_name, function_name, **kwargs):
+    """ list objects as plain dicts, in a single request """
+    list_function = getattr(getattr(kube_client, api_name), function_name)
+    response = list_function(_preload_content=False, **kwargs)
+
+    return json.loads(response.data)['items']
+
+
+def is_settled(item, settled_before):
+    created = item['metadata'].get('creationTimestamp')
+
+    if not created:
+        return True
+
+    return datetime.datetime.strptime(
+        created, '%Y-%m-%dT%H:%M:%SZ') < settled_before
+
+
+def object_ref(item):
+    metadata = item['metadata']
+    return dict(namespace=metadata.get('namespace'), name=metadata['name'])
+
+
+def find_drift(cluster):
+    """
+    Compare the labelled objects of a cluster with the project and app
+    rows placed on it. Orphans are labelled objects whose owner row is
+    gone or deleted, missing are namespaces, deployments and services
+    that rows expect by name but the cluster does not have. Each kind
+    is listed once for the whole cluster.
+    """
+    kube_client = get_kube_clients(cluster)
+    settled_before = datetime.datetime.utcnow() - datetime.timedelta(
+        seconds=DRIFT_GRACE_PERIOD)
+
+    projects = db.session.query(
+        Project.id, Project.alias, Project.status, Project.date_created
+    ).filter(Project.cluster_id == cluster.id).all()
+
+    # a deleting project's namespace is being removed by its own task
+    owning_projects = {
+        str(project.id) for project in projects if project.status != 'deleted'}
+    expected_namespaces = {
+        project.alias for project in projects
+        if project.status == 'ready' and project.date_created < settled_before}
+
+    apps = Project.active(db.session.query(
+        App.id, App.alias, App.date_created,
+        Project.alias.label('namespace'), Project.status
+    ).join(
+        Project, App.project_id == Project.id
+    )).filter(Project.cluster_id == cluster.id).all()
+
+    owning_apps = {str(app.id) for app in apps}
+    settled_apps = [
+        app for app in apps
+        if app.status == 'ready' and app.date_created < settled_before]
+
+    namespaces = list_objects(kube_client, 'kube', 'list_namespace')
+    namespace_names = {item['metadata']['name'] for item in namespaces}
+
+    # already on their way out, with everything in them
+    terminating_namespaces = {
+        item['metadata']['name'] for item in namespaces
+        if (item.get('status') or {}).get('phase') == 'Terminating'}
+
+    orphan_namespaces = {
+        item['metadata']['name'] for item in namespaces
+        if item['metadata']['name'] not in terminating_namespaces
+        and PROJECT_LABEL in (item['metadata'].get('labels') or {})
+        and item['metadata']['labels'][PROJECT_LABEL] not in owning_projects
+        and is_settled(item, settled_before)
+    }
+
+    orphans = dict(namespaces=[
+        dict(namespace=None, name=name) for name in sorted(orphan_namespaces)])
+    missing = dict(namespaces=[
+        dict(namespace=None, name=name)
+        for name in sorted(expected_namespaces - namespace_names)])
+
+    for kind, (api_name, list_name, _, suffix) in APP_OBJECT_KINDS.items():
+        # kinds every app has are listed whole, to also find those
+        # created before objects were labelled
+        selector = {} if suffix else dict(label_selector=APP_LABEL)
+        items = list_objects(kube_client, api_name, list_name, **selector)
+
+        orphans[kind] = sorted((
+            object_ref(item) for item in items
+            if APP_LABEL in (item['metadata'].get('labels') or {})
+            and item['metadata']['labels'][APP_LABEL] not in owning_apps
+            # objects of an orphan namespace go along with it
+            and item['metadata']['namespace'] not in orphan_namespaces
+            and item['metadata']['namespace'] not in terminating_namespaces
+            and is_settled(item, settled_before)
+        ), key=lambda ref: (ref['namespace'], ref['name']))
+
+        if suffix:
+            present = {
+                (item['metadata']['namespace'], item['metadata']['name'])
+                for item in items}
+            expected = {
+                (app.namespace, f'{app.alias}{suffix}') for app in settled_apps}
+
+            missing[kind] = [
+                dict(namespace=namespace, name=name)
+                for namespace, name in sorted(expected - present)]
+
+    return dict(
+        cluster_id=str(cluster.id),
+        checked_at=datetime.datetime.utcnow().isoformat(),
+        orphans=orphans,
+        missing=missing,
+        summary=dict(
+            orphans={kind: len(refs) for kind, refs in orphans.items()},
+            missing={kind: len(refs) for kind, refs in missing.items()}))
+
+
+def delete_orphans(kube_client, orphans):
+    """ delete orphaned objects, return the ones that could not be """
+    failed = []
+
+    for kind, refs in orphans.items():
+        for ref in refs:
+            try:
+                if kind == 'namespaces':
+                    kube_client.kube.delete_namespace(ref['name'])
+                else:
+                    api_name, _, delete_name, _ = APP_OBJECT_KINDS[kind]
+                    delete_function = getattr(
+                        getattr(kube_client, api_name), delete_name)
+                    delete_function(ref['name'], ref['namespace'])
+            except client.rest.ApiException as e:
+                # already gone, or already being deleted
+                if e.status not in (404, 409):
+                    failed.append(dict(kind=kind, error=e.reason, **ref))
+
+    return failed
+
+
+def reconcile_cluster_drift(cluster, dry_run=True):
+    """
+    Find a cluster's drift and, unless dry_run, garbage collect the
+    orphans. Missing objects are only reported, recreating them needs
+    more than the rows hold.
+    """
+    report = find_drift(cluster)
+    report['dry_run'] = dry_run
+
+    if not dry_run:
+        report['failed'] = delete_orphans(
+            get_kube_clients(cluster), report['orphans'])
+
+    return report
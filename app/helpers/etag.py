@@ -0,0 +1,94 @@
+import json
+import hashlib
+from functools import wraps
+from flask import Response, g, request
+from flask_jwt_extended import get_jwt_identity, get_jwt_claims
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.http import quote_etag
+from app.models import db
+
+
+def make_etag(version):
+    """
+    Strong etag of a response, from the versions of what it is built
+    from, the route and arguments and the caller it was built for
+    """
+    key = json.dumps([
+        request.path,
+        sorted(request.args.items(multi=True)),
+        get_jwt_identity(),
+        get_jwt_claims(),
+        version,
+    ], sort_keys=True, default=str)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def row_version(model, id, query=None):
+    """
+    updated_at of a row, None when it does not exist or is not matched
+    by query, a query of the model's rows such as Project.active()
+    """
+    if query is None:
+        query = db.session.query(model)
+
+    try:
+        return query.filter(model.id == id).with_entities(
+            model.updated_at).scalar()
+    except SQLAlchemyError:
+        db.session.rollback()
+        return None
+
+
+def rows_version(query, model):
+    """
+    Count and newest updated_at of the rows a query matches, any insert,
+    update or delete among them changes one of the two. Computed over
+    the whole query it also versions every page of it. None when there
+    are no rows, an empty list is as cheap to build as to version.
+    """
+    try:
+        count, updated_at = query.order_by(None).with_entities(
+            db.func.count(model.id), db.func.max(model.updated_at)).one()
+    except SQLAlchemyError:
+        db.session.rollback()
+        return None
+
+    return (count, updated_at) if count else None
+
+
+def conditional(get_version):
+    """
+    Answer a GET with 304 Not Modified when If-None-Match holds the
+    current etag, before the response is built. get_version is called
+    with the view arguments and returns a cheap version of the response,
+    or None when there is none and the response is built as usual.
+    get_version must return None for a resource the view would not find,
+    a deleted project among them, so that the view's own existence check
+    answers before any etag is computed. Goes below jwt_required so the
+    caller is known.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(resource, *args, **kwargs):
+            version = get_version(*args, **kwargs)
+
+            if version is None:
+                return method(resource, *args, **kwargs)
+
+            etag = make_etag(version)
+            # responses cached below are kept apart for each version
+            g.etag = etag
+
+            if request.if_none_match.contains(etag):
+                return Response(status=304, headers={'ETag': quote_etag(etag)})
+
+            response = method(resource, *args, **kwargs)
+            data, code = response[:2] if isinstance(response, tuple) \
+                else (response, 200)
+
+            if code != 200:
+                return response
+
+            return data, code, {'ETag': quote_etag(etag)}
+        return wrapper
+    return decorator
@@ -1,8 +1,19 @@
 import os
+import time
+import hashlib
+import threading
 from types import SimpleNamespace
 from kubernetes import client
 
 
+# seconds a cluster's clients may sit unused before they are evicted
+KUBE_CLIENT_IDLE_TIMEOUT = int(os.getenv('KUBE_CLIENT_IDLE_TIMEOUT', 600))
+
+# max number of kept-alive connections per cluster API server
+KUBE_CONNECTION_POOL_MAXSIZE = int(
+    os.getenv('KUBE_CONNECTION_POOL_MAXSIZE', 20))
+
+
 def create_kube_clients(kube_host=os.getenv('KUBE_HOST'), kube_token=os.getenv('KUBE_TOKEN')):
     # configure client
     config = client.Configuration()
@@ -10,15 +21,17 @@ def create_kube_clients(kube_host=os.getenv('KUBE_HOST'), kube_token=os.getenv('
     config.api_key['authorization'] = kube_token
     config.api_key_prefix['authorization'] = 'Bearer'
     config.verify_ssl = False
+    config.connection_pool_maxsize = KUBE_CONNECTION_POOL_MAXSIZE
     # config.assert_hostname = False
 
-    # create API instance
-    api_client = client.ApiClient()
-    kube = client.CoreV1Api(client.ApiClient(config))
-    extension_api = client.ExtensionsV1beta1Api(client.ApiClient(config))
-    appsv1_api = client.AppsV1Api(client.ApiClient(config))
-    batchv1_api = client.BatchV1Api(client.ApiClient(config))
-    storageV1Api = client.StorageV1Api(client.ApiClient(config))
+    # create API instances sharing one ApiClient, so that they share
+    # a single urllib3 connection pool and thread pool
+    api_client = client.ApiClient(config)
+    kube = client.CoreV1Api(api_client)
+    extension_api = client.ExtensionsV1beta1Api(api_client)
+    appsv1_api = client.AppsV1Api(api_client)
+    batchv1_api = client.BatchV1Api(api_client)
+    storageV1Api = client.StorageV1Api(api_client)
 
     # return kube, extension_api, appsv1_api, api_client, batchv1_api, storageV1Api
     return SimpleNamespace(
@@ -29,3 +42,86 @@ def create_kube_clients(kube_host=os.getenv('KUBE_HOST'), kube_token=os.getenv('
         batchv1_api=batchv1_api,
         storageV1Api=storageV1Api
     )
+
+
+def check_kube_connection(kube_host, kube_token):
+    """ raise if a cluster's API server cannot be reached with a token """
+    kube_client = create_kube_clients(kube_host, kube_token)
+    kube_client.kube.list_namespace(limit=1, _preload_content=False)
+
+
+def token_fingerprint(kube_host, kube_token):
+    return hashlib.sha256(
+        f'{kube_host}:{kube_token}'.encode('utf-8')).hexdigest()
+
+
+class KubeClientPool:
+    """
+    Process wide registry of kubernetes clients keyed by cluster id.
+
+    Entries are tagged with a fingerprint of the cluster host and token,
+    so a changed cluster gets fresh clients, and entries that have not
+    been used for KUBE_CLIENT_IDLE_TIMEOUT seconds are evicted.
+
+    Evicted clients are not closed, a request or informer thread may
+    still be in a call on them. They are only dropped from the registry
+    and their pools are released when the last user lets go of them.
+    """
+
+    def __init__(self, idle_timeout=KUBE_CLIENT_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, cluster):
+        cluster_id = str(cluster.id)
+        fingerprint = token_fingerprint(cluster.host, cluster.token)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(cluster_id)
+
+            if entry and entry.fingerprint != fingerprint:
+                del self._entries[cluster_id]
+                entry = None
+
+            if not entry:
+                entry = SimpleNamespace(
+                    fingerprint=fingerprint,
+                    clients=create_kube_clients(cluster.host, cluster.token),
+                    last_used=now
+                )
+                self._entries[cluster_id] = entry
+
+            entry.last_used = now
+            self._drop_idle(now, keep=cluster_id)
+
+            return entry.clients
+
+    def invalidate(self, cluster_id):
+        with self._lock:
+            self._entries.pop(str(cluster_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _drop_idle(self, now, keep=None):
+        idle_ids = [
+            cluster_id for cluster_id, entry in self._entries.items()
+            if cluster_id != keep and now - entry.last_used > self.idle_timeout
+        ]
+        for cluster_id in idle_ids:
+            del self._entries[cluster_id]
+
+
+kube_client_pool = KubeClientPool()
+
+
+def get_kube_clients(cluster):
+    """ return pooled clients for a cluster model instance """
+    return kube_client_pool.get(cluster)
+
+
+def invalidate_kube_clients(cluster_id):
+    kube_client_pool.invalidate(cluster_id)
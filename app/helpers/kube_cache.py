@@ -0,0 +1,292 @@
+import os
+import json
+import time
+import threading
+from kubernetes import client, watch
+from app.helpers.kube import get_kube_clients
+
+
+# how long a store may go without confirming it is in sync before reads
+# fall back to the API server
+KUBE_CACHE_MAX_STALENESS = int(os.getenv('KUBE_CACHE_MAX_STALENESS', 60))
+
+# how long a request waits for a cold store to finish its initial list
+KUBE_CACHE_SYNC_TIMEOUT = int(os.getenv('KUBE_CACHE_SYNC_TIMEOUT', 30))
+
+# informers that have not been read from for this long are stopped
+KUBE_INFORMER_IDLE_TIMEOUT = int(os.getenv('KUBE_INFORMER_IDLE_TIMEOUT', 900))
+
+# server side timeout of a single watch request, the watch is re-opened
+# from the last seen resourceVersion when it expires
+KUBE_WATCH_TIMEOUT = int(os.getenv('KUBE_WATCH_TIMEOUT', 240))
+
+# api attribute on the kube client and list function for each kind
+RESOURCE_KINDS = {
+    'namespaces': ('kube', 'list_namespace'),
+    'nodes': ('kube', 'list_node'),
+    'pods': ('kube', 'list_pod_for_all_namespaces'),
+    'services': ('kube', 'list_service_for_all_namespaces'),
+    'pvcs': ('kube', 'list_persistent_volume_claim_for_all_namespaces'),
+    'pvs': ('kube', 'list_persistent_volume'),
+    'deployments': ('appsv1_api', 'list_deployment_for_all_namespaces'),
+    'jobs': ('batchv1_api', 'list_job_for_all_namespaces'),
+    'storage_classes': ('storageV1Api', 'list_storage_class'),
+}
+
+
+class ResourceExpired(Exception):
+    """ the watched resourceVersion is too old and a relist is needed """
+
+
+def get_list_function(kube_client, kind):
+    api_name, function_name = RESOURCE_KINDS[kind]
+    return getattr(getattr(kube_client, api_name), function_name)
+
+
+def item_key(item, namespace=None, name=None):
+    if item is not None:
+        metadata = item['metadata']
+        namespace = metadata.get('namespace')
+        name = metadata['name']
+
+    return f'{namespace}/{name}' if namespace else name
+
+
+def live_list(kube_client, kind):
+    """ list a kind straight from the API server as plain dicts """
+    list_function = get_list_function(kube_client, kind)
+
+    # skip model deserialization, the raw json is what gets returned
+    response = list_function(_preload_content=False)
+    data = json.loads(response.data)
+
+    # list items come without their kind, watch events carry it, set it
+    # so items look the same whichever way they were read
+    item_kind = data.get('kind', '')
+    if item_kind.endswith('List'):
+        item_kind = item_kind[:-len('List')]
+
+    for item in data['items']:
+        item.setdefault('kind', item_kind)
+        item.setdefault('apiVersion', data.get('apiVersion'))
+
+    return data['items'], data['metadata'].get('resourceVersion')
+
+
+class Informer:
+    """
+    Keeps an in-memory copy of one kind of cluster resource up to date
+    using a list followed by a resourceVersion based watch.
+    """
+
+    def __init__(self, kube_client, kind):
+        self.kube_client = kube_client
+        self.kind = kind
+        self.items = {}
+        self.resource_version = None
+        self.synced_at = None
+        self.watching = False
+        self.last_read = time.monotonic()
+        self.error = None
+
+        self._lock = threading.Lock()
+        self._listed = threading.Event()
+        self._stopped = threading.Event()
+        self._watch = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._watch:
+            self._watch.stop()
+
+    @property
+    def stopped(self):
+        return self._stopped.is_set()
+
+    def is_fresh(self):
+        if self.synced_at is None:
+            return False
+        if self.watching:
+            return True
+        return time.monotonic() - self.synced_at <= KUBE_CACHE_MAX_STALENESS
+
+    def wait_synced(self, timeout):
+        self._listed.wait(timeout)
+        return self.is_fresh()
+
+    def list(self):
+        self.last_read = time.monotonic()
+        with self._lock:
+            return [self.items[key] for key in sorted(self.items)]
+
+    def get(self, name, namespace=None):
+        self.last_read = time.monotonic()
+        with self._lock:
+            return self.items.get(item_key(None, namespace, name))
+
+    def count(self):
+        self.last_read = time.monotonic()
+        return len(self.items)
+
+    def _relist(self):
+        items, resource_version = live_list(self.kube_client, self.kind)
+
+        with self._lock:
+            self.items = {item_key(item): item for item in items}
+            self.resource_version = resource_version
+            self.synced_at = time.monotonic()
+
+        self._listed.set()
+
+    def _watch_changes(self):
+        self._watch = watch.Watch()
+        list_function = get_list_function(self.kube_client, self.kind)
+
+        stream = self._watch.stream(
+            list_function,
+            resource_version=self.resource_version,
+            timeout_seconds=KUBE_WATCH_TIMEOUT,
+            _request_timeout=KUBE_WATCH_TIMEOUT + 30
+        )
+
+        self.watching = True
+        try:
+            for event in stream:
+                if self.stopped:
+                    break
+
+                event_type = event['type']
+                item = event['raw_object']
+
+                if event_type == 'ERROR':
+                    if item.get('code') == 410:
+                        raise ResourceExpired(item.get('message'))
+                    raise client.rest.ApiException(
+                        status=item.get('code'), reason=item.get('message'))
+
+                with self._lock:
+                    if event_type == 'DELETED':
+                        self.items.pop(item_key(item), None)
+                    else:
+                        self.items[item_key(item)] = item
+
+                    self.resource_version = \
+                        item['metadata'].get('resourceVersion')
+                    self.synced_at = time.monotonic()
+        finally:
+            self.watching = False
+
+        # the watch ended cleanly at its timeout, nothing was missed
+        self.synced_at = time.monotonic()
+
+    def _is_idle(self):
+        return time.monotonic() - self.last_read > KUBE_INFORMER_IDLE_TIMEOUT
+
+    def _run(self):
+        backoff = 1
+
+        while not self.stopped:
+            try:
+                if self.resource_version is None:
+                    self._relist()
+
+                self._watch_changes()
+                backoff = 1
+                self.error = None
+
+                if self._is_idle():
+                    self.stop()
+
+            except ResourceExpired:
+                self.resource_version = None
+
+            except Exception as e:
+                self.error = str(e)
+                self.resource_version = None
+                # unblock requests waiting on the initial list
+                self._listed.set()
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 60)
+
+
+class ClusterResourceCache:
+    """ registry of informers keyed by cluster id and resource kind """
+
+    def __init__(self):
+        self._informers = {}
+        self._lock = threading.Lock()
+
+    def get_informer(self, cluster, kind, start=True):
+        key = (str(cluster.id), kind)
+
+        with self._lock:
+            informer = self._informers.get(key)
+
+            if informer and informer.stopped:
+                del self._informers[key]
+                informer = None
+
+            if not informer and start:
+                informer = Informer(get_kube_clients(cluster), kind).start()
+                self._informers[key] = informer
+
+        return informer
+
+    def list(self, cluster, kind):
+        """
+        Return every item of a kind in the cluster, from memory when the
+        store is in sync and from the API server otherwise.
+        """
+        informer = self.get_informer(cluster, kind)
+
+        if informer.is_fresh() or informer.wait_synced(KUBE_CACHE_SYNC_TIMEOUT):
+            return informer.list()
+
+        items, _ = live_list(get_kube_clients(cluster), kind)
+        return items
+
+    def get(self, cluster, kind, name, namespace=None):
+        """
+        Return a single item from memory, or None when the store is not
+        running or not in sync so the caller can read it live.
+        """
+        informer = self.get_informer(cluster, kind, start=False)
+
+        if not informer or not informer.is_fresh():
+            return None
+
+        return informer.get(name, namespace)
+
+    def version(self, cluster, kind, name=None, namespace=None, start=True):
+        """
+        Return the resourceVersion of a kind's store, or of a single item
+        in it, without asking the API server. None when the store is not
+        in sync or does not hold the item.
+        """
+        informer = self.get_informer(cluster, kind, start=start)
+
+        if not informer or not informer.is_fresh():
+            return None
+
+        if name is None:
+            return informer.resource_version
+
+        item = informer.get(name, namespace)
+
+        return item['metadata'].get('resourceVersion') if item else None
+
+    def invalidate(self, cluster_id):
+        with self._lock:
+            keys = [key for key in self._informers if key[0] == str(cluster_id)]
+            informers = [self._informers.pop(key) for key in keys]
+
+        for informer in informers:
+            informer.stop()
+
+
+cluster_cache = ClusterResourceCache()
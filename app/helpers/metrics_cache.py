@@ -0,0 +1,197 @@
+import os
+import json
+import math
+import time
+import hashlib
+import threading
+from cachetools import LRUCache, TTLCache
+
+
+# memory, redis or none
+PROMETHEUS_CACHE_BACKEND = os.getenv('PROMETHEUS_CACHE_BACKEND', 'memory')
+
+# how long the trailing, still changing, bucket of a series is reused
+PROMETHEUS_CACHE_PARTIAL_TTL = int(os.getenv('PROMETHEUS_CACHE_PARTIAL_TTL', 30))
+
+# number of series kept by the in-process backend
+PROMETHEUS_CACHE_SIZE = int(os.getenv('PROMETHEUS_CACHE_SIZE', 2048))
+
+# completed buckets older than this many seconds are trimmed on every
+# write, and a series that is not written to for as long is dropped
+PROMETHEUS_CACHE_RETENTION = int(
+    os.getenv('PROMETHEUS_CACHE_RETENTION', 7 * 24 * 3600))
+
+STEP_UNITS = {
+    's': 1,
+    'm': 60,
+    'h': 3600,
+    'd': 86400,
+    'w': 7 * 86400,
+    'y': 365 * 86400,
+}
+
+
+def parse_step(step):
+    """ convert a prometheus step such as 30s, 5m or 1h to seconds """
+    step = str(step).strip()
+
+    if step and step[-1] in STEP_UNITS:
+        seconds = float(step[:-1]) * STEP_UNITS[step[-1]]
+    else:
+        seconds = float(step)
+
+    return max(int(seconds), 1)
+
+
+def align_range(start, end, step_seconds):
+    """ snap a range onto step boundaries so repeated queries share buckets """
+    aligned_start = math.floor(float(start) / step_seconds) * step_seconds
+    aligned_end = math.floor(float(end) / step_seconds) * step_seconds
+
+    return aligned_start, aligned_end
+
+
+def series_key(metric, step_seconds):
+    digest = hashlib.sha1(f'{step_seconds}:{metric}'.encode('utf-8')).hexdigest()
+    return f'promcache:{digest}'
+
+
+class MemoryBackend:
+    """ in-process LRU of completed buckets, TTL cache of trailing ones """
+
+    def __init__(self):
+        self._points = LRUCache(maxsize=PROMETHEUS_CACHE_SIZE)
+        self._tails = TTLCache(
+            maxsize=PROMETHEUS_CACHE_SIZE, ttl=PROMETHEUS_CACHE_PARTIAL_TTL)
+        self._lock = threading.Lock()
+
+    def get_points(self, key):
+        with self._lock:
+            return dict(self._points.get(key, {}))
+
+    def add_points(self, key, points, oldest):
+        with self._lock:
+            stored = self._points.get(key, {})
+            stored.update(points)
+            self._points[key] = {
+                timestamp: value for timestamp, value in stored.items()
+                if timestamp >= oldest
+            }
+
+    def get_tail(self, key):
+        with self._lock:
+            return self._tails.get(key)
+
+    def set_tail(self, key, points):
+        with self._lock:
+            self._tails[key] = points
+
+
+class RedisBackend:
+    """
+    completed buckets in a redis sorted set scored by timestamp, so old
+    ones can be trimmed by range, trailing ones in an expiring key
+    """
+
+    def __init__(self, redis_url=os.getenv('REDIS_URL')):
+        import redis
+        self.redis = redis.Redis.from_url(redis_url)
+
+    def get_points(self, key):
+        return dict(
+            json.loads(member) for member in self.redis.zrange(f'{key}:points', 0, -1)
+        )
+
+    def add_points(self, key, points, oldest):
+        if not points:
+            return
+
+        pipeline = self.redis.pipeline()
+        pipeline.zadd(f'{key}:points', {
+            json.dumps([timestamp, value]): timestamp
+            for timestamp, value in points.items()
+        })
+        pipeline.zremrangebyscore(f'{key}:points', '-inf', f'({oldest}')
+        pipeline.expire(f'{key}:points', PROMETHEUS_CACHE_RETENTION)
+        pipeline.execute()
+
+    def get_tail(self, key):
+        tail = self.redis.get(f'{key}:tail')
+
+        if tail is None:
+            return None
+
+        return {int(timestamp): value for timestamp, value in json.loads(tail).items()}
+
+    def set_tail(self, key, points):
+        self.redis.setex(
+            f'{key}:tail', PROMETHEUS_CACHE_PARTIAL_TTL, json.dumps(points))
+
+
+def create_backend(name=PROMETHEUS_CACHE_BACKEND):
+    if name == 'redis':
+        return RedisBackend()
+    if name == 'memory':
+        return MemoryBackend()
+    return None
+
+
+metrics_cache_backend = create_backend()
+
+
+def cached_query_range(fetch, metric, start, end, step, backend=None,
+                       now=None):
+    """
+    Serve a range query from cached step buckets and fetch only what is
+    missing from prometheus.
+
+    Buckets that lie entirely in the past never change and are kept for
+    PROMETHEUS_CACHE_RETENTION seconds, the trailing bucket is kept for
+    PROMETHEUS_CACHE_PARTIAL_TTL seconds. Buckets prometheus had no
+    sample for are cached as None so they are not asked for again.
+    fetch(metric, start, end, step) must return a dict of timestamp to
+    value.
+    """
+    backend = backend or metrics_cache_backend
+    step_seconds = parse_step(step)
+    start, end = align_range(start, end, step_seconds)
+
+    if backend is None:
+        return fetch(metric, start, end, step_seconds)
+
+    key = series_key(metric, step_seconds)
+    now = now or time.time()
+
+    timestamps = range(int(start), int(end) + 1, step_seconds)
+    complete = [ts for ts in timestamps if ts + step_seconds <= now]
+    partial = [ts for ts in timestamps if ts + step_seconds > now]
+
+    points = backend.get_points(key)
+    tail = backend.get_tail(key) if partial else None
+
+    if tail is not None and all(ts in tail for ts in partial):
+        points.update(tail)
+
+    missing = [ts for ts in timestamps if ts not in points]
+
+    if missing:
+        fetched = fetch(metric, missing[0], end, step_seconds)
+        fetched_range = [ts for ts in timestamps if ts >= missing[0]]
+
+        new_points = {
+            ts: fetched.get(ts) for ts in fetched_range if ts in complete}
+        new_tail = {
+            ts: fetched.get(ts) for ts in fetched_range if ts in partial}
+
+        backend.add_points(
+            key, new_points, int(now) - PROMETHEUS_CACHE_RETENTION)
+        if new_tail:
+            backend.set_tail(key, new_tail)
+
+        points.update(new_points)
+        points.update(new_tail)
+
+    return {
+        ts: points[ts] for ts in timestamps
+        if points.get(ts) is not None
+    }
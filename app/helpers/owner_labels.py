@@ -0,0 +1,14 @@
+# labels tying cluster objects to the rows they were created for, the
+# drift reconciler finds orphans by them
+PROJECT_LABEL = 'cranecloud.io/project-id'
+APP_LABEL = 'cranecloud.io/app-id'
+
+
+def owner_labels(project_id, app_id=None):
+    """ labels of an object owned by a project, or by one of its apps """
+    labels = {PROJECT_LABEL: str(project_id)}
+
+    if app_id is not None:
+        labels[APP_LABEL] = str(app_id)
+
+    return labels
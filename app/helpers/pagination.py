@@ -0,0 +1,82 @@
+import os
+import uuid
+from urllib.parse import urlencode
+from flask import request
+from sqlalchemy import Boolean, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from app.helpers.serializer import project_columns
+
+
+# rows per page when the client does not ask for a limit
+PAGE_LIMIT = int(os.getenv('PAGE_LIMIT', 100))
+
+# largest page a client may ask for
+PAGE_MAX_LIMIT = int(os.getenv('PAGE_MAX_LIMIT', 1000))
+
+
+def parse_filter(column, value):
+    """ convert a query string value to the type of the column it filters """
+    if isinstance(column.type, Boolean):
+        if value.lower() in ('true', '1'):
+            return True
+        if value.lower() in ('false', '0'):
+            return False
+        raise ValueError('should be true or false')
+    if isinstance(column.type, UUID):
+        return uuid.UUID(value)
+    if isinstance(column.type, Integer):
+        return int(value)
+    return value
+
+
+def get_page(model, query=None, filterable=(), schema=None, **filters):
+    """
+    Return a page of a model's rows for the current request along with
+    its pagination info and any errors in the query string. The page is
+    picked by the limit and cursor args, each filterable column given as
+    an arg narrows it down by equality. With a schema only the columns
+    it dumps are loaded. The rows are False if the database could not
+    be queried.
+    """
+    errors = {}
+
+    try:
+        limit = int(request.args.get('limit', PAGE_LIMIT))
+        if not 0 < limit <= PAGE_MAX_LIMIT:
+            raise ValueError
+    except ValueError:
+        errors['limit'] = f'limit should be a number from 1 to {PAGE_MAX_LIMIT}'
+        limit = PAGE_LIMIT
+
+    for name in filterable:
+        value = request.args.get(name)
+        if value is None:
+            continue
+        try:
+            filters[name] = parse_filter(getattr(model, name), value)
+        except ValueError:
+            errors[name] = f'{name} is not a valid value'
+
+    if errors:
+        return [], None, errors
+
+    cursor = request.args.get('cursor')
+
+    if schema is not None:
+        query = project_columns(query or model.query, model, schema)
+
+    try:
+        rows, next_cursor = model.find_page(
+            limit=limit, cursor=cursor, query=query, **filters)
+    except ValueError:
+        return [], None, dict(cursor='cursor is not valid')
+
+    next_link = None
+    if next_cursor:
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        next_link = f'{request.base_url}?{urlencode(args)}'
+
+    pagination = dict(limit=limit, next_cursor=next_cursor, next=next_link)
+
+    return rows, pagination, None
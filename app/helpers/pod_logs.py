@@ -0,0 +1,135 @@
+import os
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# max number of pod logs read at the same time across a worker
+KUBE_LOG_WORKERS = int(os.getenv('KUBE_LOG_WORKERS', 8))
+
+# lines buffered between the follow threads and the response
+LOG_STREAM_BUFFER = int(os.getenv('LOG_STREAM_BUFFER', 1000))
+
+log_executor = ThreadPoolExecutor(max_workers=KUBE_LOG_WORKERS)
+
+
+def list_app_pods(kube_client, namespace, app_alias):
+    """ list the pods of an app using its deployment's app label """
+    response = kube_client.kube.list_namespaced_pod(
+        namespace,
+        label_selector=f'app={app_alias}',
+        _preload_content=False
+    )
+
+    return json.loads(response.data)['items']
+
+
+def pod_is_ready(pod):
+    conditions = (pod.get('status') or {}).get('conditions') or []
+
+    for condition in conditions:
+        if condition['type'] == 'Ready':
+            return condition['status'] == 'True'
+
+    return False
+
+
+def get_waiting_info(pod):
+    """ describe why a pod's containers are waiting, if they are """
+    container_statuses = (pod.get('status') or {}).get('containerStatuses') or []
+    pod_infor = []
+
+    for container_status in container_statuses:
+        waiting = (container_status.get('state') or {}).get('waiting')
+
+        if not waiting:
+            continue
+
+        message = waiting.get('message', '')
+        stop = message.find('container')
+        if stop > 0:
+            message = message[:stop]
+
+        reason = waiting.get('reason')
+        pod_infor.append(
+            f'type\tstatus\treason\t\t\tmessage\n----\t------\t------\t\t\t------\nwaiting\tfailed\t{reason}\t{message}')
+
+    return pod_infor
+
+
+def read_pod_logs(kube_client, namespace, pod_names, **log_params):
+    """ read the logs of several pods concurrently, keeping their order """
+    futures = [
+        log_executor.submit(
+            kube_client.kube.read_namespaced_pod_log,
+            pod_name, namespace, **log_params)
+        for pod_name in pod_names
+    ]
+
+    return [future.result() for future in futures]
+
+
+def _put_line(lines, item, stop):
+    while not stop.is_set():
+        try:
+            lines.put(item, timeout=1)
+            return
+        except queue.Full:
+            continue
+
+
+def _follow_pod_log(kube_client, namespace, pod_name, lines, responses, stop, log_params):
+    try:
+        response = kube_client.kube.read_namespaced_pod_log(
+            pod_name, namespace,
+            follow=True,
+            _preload_content=False,
+            **log_params
+        )
+        responses.append(response)
+
+        for line in response:
+            if stop.is_set():
+                break
+            _put_line(lines, (pod_name, line.decode('utf-8', 'replace').rstrip('\n')), stop)
+    except Exception as e:
+        _put_line(lines, (pod_name, f'error following logs: {e}'), stop)
+    finally:
+        _put_line(lines, (pod_name, None), stop)
+
+
+def stream_pod_logs(kube_client, namespace, pod_names, **log_params):
+    """
+    Follow the logs of several pods and yield them as server sent events.
+    Each pod is followed in its own thread, lines are passed through a
+    bounded queue so memory use does not grow with the size of the logs.
+    """
+    lines = queue.Queue(maxsize=LOG_STREAM_BUFFER)
+    responses = []
+    stop = threading.Event()
+
+    for pod_name in pod_names:
+        threading.Thread(
+            target=_follow_pod_log,
+            args=(kube_client, namespace, pod_name, lines, responses, stop, log_params),
+            daemon=True
+        ).start()
+
+    remaining = len(pod_names)
+    try:
+        while remaining:
+            pod_name, line = lines.get()
+
+            if line is None:
+                remaining -= 1
+                continue
+
+            yield f'data: {json.dumps(dict(pod=pod_name, log=line))}\n\n'
+
+        yield 'event: end\ndata: {}\n\n'
+    finally:
+        # client went away or all pods finished, unblock the follow threads
+        stop.set()
+        for response in responses:
+            response.close()
@@ -0,0 +1,167 @@
+import os
+from kubernetes import client
+from sqlalchemy.exc import SQLAlchemyError
+from app.models import db
+from app.models.app import App
+from app.models.project import Project
+from app.models.project_database import ProjectDatabase
+from app.helpers.response_cache import response_cache
+from app.helpers.owner_labels import owner_labels
+from app.helpers.db_flavor import get_database_server
+from app.helpers.db_status import forget_database_status
+
+
+# seconds between checks while a namespace's finalizers run
+PROJECT_DELETE_POLL_INTERVAL = int(os.getenv('PROJECT_DELETE_POLL_INTERVAL', 10))
+
+# checks before a teardown gives up and the project is left delete_failed,
+# it can be started again with a delete
+PROJECT_DELETE_MAX_RETRIES = int(os.getenv('PROJECT_DELETE_MAX_RETRIES', 90))
+
+PROJECT_PROVISION_RETRY_DELAY = int(os.getenv('PROJECT_PROVISION_RETRY_DELAY', 10))
+
+PROJECT_PROVISION_MAX_RETRIES = int(os.getenv('PROJECT_PROVISION_MAX_RETRIES', 5))
+
+# states that can still move on to deleting
+DELETABLE_STATES = [
+    'pending', 'provisioning', 'ready', 'failed', 'deleting', 'delete_failed']
+
+
+def set_project_status(project_id, status, from_states=None):
+    """
+    Move a project to a new status in a single conditional update, only
+    if it is currently in one of from_states. Returns whether it moved,
+    so a repeated or concurrent job does not redo another job's work.
+    """
+    query = Project.query.filter(Project.id == project_id)
+
+    if from_states:
+        query = query.filter(Project.status.in_(from_states))
+
+    try:
+        updated = query.update({Project.status: status}, synchronize_session=False)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        print(e)
+        db.session.rollback()
+        return False
+
+    if updated == 1:
+        # a bulk update skips ModelMixin, drop the cached project here
+        project = Project.get_by_id(project_id)
+        if project:
+            response_cache.invalidate(project.cache_tags())
+
+    return updated == 1
+
+
+def ignore_status(error, *statuses):
+    if error.status not in statuses:
+        raise error
+
+
+def create_project_namespace(kube_client, namespace_name, project_id=None):
+    """ create a project's namespace and default ingress, if missing """
+    labels = owner_labels(project_id) if project_id else None
+
+    try:
+        kube_client.kube.create_namespace(
+            client.V1Namespace(
+                metadata=client.V1ObjectMeta(name=namespace_name, labels=labels)
+            ))
+    except client.rest.ApiException as e:
+        ignore_status(e, 409)
+
+    ingress_default_rule = client.ExtensionsV1beta1IngressRule(
+        host="traefik-ui.cranecloud.io",
+        http=client.ExtensionsV1beta1HTTPIngressRuleValue(
+            paths=[client.ExtensionsV1beta1HTTPIngressPath(
+                path="/*",
+                backend=client.ExtensionsV1beta1IngressBackend(
+                    service_name="traefik-web-ui-ext",
+                    service_port=80
+                )
+            )]
+        )
+    )
+
+    ingress_body = client.ExtensionsV1beta1Ingress(
+        metadata=client.V1ObjectMeta(name=f'{namespace_name}-ingress'),
+        spec=client.ExtensionsV1beta1IngressSpec(
+            rules=[ingress_default_rule]
+        )
+    )
+
+    try:
+        kube_client.extension_api.create_namespaced_ingress(
+            namespace=namespace_name,
+            body=ingress_body
+        )
+    except client.rest.ApiException as e:
+        ignore_status(e, 409)
+
+
+def delete_project_namespace(kube_client, namespace_name):
+    """
+    Ask for a project's namespace to be deleted. Returns True once the
+    namespace no longer exists, False while its finalizers still run.
+    """
+    try:
+        namespace = kube_client.kube.read_namespace(namespace_name)
+    except client.rest.ApiException as e:
+        ignore_status(e, 404)
+        return True
+
+    if namespace.status.phase != 'Terminating':
+        try:
+            kube_client.kube.delete_namespace(namespace_name)
+        except client.rest.ApiException as e:
+            ignore_status(e, 404, 409)
+
+    return False
+
+
+def delete_project_data(project):
+    """
+    Drop a project's tenant databases and their users and delete its
+    database and app rows, the apps' objects went with the namespace.
+    Returns whether all of it is gone, a database that could not be
+    dropped, or whose user could not be, keeps its row so the next
+    attempt tries it again.
+    """
+    databases = ProjectDatabase.find_all(project_id=project.id)
+    apps = App.find_all(project_id=project.id)
+
+    if databases is False or apps is False:
+        return False
+
+    deleted = True
+
+    for database in databases:
+        server = get_database_server(
+            database.database_flavour_name, database.host, database.port)
+
+        if not server:
+            deleted = False
+            continue
+
+        database_service = server['class']
+
+        if not database_service.delete_database(database.name):
+            deleted = False
+            continue
+
+        if not database_service.delete_user(database.user):
+            deleted = False
+            continue
+
+        forget_database_status(database_service, database.name, database.user)
+
+        if not database.delete():
+            deleted = False
+
+    for app in apps:
+        if not app.delete():
+            deleted = False
+
+    return deleted
@@ -1,3 +1,162 @@
+import os
+import time
+import datetime
+from string import Template
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
 from prometheus_http_client import Prometheus
+from app.helpers.metrics_cache import cached_query_range
 
 prometheus = Prometheus()
+
+PROMETHEUS_TIMEOUT = int(os.getenv('PROMETHEUS_TIMEOUT', 30))
+
+PROMETHEUS_WORKERS = int(os.getenv('PROMETHEUS_WORKERS', 8))
+
+# range queries, keyed by metric kind
+RANGE_METRICS = {
+    'cpu': Template(
+        'sum(rate(container_cpu_usage_seconds_total{container!="POD", image!="", '
+        'namespace="$namespace"$pod_filter}[5m]))'),
+    'memory': Template(
+        'sum(rate(container_memory_usage_bytes{container_name!="POD", image!="", '
+        'namespace="$namespace"$pod_filter}[5m]))'),
+    'network': Template(
+        'sum(rate(container_network_receive_bytes_total{'
+        'namespace="$namespace"$pod_filter}[5m]))'),
+}
+
+# instant queries, keyed by metric kind and then by result name
+INSTANT_METRICS = {
+    'storage': {
+        'storage_capacity': Template(
+            'sum(kube_persistentvolumeclaim_resource_requests_storage_bytes{'
+            'namespace="$namespace"$pvc_filter})'),
+        'storage_percentage_usage': Template(
+            '100*sum(kubelet_volume_stats_used_bytes{namespace="$namespace"$pvc_filter})'
+            '/sum(kubelet_volume_stats_capacity_bytes{namespace="$namespace"$pvc_filter})'),
+    },
+}
+
+METRIC_KINDS = list(RANGE_METRICS) + list(INSTANT_METRICS)
+
+prometheus_executor = ThreadPoolExecutor(max_workers=PROMETHEUS_WORKERS)
+
+
+def create_session():
+    """ http session keeping connections to prometheus alive """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=PROMETHEUS_WORKERS)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    if prometheus.headers:
+        session.headers.update(prometheus.headers)
+
+    return session
+
+
+prometheus_session = create_session()
+
+
+def prometheus_get(path, params):
+    response = prometheus_session.get(
+        prometheus.url.rstrip('/') + path,
+        params=params,
+        timeout=PROMETHEUS_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_range(metric, start, end, step):
+    """ run a range query and return the first series by timestamp """
+    data = prometheus_get('/api/v1/query_range', dict(
+        query=metric, start=start, end=end, step=step))
+
+    result = data['data']['result']
+
+    if not result:
+        return {}
+
+    return {
+        int(float(value[0])): float(value[1])
+        for value in result[0]['values']
+    }
+
+
+def query_range(metric, start, end, step):
+    """
+    Return the values of a range query's first series, aligned on step
+    boundaries and served from the metrics cache where possible.
+    """
+    values = cached_query_range(fetch_range, metric, start, end, step)
+
+    return [
+        {'timestamp': float(timestamp), 'value': value}
+        for timestamp, value in sorted(values.items())
+    ]
+
+
+def query(metric):
+    """ run an instant query and return its data """
+    data = prometheus_get('/api/v1/query', dict(query=metric, time=time.time()))
+
+    return data['data']
+
+
+def get_default_range(query_data):
+    current_time = datetime.datetime.now()
+    yesterday_time = current_time + datetime.timedelta(days=-1)
+
+    start = query_data.get('start', yesterday_time.timestamp())
+    end = query_data.get('end', current_time.timestamp())
+    step = query_data.get('step', '1h')
+
+    return start, end, step
+
+
+def get_metric_filters(app_alias=None):
+    if not app_alias:
+        return dict(pod_filter='', pvc_filter='')
+
+    return dict(
+        pod_filter=f', pod=~"{app_alias}.*"',
+        pvc_filter=f', persistentvolumeclaim=~"{app_alias}.*"'
+    )
+
+
+def query_metrics(kinds, namespace, start, end, step, app_alias=None):
+    """
+    Run the queries for several metric kinds of a project, or of one app
+    in the project, concurrently and return their results by kind.
+    """
+    filters = get_metric_filters(app_alias)
+    futures = {}
+
+    for kind in kinds:
+        if kind in RANGE_METRICS:
+            metric = RANGE_METRICS[kind].substitute(namespace=namespace, **filters)
+            futures[kind] = prometheus_executor.submit(
+                query_range, metric, start, end, step)
+        else:
+            futures[kind] = {
+                name: prometheus_executor.submit(
+                    query, template.substitute(namespace=namespace, **filters))
+                for name, template in INSTANT_METRICS[kind].items()
+            }
+
+    results = {}
+
+    for kind, future in futures.items():
+        if isinstance(future, dict):
+            results[kind] = {
+                name: instant_future.result()
+                for name, instant_future in future.items()
+            }
+        else:
+            results[kind] = future.result()
+
+    return results
@@ -0,0 +1,97 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from app.helpers.kube import get_kube_clients
+from app.helpers.kube_cache import cluster_cache
+
+
+# ask for metadata only lists, servers that do not support them answer
+# with the plain json list instead
+METADATA_ONLY_ACCEPT = (
+    'application/json;as=PartialObjectMetadataList;g=meta.k8s.io;v=v1beta1,'
+    'application/json'
+)
+
+COUNT_PAGE_SIZE = int(os.getenv('KUBE_COUNT_PAGE_SIZE', 500))
+
+# display name, informer kind and list path of each counted resource
+COUNTED_RESOURCES = [
+    ('nodes', 'nodes', '/api/v1/nodes'),
+    ('PVCs', 'pvcs', '/api/v1/persistentvolumeclaims'),
+    ('pods', 'pods', '/api/v1/pods'),
+    ('services', 'services', '/api/v1/services'),
+    ('deployments', 'deployments', '/apis/apps/v1/deployments'),
+    ('namespaces', 'namespaces', '/api/v1/namespaces'),
+]
+
+count_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('KUBE_COUNT_WORKERS', 12)))
+
+
+def list_page(api_client, path, limit, continue_token=None):
+    query_params = [('limit', limit)]
+
+    if continue_token:
+        query_params.append(('continue', continue_token))
+
+    response = api_client.call_api(
+        path, 'GET',
+        query_params=query_params,
+        header_params={'Accept': METADATA_ONLY_ACCEPT},
+        auth_settings=['BearerToken'],
+        _return_http_data_only=True,
+        _preload_content=False
+    )
+
+    return json.loads(response.data)
+
+
+def count_from_api(api_client, path):
+    """
+    Count a resource with paginated metadata only lists. A single item
+    page is enough when the server reports remainingItemCount.
+    """
+    page = list_page(api_client, path, 1)
+    count = len(page['items'])
+    metadata = page.get('metadata', {})
+
+    if metadata.get('remainingItemCount') is not None:
+        return count + metadata['remainingItemCount']
+
+    # older servers do not report the remaining count, page through
+    continue_token = metadata.get('continue')
+
+    while continue_token:
+        page = list_page(api_client, path, COUNT_PAGE_SIZE, continue_token)
+        count += len(page['items'])
+        continue_token = page.get('metadata', {}).get('continue')
+
+    return count
+
+
+def get_resource_count(cluster):
+    """
+    Return the number of each counted resource in a cluster. Counts are
+    taken from warm informer stores where available, the rest are
+    fetched from the API server concurrently.
+    """
+    kube_client = get_kube_clients(cluster)
+    counts = {}
+    pending = {}
+
+    for name, kind, path in COUNTED_RESOURCES:
+        informer = cluster_cache.get_informer(cluster, kind, start=False)
+
+        if informer and informer.is_fresh():
+            counts[name] = informer.count()
+        else:
+            pending[name] = count_executor.submit(
+                count_from_api, kube_client.api_client, path)
+
+    for name, future in pending.items():
+        counts[name] = future.result()
+
+    return [
+        dict(name=name, count=counts[name])
+        for name, _, _ in COUNTED_RESOURCES
+    ]
@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from functools import wraps
+from cachetools import TTLCache
+from flask import current_app, g, has_app_context, request
+from flask_jwt_extended import get_jwt_identity, get_jwt_claims
+
+
+# seconds a cached response is served from redis, writes that go through
+# ModelMixin drop it earlier
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 30))
+
+# each worker keeps recent responses in memory for this many seconds, it
+# bounds how stale a worker can be should an invalidation message be lost
+RESPONSE_CACHE_LOCAL_TTL = int(os.getenv('RESPONSE_CACHE_LOCAL_TTL', 5))
+
+# number of responses kept in memory by each worker
+RESPONSE_CACHE_LOCAL_SIZE = int(os.getenv('RESPONSE_CACHE_LOCAL_SIZE', 1024))
+
+RESPONSE_CACHE_CHANNEL = 'response-cache:invalidate'
+
+
+class ResponseCache:
+    """
+    Cache json responses in the redis instance celery uses, with a short
+    lived copy in each worker's memory. Every response is stored with
+    tags naming the rows it was built from, invalidating a tag deletes
+    the responses in redis and publishes the tag so that every worker,
+    in every process, drops its own copies too.
+    """
+
+    def __init__(self, redis_url=None, ttl=RESPONSE_CACHE_TTL,
+                 local_ttl=RESPONSE_CACHE_LOCAL_TTL):
+        self.redis_url = redis_url
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=RESPONSE_CACHE_LOCAL_SIZE, ttl=local_ttl)
+        self._redis = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        """
+        whether responses are cached, by the app's RESPONSE_CACHE setting
+        or, outside an app, by the RESPONSE_CACHE_ENABLED it is read from
+        """
+        # REDIS_URL is read here since .env is loaded after this import
+        if not (self.redis_url or os.getenv('REDIS_URL')):
+            return False
+
+        if has_app_context():
+            return bool(current_app.config.get('RESPONSE_CACHE'))
+
+        return os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(
+                self.redis_url or os.getenv('REDIS_URL'))
+        return self._redis
+
+    def drop_local(self, tags):
+        tags = set(tags)
+        with self._lock:
+            for key, (_, entry_tags) in list(self.local.items()):
+                if tags.intersection(entry_tags):
+                    self.local.pop(key, None)
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(RESPONSE_CACHE_CHANNEL)
+                for message in pubsub.listen():
+                    self.drop_local(json.loads(message['data']))
+            except Exception as e:
+                print(e)
+                # anything cached while unsubscribed may have missed a message
+                with self._lock:
+                    self.local.clear()
+                time.sleep(5)
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            # started on first use so each worker process gets its own
+            self._thread = threading.Thread(target=self._listen, daemon=True)
+            self._thread.start()
+
+    def get(self, key):
+        self.start()
+
+        with self._lock:
+            entry = self.local.get(key)
+
+        if entry is not None:
+            return entry[0]
+
+        try:
+            stored = self.redis.get(f'response:{key}')
+        except Exception as e:
+            print(e)
+            return None
+
+        if stored is None:
+            return None
+
+        response, tags = json.loads(stored)
+
+        with self._lock:
+            self.local[key] = (response, tags)
+
+        return response
+
+    def set(self, key, response, tags, ttl=None):
+        ttl = ttl or self.ttl
+
+        try:
+            pipeline = self.redis.pipeline()
+            pipeline.setex(f'response:{key}', ttl, json.dumps([response, tags]))
+            for tag in tags:
+                pipeline.sadd(f'response-tag:{tag}', key)
+                pipeline.expire(f'response-tag:{tag}', ttl)
+            pipeline.execute()
+        except Exception as e:
+            print(e)
+            return
+
+        with self._lock:
+            self.local[key] = (response, tags)
+
+    def invalidate(self, tags):
+        """
+        drop every response built from one of the tags, in all workers,
+        also where this process does not serve cached responses itself.
+        Nothing is sent while the cache is disabled.
+        """
+        tags = sorted(set(tags))
+
+        if not tags or not self.enabled:
+            return
+
+        self.drop_local(tags)
+
+        try:
+            tag_keys = [f'response-tag:{tag}' for tag in tags]
+            pipeline = self.redis.pipeline()
+            for tag_key in tag_keys:
+                pipeline.smembers(tag_key)
+            members = pipeline.execute()
+
+            keys = {
+                f'response:{key.decode("utf-8")}'
+                for tag_members in members for key in tag_members}
+
+            pipeline = self.redis.pipeline()
+            if keys:
+                pipeline.delete(*keys)
+            pipeline.delete(*tag_keys)
+            pipeline.publish(RESPONSE_CACHE_CHANNEL, json.dumps(tags))
+            pipeline.execute()
+        except Exception as e:
+            print(e)
+
+
+response_cache = ResponseCache()
+
+
+def response_key(identity, claims):
+    """
+    the same route and arguments are cached apart for each caller, and
+    for each etag when the response is versioned
+    """
+    key = json.dumps([
+        request.path,
+        sorted(request.args.items(multi=True)),
+        identity,
+        claims,
+        g.get('etag'),
+    ], sort_keys=True, default=str)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def cached_response(*tags, ttl=None, unless=None):
+    """
+    Cache successful responses of a Resource method. Tags are formatted
+    with the view arguments, 'project:{project_id}' is dropped whenever
+    that project, or a row referencing it, is written. Requests for
+    which unless() is true skip the cache. Goes below jwt_required so
+    the caller is known.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(resource, *args, **kwargs):
+            if not response_cache.enabled or (unless and unless()):
+                return method(resource, *args, **kwargs)
+
+            key = response_key(get_jwt_identity(), get_jwt_claims())
+            cached = response_cache.get(key)
+
+            if cached is not None:
+                data, code = cached
+                return data, code
+
+            response = method(resource, *args, **kwargs)
+            data, code = response if isinstance(response, tuple) \
+                else (response, 200)
+
+            if code == 200:
+                response_cache.set(
+                    key, [data, code],
+                    [tag.format(**kwargs).lower() for tag in tags], ttl)
+
+            return response
+        return wrapper
+    return decorator
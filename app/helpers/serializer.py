@@ -0,0 +1,50 @@
+import orjson
+from functools import lru_cache
+from flask import make_response
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+
+@lru_cache(maxsize=None)
+def _get_schema(schema_class, many, only, exclude):
+    return schema_class(many=many, only=only, exclude=exclude)
+
+
+def get_schema(schema_class, many=False, only=None, exclude=()):
+    """
+    Return a shared instance of a schema so its fields are only built
+    once per process instead of on every request
+    """
+    return _get_schema(
+        schema_class, many, tuple(only) if only else None, tuple(exclude))
+
+
+def dump_columns(model, schema_class, **options):
+    """ the columns of a model a schema dumps, plus the keys pages are cut on """
+    schema = get_schema(schema_class, **options)
+
+    dumped = {
+        field.attribute or name
+        for name, field in schema.fields.items() if not field.load_only
+    }
+
+    return [
+        column.key for column in inspect(model).column_attrs
+        if column.key in dumped or column.key in ('id', 'date_created')
+    ]
+
+
+def project_columns(query, model, schema_class, **options):
+    """ load only the columns a schema dumps, skipping the rest of each row """
+    return query.options(load_only(*dump_columns(model, schema_class, **options)))
+
+
+def output_json(data, code, headers=None):
+    """ flask_restful representation encoding the response body in one pass """
+    body = orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+    response = make_response(body, code)
+    response.headers.extend(headers or {})
+    response.headers['Content-Type'] = 'application/json'
+
+    return response
@@ -0,0 +1,28 @@
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+SQL_STATEMENT_COUNT_HEADER = 'X-SQL-Statement-Count'
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    """ count the statements each request sends to the database """
+    if has_request_context():
+        g.sql_statement_count = g.get('sql_statement_count', 0) + 1
+
+
+def init_sql_counter(app):
+    """
+    Report the number of SQL statements a request issued in a response
+    header, in debug or when SQL_STATEMENT_COUNT is set
+    """
+    if not (app.debug or app.config.get('SQL_STATEMENT_COUNT')):
+        return
+
+    @app.after_request
+    def add_statement_count(response):
+        response.headers[SQL_STATEMENT_COUNT_HEADER] = str(
+            g.get('sql_statement_count', 0))
+        return response
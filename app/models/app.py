@@ -6,11 +6,22 @@ from app.models.model_mixin import ModelMixin
 
 class App(ModelMixin):
     __tablename__ = 'app'
+    __table_args__ = (
+        db.Index('ix_app_project_id_name', 'project_id', 'name'),
+        db.Index('ix_app_project_id_date_created', 'project_id', 'date_created', 'id'),
+    )
     id = db.Column(UUID(as_uuid=True), primary_key=True, server_default=sa_text("uuid_generate_v4()"))
-    name = db.Column(db.String(256), nullable=True)
+    name = db.Column(db.String(256), nullable=True, index=True)
     image = db.Column(db.String(256), nullable=False)
     project_id = db.Column(UUID(as_uuid=True), db.ForeignKey('project.id'), nullable=False)
     url = db.Column(db.String(256), nullable=True)
     alias = db.Column(db.String(256), nullable=True, unique=True)
     port = db.Column(db.Integer, nullable=False)
+    # running, failed or unknown, synced with the app's deployments by
+    # the reconcile_app_statuses task
+    status = db.Column(db.String(32), nullable=False, default='unknown')
+    replicas = db.Column(db.Integer, nullable=True)
+    ready_replicas = db.Column(db.Integer, nullable=True)
+    # last change of the deployment's Available condition
+    status_changed_at = db.Column(db.DateTime, nullable=True)
     date_created = db.Column(db.DateTime, default=db.func.current_timestamp())
@@ -0,0 +1,18 @@
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import text as sa_text
+from app.models import db
+from app.models.model_mixin import ModelMixin
+
+
+class DatabasePool(ModelMixin):
+    """ a created database and user waiting to be given to a project """
+    __tablename__ = 'database_pool'
+    id = db.Column(UUID(as_uuid=True), primary_key=True,
+                   server_default=sa_text("uuid_generate_v4()"))
+    database_flavour_name = db.Column(db.String(256), nullable=False, index=True)
+    host = db.Column(db.String(256), nullable=True)
+    port = db.Column(db.Integer, nullable=True)
+    name = db.Column(db.String(256), nullable=False)
+    user = db.Column(db.String(256), nullable=False)
+    password = db.Column(db.String(256), nullable=False)
+    date_created = db.Column(db.DateTime, default=db.func.current_timestamp())
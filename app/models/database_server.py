@@ -0,0 +1,25 @@
+import os
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import text as sa_text
+from sqlalchemy_utils import EncryptedType
+from app.models import db
+from app.models.model_mixin import ModelMixin
+
+secret = os.getenv('FLASK_APP_SECRET')
+
+
+class DatabaseServer(ModelMixin):
+    """ an extra server project databases of a flavour can be placed on """
+    __tablename__ = 'database_servers'
+    __table_args__ = (
+        db.UniqueConstraint('database_flavour_name', 'host', 'port'),
+    )
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True,
+                   server_default=sa_text("uuid_generate_v4()"))
+    database_flavour_name = db.Column(db.String(256), nullable=False, index=True)
+    host = db.Column(db.String(256), nullable=False)
+    port = db.Column(db.Integer, nullable=False)
+    admin_user = db.Column(db.String(256), nullable=False)
+    admin_password = db.Column(EncryptedType(db.String, secret), nullable=False)
+    date_created = db.Column(db.DateTime, default=db.func.current_timestamp())
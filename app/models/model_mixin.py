@@ -1,16 +1,63 @@
-from sqlalchemy import inspect
+import json
+import uuid
+import base64
+import datetime
+from sqlalchemy import inspect, literal, tuple_
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload, selectinload
 from ..models import db
+from ..helpers.response_cache import response_cache
+
+
+def encode_cursor(row):
+    """ opaque cursor pointing just after a row in (date_created, id) order """
+    key = json.dumps([row.date_created.isoformat(), str(row.id)])
+    return base64.urlsafe_b64encode(key.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """ return the (date_created, id) of a cursor, ValueError if malformed """
+    try:
+        date_created, id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        return datetime.datetime.fromisoformat(date_created), uuid.UUID(id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError('invalid cursor') from e
 
 
 class ModelMixin(db.Model):
 
     __abstract__ = True
 
+    # bumped by every UPDATE of the row, etags of responses are built on it
+    updated_at = db.Column(
+        db.DateTime,
+        server_default=db.func.current_timestamp(),
+        onupdate=db.func.current_timestamp())
+
+    def cache_tags(self):
+        """
+        Response cache tags a write to this row invalidates, its table,
+        the row itself and every row it references by a foreign key
+        """
+        state = inspect(self)
+        table = self.__table__
+        tags = {table.name, f'{table.name}:{self.id}'}
+
+        for column in table.columns:
+            for foreign_key in column.foreign_keys:
+                value = getattr(
+                    self, state.mapper.get_property_by_column(column).key)
+                if value is not None:
+                    tags.add(f'{foreign_key.column.table.name}:{value}')
+
+        return tags
+
     def save(self):
         try:
             db.session.add(self)
             db.session.commit()
+            response_cache.invalidate(self.cache_tags())
             return True
         except SQLAlchemyError as e:
             print(e)
@@ -19,8 +66,10 @@ class ModelMixin(db.Model):
 
     def delete(self):
         try:
+            tags = self.cache_tags()
             db.session.delete(self)
             db.session.commit()
+            response_cache.invalidate(tags)
             return True
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -32,9 +81,12 @@ class ModelMixin(db.Model):
             if instance is None:
                 return False
 
+            tags = instance.cache_tags()
             for key, value in kwargs.items():
                 setattr(instance, key, value)
             db.session.commit()
+            # a changed foreign key affects both the old and the new parent
+            response_cache.invalidate(tags | instance.cache_tags())
             return True
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -54,6 +106,34 @@ class ModelMixin(db.Model):
         except SQLAlchemyError as e:
             return False
 
+    @classmethod
+    def find_page(cls, limit=100, cursor=None, query=None, **kwargs):
+        """
+        Return up to limit rows after a cursor in (date_created, id) order
+        and the cursor of the next page, None on the last page. The key
+        is unique so rows are neither skipped nor repeated across pages,
+        and the index on it is seeked instead of counting an offset.
+        Raises ValueError for a malformed cursor.
+        """
+        query = (query or cls.query).filter_by(**kwargs)
+
+        if cursor:
+            date_created, id = decode_cursor(cursor)
+            query = query.filter(
+                tuple_(cls.date_created, cls.id) > tuple_(
+                    literal(date_created, cls.date_created.type),
+                    literal(id, cls.id.type)))
+
+        try:
+            rows = query.order_by(cls.date_created, cls.id).limit(limit + 1).all()
+        except SQLAlchemyError as e:
+            return False, None
+
+        if len(rows) > limit:
+            return rows[:limit], encode_cursor(rows[limit - 1])
+
+        return rows, None
+
     @classmethod
     def count(cls, **kwargs):
         return cls.query.filter_by(**kwargs).count()
@@ -66,6 +146,37 @@ class ModelMixin(db.Model):
             return False
         return False
 
+    @classmethod
+    def eager(cls, *relationships, joined=False):
+        """
+        Return a query that loads the given relationships along with the
+        rows instead of once per row on first access. Each relationship
+        costs one extra SELECT ... IN for the whole result, or none when
+        joined is set and it is fetched in the same query. Dotted names
+        such as 'project.cluster' load nested relationships.
+        """
+        loader = joinedload if joined else selectinload
+        options = []
+
+        for path in relationships:
+            option, entity = None, cls
+            for name in path.split('.'):
+                attribute = getattr(entity, name)
+                option = loader(attribute) if option is None \
+                    else getattr(option, loader.__name__)(attribute)
+                entity = attribute.property.mapper.class_
+            options.append(option)
+
+        return cls.query.options(*options)
+
+    @classmethod
+    def get_by_id_with(cls, id, *relationships, joined=True):
+        """ get_by_id loading the given relationships in the same round trip """
+        try:
+            return cls.eager(*relationships, joined=joined).filter_by(id=id).first()
+        except SQLAlchemyError:
+            return False
+
     @classmethod
     def get_by_id(cls, id):
         try:
@@ -2,12 +2,17 @@ from datetime import datetime, timedelta
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy import text as sa_text
 from sqlalchemy.orm import relationship, backref
+from sqlalchemy.exc import SQLAlchemyError
 from app.models import db
 from app.models.model_mixin import ModelMixin
 
 
 class Project(ModelMixin):
     __tablename__ = 'project'
+    __table_args__ = (
+        db.Index('ix_project_owner_id_date_created', 'owner_id', 'date_created', 'id'),
+        db.Index('ix_project_date_created', 'date_created', 'id'),
+    )
     id = db.Column(UUID(as_uuid=True), primary_key=True, server_default=sa_text("uuid_generate_v4()"))
     name = db.Column(db.String(256), nullable=True)
     alias = db.Column(db.String(256), nullable=False, unique=True)
@@ -15,6 +20,35 @@ class Project(ModelMixin):
     cluster_id = db.Column(UUID(as_uuid=True), db.ForeignKey('clusters.id'), nullable=False)
     apps = db.relationship('App', backref='project', lazy=True)
     description = db.Column(db.String, nullable=True)
+    # pending, provisioning, ready, failed, deleting, delete_failed or deleted
+    status = db.Column(db.String(32), nullable=False, default='pending')
     date_created = db.Column(db.DateTime, default=db.func.current_timestamp())
     project_databases = db.relationship(
         'ProjectDatabase', backref='project', lazy=True)
+
+    @classmethod
+    def active(cls, query=None):
+        """ narrow a query, of projects by default, to undeleted projects """
+        return (query or cls.query).filter(cls.status != 'deleted')
+
+    @classmethod
+    def find_active(cls, **kwargs):
+        """ projects that have not been deleted """
+        try:
+            return cls.active().filter_by(**kwargs).all()
+        except SQLAlchemyError:
+            return False
+
+    @classmethod
+    def get_active(cls, id, *relationships):
+        """
+        get_by_id for projects that have not been deleted, loading the
+        given relationships in the same round trip
+        """
+        query = cls.eager(*relationships, joined=True) if relationships \
+            else cls.query
+
+        try:
+            return cls.active(query).filter_by(id=id).first()
+        except SQLAlchemyError:
+            return False
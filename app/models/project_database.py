@@ -7,11 +7,17 @@ from flask_bcrypt import Bcrypt
 
 class ProjectDatabase(ModelMixin):
     __tablename__ = 'project_database'
+    __table_args__ = (
+        db.Index('ix_project_database_project_id_name', 'project_id', 'name'),
+        db.Index('ix_project_database_project_id_date_created',
+                 'project_id', 'date_created', 'id'),
+        db.Index('ix_project_database_date_created', 'date_created', 'id'),
+    )
     id = db.Column(UUID(as_uuid=True), primary_key=True,
                    server_default=sa_text("uuid_generate_v4()"))
     host = db.Column(db.String(256), nullable=True)
-    name = db.Column(db.String(256), nullable=False)
-    user = db.Column(db.String(256), nullable=False)
+    name = db.Column(db.String(256), nullable=False, index=True)
+    user = db.Column(db.String(256), nullable=False, index=True)
     password = db.Column(db.String(256), nullable=False)
     project_id = db.Column(UUID(as_uuid=True), db.ForeignKey(
         'project.id'))
@@ -14,6 +14,9 @@ class User(ModelMixin):
     """ user table definition """
 
     _tablename_ = "users"
+    __table_args__ = (
+        db.Index('ix_user_date_created', 'date_created', 'id'),
+    )
 
     # fields of the user table
     id = db.Column(UUID(as_uuid=True), primary_key=True, server_default=sa_text("uuid_generate_v4()"))
@@ -1,4 +1,5 @@
 from flask_restful import Api
+from app.helpers.serializer import output_json
 from app.controllers import (
     IndexView, UsersView, UserLoginView, OrganisationsView,
     OrganisationDetailView, NamespacesView, OrganisationNamespaceView,
@@ -9,17 +10,23 @@ from app.controllers import (
     ClusterDeploymentsView, ClusterDeploymentDetailView, ClusterPvcsView, ClusterPvcDetailView,
     ClusterPVDetailView, ClusterPVsView, ClusterPodsView, ClusterPodDetailView,
     ClusterServiceDetailView, ClusterServicesView, ClusterJobsView, ClusterJobDetailView,
-    ClusterStorageClassView, ClusterStorageClassDetailView,
+    ClusterStorageClassView, ClusterStorageClassDetailView, ClusterDriftView,
     ProjectsView, ProjectDetailView, UserProjectsView, UserEmailVerificationView,
     EmailVerificationRequest, ForgotPasswordView, ResetPasswordView, AppsView, UserDetailView, AdminLoginView,
     ProjectAppsView, AppDetailView, RegistriesView, ProjectMemoryUsageView, ProjectCPUView, AppMemoryUsageView,
     AppCpuUsageView, AppNetworkUsageView, ProjectNetworkRequestView, AppLogsView, AppStorageUsageView, ProjectStorageUsageView,
     ProjectDatabaseView, ProjectDatabaseDetailView, ProjectDatabaseAdminView, ProjectDatabaseAdminDetailView, 
-    ProjectDatabaseResetView, ProjectDatabaseAdminResetView
+    ProjectDatabaseResetView, ProjectDatabaseAdminResetView, DatabaseHealthView, ProjectMetricsView, AppMetricsView,
+    AppDeploymentStatusView, DatabaseServersView, DatabaseServerDetailView,
+    ProjectDatabaseStatsView, DatabaseStatsView, ProjectDatabaseExportView,
+    ProjectDatabaseImportView
 )
 
 api = Api()
 
+# encode response bodies once, with orjson
+api.representation('application/json')(output_json)
+
 # Index route
 api.add_resource(IndexView, '/')
 
@@ -75,6 +82,7 @@ api.add_resource(ClusterJobsView, '/clusters/<string:cluster_id>/jobs')
 api.add_resource(ClusterJobDetailView, '/clusters/<string:cluster_id>/jobs/<string:namespace_name>/<string:job_name>')
 api.add_resource(ClusterStorageClassView, '/clusters/<string:cluster_id>/storage_classes')
 api.add_resource(ClusterStorageClassDetailView, '/clusters/<string:cluster_id>/storage_classes/<string:storage_class_name>')
+api.add_resource(ClusterDriftView, '/clusters/<string:cluster_id>/drift')
 
 # Roles routes
 api.add_resource(RolesView, '/roles', endpoint='roles')
@@ -90,6 +98,7 @@ api.add_resource(ProjectCPUView, '/projects/<string:project_id>/metrics/cpu')
 api.add_resource(ProjectMemoryUsageView,'/projects/<string:project_id>/metrics/memory')
 api.add_resource(ProjectNetworkRequestView,'/projects/<string:project_id>/metrics/network')
 api.add_resource(ProjectStorageUsageView,'/projects/<string:project_id>/metrics/storage')
+api.add_resource(ProjectMetricsView, '/projects/<string:project_id>/metrics')
 
 # User Project routes
 api.add_resource(UserProjectsView, '/users/<string:user_id>/projects')
@@ -97,19 +106,28 @@ api.add_resource(UserProjectsView, '/users/<string:user_id>/projects')
 # App routes 
 api.add_resource(AppsView, '/apps')
 api.add_resource(AppDetailView, '/apps/<string:app_id>')
+api.add_resource(AppDeploymentStatusView, '/apps/deployments/<string:task_id>')
 api.add_resource(AppCpuUsageView, '/projects/<string:project_id>/apps/<string:app_id>/metrics/cpu')
 api.add_resource(AppMemoryUsageView, '/projects/<string:project_id>/apps/<string:app_id>/metrics/memory')
 api.add_resource(AppNetworkUsageView, '/projects/<string:project_id>/apps/<string:app_id>/metrics/network')
 api.add_resource(AppLogsView, '/projects/<string:project_id>/apps/<string:app_id>/logs')
 api.add_resource(AppStorageUsageView, '/projects/<string:project_id>/apps/<string:app_id>/metrics/storage')
+api.add_resource(AppMetricsView, '/projects/<string:project_id>/apps/<string:app_id>/metrics')
 
 # Registry routes
 api.add_resource(RegistriesView, '/registries')
 
 # Databases
 api.add_resource(ProjectDatabaseView, '/projects/<string:project_id>/databases')
+api.add_resource(ProjectDatabaseStatsView, '/projects/<string:project_id>/databases/stats')
 api.add_resource(ProjectDatabaseDetailView, '/projects/<string:project_id>/databases/<string:database_id>')
 api.add_resource(ProjectDatabaseAdminView, '/databases')
+api.add_resource(DatabaseHealthView, '/databases/health')
+api.add_resource(DatabaseStatsView, '/databases/stats')
+api.add_resource(DatabaseServersView, '/databases/servers')
+api.add_resource(DatabaseServerDetailView, '/databases/servers/<string:server_id>')
 api.add_resource(ProjectDatabaseAdminDetailView, '/databases/<string:database_id>')
 api.add_resource(ProjectDatabaseResetView, '/projects/<string:project_id>/databases/<string:database_id>/reset')
+api.add_resource(ProjectDatabaseExportView, '/projects/<string:project_id>/databases/<string:database_id>/export')
+api.add_resource(ProjectDatabaseImportView, '/projects/<string:project_id>/databases/<string:database_id>/import')
 api.add_resource(ProjectDatabaseAdminResetView, '/databases/<string:database_id>/reset')
\ No newline at end of file
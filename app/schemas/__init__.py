@@ -10,6 +10,7 @@ from .organisation_admins import OrgAdminSchema
 from .project import ProjectSchema
 from .app import AppSchema
 from .registry import RegistrySchema
-from .monitoring_metrics import MetricsSchema
+from .monitoring_metrics import MetricsSchema, MultiMetricsSchema
 from .pod_logs import PodsLogsSchema
 from .project_database import ProjectDatabaseSchema
+from .database_server import DatabaseServerSchema
@@ -37,4 +37,7 @@ class AppSchema(Schema):
     docker_password = fields.String()
     docker_email = fields.String()
     replicas = fields.Int(validate=validate.Range(min=1, max=4))
+    app_running_status = fields.String(attribute='status', dump_only=True)
+    ready_replicas = fields.Int(dump_only=True)
+    status_changed_at = fields.DateTime(dump_only=True)
     date_created = fields.Date(dump_only=True)
@@ -0,0 +1,37 @@
+from marshmallow import Schema, fields, validate
+
+
+class DatabaseServerSchema(Schema):
+
+    id = fields.String(dump_only=True)
+    database_flavour_name = fields.String(
+        required=True,
+        validate=[
+            validate.OneOf(["postgres", "mysql"],
+                           error='database flavour should be mysql or postgres'
+                           ),
+        ])
+    host = fields.String(required=True, error_message={
+        "required": "host is required"},
+        validate=[
+            validate.Regexp(
+                regex=r'^(?!\s*$)', error='host should be a valid string'
+            ),
+        ])
+    port = fields.Int(required=True, error_message={
+        "required": "port is required"})
+    admin_user = fields.String(required=True, error_message={
+        "required": "admin_user is required"},
+        validate=[
+            validate.Regexp(
+                regex=r'^(?!\s*$)', error='admin_user should be a valid string'
+            ),
+        ])
+    admin_password = fields.String(load_only=True, required=True, error_message={
+        "required": "admin_password is required"},
+        validate=[
+            validate.Regexp(
+                regex=r'^(?!\s*$)', error='admin_password should be a valid string'
+            ),
+        ])
+    date_created = fields.Date(dump_only=True)
@@ -11,4 +11,16 @@ class MetricsSchema(Schema):
             )
         ])
 
-    
+
+class MultiMetricsSchema(MetricsSchema):
+
+    metrics = fields.List(
+        fields.String(validate=[
+            validate.OneOf(
+                ['cpu', 'memory', 'network', 'storage'],
+                error='metric should be one of cpu, memory, network or storage'
+            )
+        ]),
+        required=True,
+        validate=[validate.Length(min=1, error='metrics should not be empty')]
+    )
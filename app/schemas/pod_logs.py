@@ -6,3 +6,4 @@ class PodsLogsSchema(Schema):
     tail_lines = fields.Integer()
     since_seconds = fields.Integer()
     timestamps = fields.Boolean()
+    follow = fields.Boolean()
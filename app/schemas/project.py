@@ -18,5 +18,6 @@ class ProjectSchema(Schema):
         "required": "cluster_id is required"
     })
     description = fields.String()
+    status = fields.String(dump_only=True)
     date_created = fields.Date(dump_only=True)
 
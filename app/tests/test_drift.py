@@ -0,0 +1,225 @@
+import json
+import uuid
+import datetime
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from kubernetes import client
+
+from server import create_app
+from app.models import db
+from app.models.app import App
+from app.models.clusters import Cluster
+from app.models.project import Project
+from app.models.user import User
+from app.helpers.clean_up import resource_clean_up
+from app.helpers.drift import delete_orphans, find_drift
+from app.helpers.owner_labels import APP_LABEL, PROJECT_LABEL
+from app.helpers.url import get_app_subdomain
+
+
+def kube_object(name, namespace=None, labels=None, phase=None):
+    item = dict(metadata=dict(name=name, namespace=namespace, labels=labels))
+    if phase:
+        item['status'] = dict(phase=phase)
+    return item
+
+
+class StubApi:
+    """ kube api answering list calls with fixed items and recording deletes """
+
+    def __init__(self, items=None, errors=None):
+        self.items = items or {}
+        self.errors = errors or {}
+        self.deleted = []
+
+    def __getattr__(self, function_name):
+        if function_name.startswith('list_'):
+            def list_function(*args, **kwargs):
+                items = self.items.get(function_name, [])
+                return SimpleNamespace(data=json.dumps(dict(items=items)))
+            return list_function
+
+        if function_name.startswith('delete_'):
+            def delete_function(name, namespace=None, *args, **kwargs):
+                self.deleted.append((function_name, namespace, name))
+                if name in self.errors:
+                    raise client.rest.ApiException(
+                        status=self.errors[name], reason='error')
+            return delete_function
+
+        raise AttributeError(function_name)
+
+
+class DriftTestCase(unittest.TestCase):
+    """ drift detection and garbage collection test case """
+
+    def setUp(self):
+        """ executed before each test """
+
+        self.app = create_app('testing')
+
+        with self.app.app_context():
+            """ bind app to current context """
+
+            # create all tables
+            db.engine.execute('CREATE EXTENSION IF NOT EXISTS "uuid-ossp"')
+            db.create_all()
+
+            settled = datetime.datetime.utcnow() - datetime.timedelta(days=1)
+
+            user = User(
+                email='test_email@testdomain.com',
+                name='test_name',
+                password='test_password')
+            user.save()
+
+            cluster = Cluster(
+                name='test_cluster',
+                host='https://cluster.testdomain.com',
+                token='test_token',
+                description='test cluster')
+            cluster.save()
+
+            project = Project(
+                name='test_project',
+                alias='test-project',
+                owner_id=user.id,
+                cluster_id=cluster.id,
+                status='ready',
+                date_created=settled)
+            project.save()
+
+            app = App(
+                name='test_app',
+                image='nginx',
+                project_id=project.id,
+                alias='test-app',
+                port=80,
+                date_created=settled)
+            app.save()
+
+            self.cluster_id = str(cluster.id)
+            self.project_id = str(project.id)
+            self.app_id = str(app.id)
+
+    def tearDown(self):
+        """ executed after each test """
+
+        # destroy created data
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_find_drift(self):
+        """ test that orphans and missing objects are told apart """
+
+        kube = StubApi(items={
+            'list_namespace': [
+                kube_object(
+                    'test-project', labels={PROJECT_LABEL: self.project_id}),
+                kube_object(
+                    'gone-project', labels={PROJECT_LABEL: str(uuid.uuid4())}),
+                kube_object(
+                    'leaving-project', labels={PROJECT_LABEL: str(uuid.uuid4())},
+                    phase='Terminating'),
+            ],
+        })
+        appsv1_api = StubApi(items={
+            'list_deployment_for_all_namespaces': [
+                kube_object(
+                    'test-app-deployment', 'test-project',
+                    labels={APP_LABEL: self.app_id}),
+                kube_object(
+                    'stale-deployment', 'test-project',
+                    labels={APP_LABEL: str(uuid.uuid4())}),
+                kube_object(
+                    'leaving-deployment', 'leaving-project',
+                    labels={APP_LABEL: str(uuid.uuid4())}),
+            ],
+        })
+        kube_client = SimpleNamespace(kube=kube, appsv1_api=appsv1_api)
+
+        with self.app.app_context():
+            cluster = Cluster.get_by_id(self.cluster_id)
+
+            with mock.patch(
+                    'app.helpers.drift.get_kube_clients', return_value=kube_client):
+                report = find_drift(cluster)
+
+        self.assertEqual(
+            report['orphans']['namespaces'],
+            [dict(namespace=None, name='gone-project')])
+        self.assertEqual(
+            report['orphans']['deployments'],
+            [dict(namespace='test-project', name='stale-deployment')])
+        self.assertEqual(report['missing']['namespaces'], [])
+        self.assertEqual(report['missing']['deployments'], [])
+        self.assertEqual(
+            report['missing']['services'],
+            [dict(namespace='test-project', name='test-app-service')])
+
+    def test_delete_orphans(self):
+        """ test that objects already gone or going are not failures """
+
+        kube = StubApi(errors={'gone': 404, 'going': 409, 'stuck': 500})
+        kube_client = SimpleNamespace(kube=kube, appsv1_api=StubApi())
+
+        failed = delete_orphans(kube_client, dict(
+            namespaces=[dict(namespace=None, name='going')],
+            services=[
+                dict(namespace='test-project', name='gone'),
+                dict(namespace='test-project', name='stuck'),
+            ],
+        ))
+
+        self.assertEqual(len(kube.deleted), 3)
+        self.assertEqual(failed, [dict(
+            kind='services', error='error',
+            namespace='test-project', name='stuck')])
+
+    def test_resource_clean_up(self):
+        """ test that each registry key removes the object it stands for """
+
+        kube = StubApi()
+        appsv1_api = StubApi()
+        extension_api = StubApi()
+
+        rule = SimpleNamespace(host=get_app_subdomain('test-app'))
+        ingress = SimpleNamespace(
+            metadata=SimpleNamespace(name='test-project-ingress'),
+            spec=SimpleNamespace(rules=[rule]))
+        extension_api.list_namespaced_ingress = \
+            lambda namespace: SimpleNamespace(items=[ingress])
+
+        kube_client = SimpleNamespace(
+            kube=kube, appsv1_api=appsv1_api, extension_api=extension_api)
+
+        resource_clean_up(dict(
+            db_deployment=False,
+            db_service=False,
+            image_pull_secret=True,
+            pvc=True,
+            app_deployment=True,
+            app_service=True,
+            ingress_entry=True,
+        ), 'test-app', 'test-project', kube_client)
+
+        self.assertEqual(sorted(kube.deleted), [
+            ('delete_namespaced_persistent_volume_claim',
+             'test-project', 'test-app-pvc'),
+            ('delete_namespaced_secret', 'test-project', 'test-app'),
+            ('delete_namespaced_service', 'test-project', 'test-app-service'),
+        ])
+        self.assertEqual(appsv1_api.deleted, [
+            ('delete_namespaced_deployment', 'test-project', 'test-app-deployment'),
+        ])
+        # the app's rule was the only one, the ingress goes with it
+        self.assertEqual(extension_api.deleted, [
+            ('delete_namespaced_ingress', 'test-project', 'test-project-ingress'),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
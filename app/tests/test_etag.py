@@ -0,0 +1,105 @@
+import unittest
+
+from server import create_app
+from app.models import db
+from app.models.clusters import Cluster
+from app.models.project import Project
+from app.models.user import User
+
+
+class ETagTestCase(unittest.TestCase):
+    """ conditional GET test case """
+
+    def setUp(self):
+        """ executed before each test """
+
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            """ bind app to current context """
+
+            # create all tables
+            db.engine.execute('CREATE EXTENSION IF NOT EXISTS "uuid-ossp"')
+            db.create_all()
+
+            user = User(
+                email='test_email@testdomain.com',
+                name='test_name',
+                password='test_password')
+            user.save()
+
+            cluster = Cluster(
+                name='test_cluster',
+                host='https://cluster.testdomain.com',
+                token='test_token',
+                description='test cluster')
+            cluster.save()
+
+            project = Project(
+                name='test_project',
+                alias='test-project',
+                owner_id=user.id,
+                cluster_id=cluster.id,
+                status='ready')
+            project.save()
+
+            self.project_id = str(project.id)
+            self.headers = {
+                'Authorization': 'Bearer ' + user.generate_token(
+                    dict(id=str(user.id), roles=[]))
+            }
+
+    def tearDown(self):
+        """ executed after each test """
+
+        # destroy created data
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_project_not_modified(self):
+        """ test that a project is not sent again until it changes """
+
+        url = f'/projects/{self.project_id}'
+
+        response = self.client.get(url, headers=self.headers)
+        etag = response.headers.get('ETag')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(etag)
+
+        response = self.client.get(
+            url, headers={**self.headers, 'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+        with self.app.app_context():
+            project = Project.get_by_id(self.project_id)
+            Project.update(project, description='changed')
+
+        response = self.client.get(
+            url, headers={**self.headers, 'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers.get('ETag'), etag)
+    def test_deleted_project_not_found(self):
+        """ test that an old etag does not hide a deleted project """
+
+        url = f'/projects/{self.project_id}'
+
+        response = self.client.get(url, headers=self.headers)
+        etag = response.headers.get('ETag')
+
+        with self.app.app_context():
+            project = Project.get_by_id(self.project_id)
+            Project.update(project, status='deleted')
+
+        response = self.client.get(
+            url, headers={**self.headers, 'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 404)
+
+if __name__ == 'main':
+    unittest.main()
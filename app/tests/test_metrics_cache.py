@@ -0,0 +1,72 @@
+import unittest
+
+from app.helpers import metrics_cache
+from app.helpers.metrics_cache import MemoryBackend, cached_query_range
+
+
+class MetricsCacheTestCase(unittest.TestCase):
+    """ prometheus range cache test case, runs without prometheus """
+
+    def setUp(self):
+        """ executed before each test """
+
+        self.backend = MemoryBackend()
+        self.fetched = []
+
+    def fetch(self, metric, start, end, step):
+        """ stand in for prometheus, every bucket holds its timestamp """
+
+        self.fetched.append((start, end))
+        return {ts: ts for ts in range(int(start), int(end) + 1, step)}
+
+    def query(self, start, end, now):
+        return cached_query_range(
+            self.fetch, 'metric', start, end, '60s',
+            backend=self.backend, now=now)
+
+    def test_merges_cached_buckets(self):
+        """ test that only buckets missing from the cache are fetched """
+
+        points = self.query(600, 1200, now=10000)
+
+        self.assertEqual(list(points), list(range(600, 1201, 60)))
+        self.assertEqual(self.fetched, [(600, 1200)])
+
+        points = self.query(600, 1200, now=10000)
+
+        self.assertEqual(list(points), list(range(600, 1201, 60)))
+        self.assertEqual(len(self.fetched), 1)
+
+        points = self.query(600, 1500, now=10000)
+
+        self.assertEqual(list(points), list(range(600, 1501, 60)))
+        self.assertEqual(self.fetched[-1], (1260, 1500))
+
+    def test_trailing_bucket_not_kept(self):
+        """ test that a still changing bucket is not cached as complete """
+
+        self.query(600, 1200, now=1230)
+
+        stored = self.backend.get_points(
+            metrics_cache.series_key('metric', 60))
+
+        self.assertNotIn(1200, stored)
+        self.assertIn(1140, stored)
+
+    def test_trims_old_buckets(self):
+        """ test that buckets older than the retention are dropped on write """
+
+        retention = metrics_cache.PROMETHEUS_CACHE_RETENTION
+        key = metrics_cache.series_key('metric', 60)
+
+        self.query(600, 1200, now=10000)
+        self.query(retention, retention + 600, now=retention + 900)
+
+        stored = self.backend.get_points(key)
+
+        self.assertNotIn(600, stored)
+        self.assertIn(retention, stored)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import uuid
+
+from server import create_app
+from app.models import db
+from app.models.app import App
+from app.models.project import Project
+from app.models.project_database import ProjectDatabase
+from app.models.user import User
+
+
+# lookups run on most requests, each should be answered from an index
+HOT_QUERIES = {
+    'app by name': lambda: App.query.filter_by(name='app'),
+    'apps of a project': lambda: App.query.filter_by(project_id=str(uuid.uuid4())),
+    'app of a project by name': lambda: App.query.filter_by(
+        project_id=str(uuid.uuid4()), name='app'),
+    'projects of an owner': lambda: Project.query.filter_by(owner_id=str(uuid.uuid4())),
+    'database by name': lambda: ProjectDatabase.query.filter_by(name='database'),
+    'database by user': lambda: ProjectDatabase.query.filter_by(user='user'),
+    'databases of a project': lambda: ProjectDatabase.query.filter_by(
+        project_id=str(uuid.uuid4())),
+    'page of users': lambda: User.query.order_by(
+        User.date_created, User.id).limit(100),
+    'page of an owner\'s projects': lambda: Project.query.filter_by(
+        owner_id=str(uuid.uuid4())).order_by(
+            Project.date_created, Project.id).limit(100),
+    'page of a project\'s databases': lambda: ProjectDatabase.query.filter_by(
+        project_id=str(uuid.uuid4())).order_by(
+            ProjectDatabase.date_created, ProjectDatabase.id).limit(100),
+}
+
+
+class QueryPlanTestCase(unittest.TestCase):
+    """ hot query plan test case """
+
+    def setUp(self):
+        """ executed before each test """
+
+        self.app = create_app('testing')
+
+        with self.app.app_context():
+            """ bind app to current context """
+
+            # create all tables
+            db.engine.execute('CREATE EXTENSION IF NOT EXISTS "uuid-ossp"')
+            db.create_all()
+
+    def tearDown(self):
+        """ executed after each test """
+
+        # destroy created data
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def explain(self, query):
+        """ return the plan postgres picks for a query """
+        compiled = query.statement.compile(dialect=db.engine.dialect)
+        connection = db.session.connection()
+
+        # tables are empty here, make a sequential scan the last resort
+        # so it only shows up when no index can serve the query
+        connection.execute('SET enable_seqscan = off')
+        rows = connection.execute(f'EXPLAIN {compiled}', compiled.params)
+
+        return '\n'.join(row[0] for row in rows)
+
+    def test_hot_queries_use_indexes(self):
+        """ test that no hot query falls back to a sequential scan """
+
+        with self.app.app_context():
+            for name, build_query in HOT_QUERIES.items():
+                with self.subTest(query=name):
+                    plan = self.explain(build_query())
+                    self.assertNotIn('Seq Scan', plan, f'{name}:\n{plan}')
+
+if __name__ == 'main':
+    unittest.main()
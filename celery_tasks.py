@@ -1,5 +1,208 @@
+from kubernetes import client
 from server import celery
+from app.models.app import App
+from app.models.project import Project
+from app.models.clusters import Cluster
+from app.helpers.app_deployment import (
+    DEPLOYMENT_STEPS, deploy_app, get_error_message, release_image_pull_secret)
+from app.helpers.kube import get_kube_clients
+from app.helpers.project_lifecycle import (
+    DELETABLE_STATES, PROJECT_DELETE_MAX_RETRIES, PROJECT_DELETE_POLL_INTERVAL,
+    PROJECT_PROVISION_MAX_RETRIES, PROJECT_PROVISION_RETRY_DELAY,
+    set_project_status, create_project_namespace, delete_project_namespace,
+    delete_project_data)
+from app.helpers.db_flavor import database_flavours
+from app.helpers.database_pool import (
+    DATABASE_POOL_REPLENISH_INTERVAL, replenish_database_pool)
+from app.helpers.app_status import (
+    APP_STATUS_RECONCILE_INTERVAL, reconcile_cluster_apps)
+from app.helpers.drift import (
+    DRIFT_DRY_RUN, DRIFT_RECONCILE_INTERVAL, reconcile_cluster_drift)
+from app.schemas import AppSchema
 
 @celery.task(name='celery_tasks.hello')
 def hello():
     return 'Hello'
+
+
+@celery.task(bind=True, name='celery_tasks.deploy_app')
+def deploy_app_task(self, project_id, app_data, persistent_storage=False):
+    """
+    Deploy an app in the background, publishing the status of each step
+    in the task's meta so clients can poll it.
+    """
+    steps = {step: 'pending' for step in DEPLOYMENT_STEPS}
+
+    def progress(**extra):
+        return dict(
+            project_id=project_id,
+            app_name=app_data['name'],
+            steps=[dict(name=step, status=steps[step]) for step in DEPLOYMENT_STEPS],
+            **extra
+        )
+
+    def on_step(step, status):
+        steps[step] = status
+        self.update_state(state='PROGRESS', meta=progress())
+
+    project = Project.get_active(project_id)
+
+    if not project:
+        # deleted since the deployment was queued, its namespace is going
+        deleted_project = Project.get_by_id(project_id)
+        if deleted_project:
+            release_image_pull_secret(deleted_project, app_data)
+        return progress(status='failed', message=f'project {project_id} not found')
+
+    if App.find_first(name=app_data['name'], project_id=project_id):
+        # the pull secret was created with the request
+        release_image_pull_secret(project, app_data)
+        return progress(
+            status='failed',
+            message=f'App with name {app_data["name"]} already exists')
+
+    try:
+        new_app = deploy_app(project, app_data, persistent_storage, on_step)
+    except Exception as e:
+        for step, status in steps.items():
+            if status == 'running':
+                steps[step] = 'failed'
+        return progress(status='failed', message=get_error_message(e))
+
+    new_app_data, _ = AppSchema().dump(new_app)
+
+    return progress(status='deployed', app=new_app_data)
+
+
+@celery.task(
+    bind=True, name='celery_tasks.provision_project',
+    max_retries=PROJECT_PROVISION_MAX_RETRIES)
+def provision_project(self, project_id):
+    """
+    Create a project's namespace and ingress. Safe to run again, it only
+    acts on pending or provisioning projects and creating existing
+    resources is not an error.
+    """
+    if not set_project_status(
+            project_id, 'provisioning', from_states=['pending', 'provisioning']):
+        project = Project.get_by_id(project_id)
+        return dict(project_id=project_id, status=project.status if project else None)
+
+    project = Project.get_by_id(project_id)
+    kube_client = get_kube_clients(project.cluster)
+
+    try:
+        create_project_namespace(kube_client, project.alias, project.id)
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=PROJECT_PROVISION_RETRY_DELAY)
+
+        set_project_status(project_id, 'failed', from_states=['provisioning'])
+        return dict(
+            project_id=project_id, status='failed', message=get_error_message(e))
+
+    if not set_project_status(project_id, 'ready', from_states=['provisioning']):
+        # deleted while the namespace was being created, do not leave it behind
+        delete_project.delay(project_id)
+        return dict(project_id=project_id, status='deleting')
+
+    return dict(project_id=project_id, status='ready')
+
+
+@celery.task(
+    bind=True, name='celery_tasks.delete_project',
+    max_retries=PROJECT_DELETE_MAX_RETRIES)
+def delete_project(self, project_id):
+    """
+    Delete a project's namespace, then its tenant databases and its app
+    and database rows, and mark the project deleted once all are gone.
+    Instead of blocking a worker on the namespace's finalizers the task
+    retries itself until the namespace disappears. A project whose
+    teardown runs out of retries is left delete_failed, from where a
+    new delete starts it again.
+    """
+    project = Project.get_by_id(project_id)
+
+    if not project or project.status == 'deleted':
+        return dict(project_id=project_id, status='deleted')
+
+    if not set_project_status(project_id, 'deleting', from_states=DELETABLE_STATES):
+        return dict(project_id=project_id, status=project.status)
+
+    def retry_or_fail():
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=PROJECT_DELETE_POLL_INTERVAL)
+
+        set_project_status(project_id, 'delete_failed', from_states=['deleting'])
+        return dict(project_id=project_id, status='delete_failed')
+
+    kube_client = get_kube_clients(project.cluster)
+
+    try:
+        if not delete_project_namespace(kube_client, project.alias):
+            return retry_or_fail()
+    except client.rest.ApiException as e:
+        print(e)
+        return retry_or_fail()
+
+    if not delete_project_data(project):
+        return retry_or_fail()
+
+    set_project_status(project_id, 'deleted', from_states=['deleting'])
+
+    return dict(project_id=project_id, status='deleted')
+
+
+@celery.task(
+    name='celery_tasks.replenish_database_pool',
+    expires=DATABASE_POOL_REPLENISH_INTERVAL)
+def replenish_database_pool_task():
+    """ top up the pool of unassigned databases of every flavour """
+    created = {}
+
+    for db_flavour in database_flavours:
+        created[db_flavour['name']] = replenish_database_pool(db_flavour['name'])
+
+    return created
+
+
+@celery.task(
+    name='celery_tasks.reconcile_app_statuses',
+    expires=APP_STATUS_RECONCILE_INTERVAL)
+def reconcile_app_statuses():
+    """ sync the status columns of every app with its cluster's deployments """
+    reconciled = {}
+
+    for cluster in Cluster.find_all():
+        try:
+            reconciled[str(cluster.id)] = reconcile_cluster_apps(cluster)
+        except Exception as e:
+            # an unreachable cluster keeps its apps' last known status
+            reconciled[str(cluster.id)] = get_error_message(e)
+
+    return reconciled
+
+
+@celery.task(
+    name='celery_tasks.reconcile_drift',
+    expires=DRIFT_RECONCILE_INTERVAL)
+def reconcile_drift(cluster_id=None, dry_run=None):
+    """
+    Report the drift between the rows and the clusters, or a single
+    cluster, garbage collecting orphans unless it is a dry run
+    """
+    dry_run = DRIFT_DRY_RUN if dry_run is None else dry_run
+    clusters = [Cluster.get_by_id(cluster_id)] if cluster_id else Cluster.find_all()
+    summaries = {}
+
+    for cluster in filter(None, clusters):
+        try:
+            report = reconcile_cluster_drift(cluster, dry_run=dry_run)
+            summaries[str(cluster.id)] = dict(
+                dry_run=dry_run,
+                summary=report['summary'],
+                failed=report.get('failed', []))
+        except Exception as e:
+            summaries[str(cluster.id)] = get_error_message(e)
+
+    return summaries
@@ -25,6 +25,12 @@ class Base:
     # EXCEPTIONS 
     PROPAGATE_EXCEPTIONS = True
 
+    # add the X-SQL-Statement-Count header outside debug too
+    SQL_STATEMENT_COUNT = os.getenv("SQL_STATEMENT_COUNT", "").lower() == "true"
+
+    # cache GET responses in redis, invalidated as models are written
+    RESPONSE_CACHE = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+
     
 
 
@@ -41,6 +47,7 @@ class Testing(Base):
 
     TESTING = True
     DEBUG = True
+    RESPONSE_CACHE = False
     # use a separate db
 
     SQLALCHEMY_DATABASE_URI = "postgresql:///cranecloud_test_db"
@@ -16,6 +16,8 @@ from app.models import db
 
 from app.helpers.email import mail
 
+from app.helpers.sql_counter import init_sql_counter
+
 dotenv_path = join(dirname(__file__), '.env')
 load_dotenv(dotenv_path)
 
@@ -47,6 +49,9 @@ def create_app(config_name):
     # initialize mail
     mail.init_app(app)
 
+    # report the sql statements of each request in a debug header
+    init_sql_counter(app)
+
     # swagger
     app.config['SWAGGER'] = {
         'title': 'Crane Cloud API',
@@ -95,5 +100,38 @@ redis_url = os.getenv("REDIS_URL")
 app = create_app(os.getenv('FLASK_ENV'))
 celery = Celery(app.name, broker=redis_url, backend=redis_url, include=['celery_tasks'])
 
+
+class ContextTask(celery.Task):
+    """ run tasks inside the app context so they can use the db """
+
+    def __call__(self, *args, **kwargs):
+        with app.app_context():
+            return self.run(*args, **kwargs)
+
+
+celery.Task = ContextTask
+
+# keep a task's arguments with its result, a failed deployment is
+# authorised from the project it was queued for
+celery.conf.result_extended = True
+
+celery.conf.beat_schedule = {
+    # keep pre-created databases ready for new project databases
+    'replenish-database-pool': {
+        'task': 'celery_tasks.replenish_database_pool',
+        'schedule': int(os.getenv('DATABASE_POOL_REPLENISH_INTERVAL', 60)),
+    },
+    # keep the app status columns in line with the clusters' deployments
+    'reconcile-app-statuses': {
+        'task': 'celery_tasks.reconcile_app_statuses',
+        'schedule': int(os.getenv('APP_STATUS_RECONCILE_INTERVAL', 30)),
+    },
+    # find objects left behind in clusters and rows with nothing behind them
+    'reconcile-drift': {
+        'task': 'celery_tasks.reconcile_drift',
+        'schedule': int(os.getenv('DRIFT_RECONCILE_INTERVAL', 3600)),
+    },
+}
+
 if __name__ == '__main__':
     app.run()